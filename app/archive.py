@@ -0,0 +1,94 @@
+"""
+Cold archive for old submissions.
+
+Submissions created more than ARCHIVE_AFTER_DAYS ago are moved from the hot
+`submissions` table into `submissions_archive` in batches of
+ARCHIVE_BATCH_SIZE rows, one transaction per batch, so the job never holds
+the write lock for long. Rows keep their ids. Listings and reports only read
+the archive when a date range reaches back past the cutoff or the caller
+asks for archived rows explicitly. Run it from cron with:
+
+    python -m app.archive
+"""
+from datetime import date, datetime, timedelta
+from typing import Optional
+import sys
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .counts import count_cache
+from .models import ArchivedSubmission, Submission
+from .shards import submission_sessions
+
+
+# Columns copied from submissions into the archive
+ARCHIVE_COLUMNS = [column.key for column in Submission.__table__.columns]
+
+
+def archive_cutoff(now: datetime = None) -> datetime:
+    """Return the creation time before which submissions belong in the archive"""
+    return (now or datetime.now()) - timedelta(days=settings.ARCHIVE_AFTER_DAYS)
+
+
+def archive_requested(created_from: Optional[date], created_to: Optional[date]) -> bool:
+    """Whether a created_at range reaches back far enough to need the archive"""
+    if created_from is None and created_to is None:
+        return False
+    return created_from is None or created_from < archive_cutoff().date()
+
+
+def archive_submissions(db: Session, cutoff: datetime = None, batch_size: int = None) -> int:
+    """
+    Move submissions created before the cutoff into the archive table and
+    return how many were moved
+    """
+    cutoff = cutoff or archive_cutoff()
+    batch_size = batch_size or settings.ARCHIVE_BATCH_SIZE
+    hot = Submission.__table__
+    archive = ArchivedSubmission.__table__
+
+    moved = 0
+    while True:
+        ids = db.execute(
+            select(hot.c.id).where(hot.c.created_at < cutoff).order_by(hot.c.id).limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            break
+
+        db.execute(insert(archive).from_select(
+            ARCHIVE_COLUMNS,
+            select(*[hot.c[column] for column in ARCHIVE_COLUMNS]).where(hot.c.id.in_(ids)),
+        ))
+        db.execute(delete(hot).where(hot.c.id.in_(ids)))
+        db.commit()
+        moved += len(ids)
+
+    if moved:
+        count_cache.clear()
+    return moved
+
+
+def run_archive(db: Session, cutoff: datetime = None) -> int:
+    """Archive old submissions in the main database, or in every shard in shard mode"""
+    moved = 0
+    with submission_sessions(db) as sessions:
+        for session in sessions.values():
+            moved += archive_submissions(session, cutoff)
+    return moved
+
+
+if __name__ == "__main__":
+    from .database import SessionLocal
+
+    if sys.argv[1:]:
+        print("Usage: python -m app.archive")
+        sys.exit(1)
+
+    db = SessionLocal()
+    try:
+        moved = run_archive(db)
+        print(f"Archived {moved} submissions created before {archive_cutoff():%Y-%m-%d}")
+    finally:
+        db.close()
\ No newline at end of file
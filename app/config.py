@@ -11,15 +11,73 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str
+    ASYNC_DATABASE_URL: Optional[str] = None  # Derived from DATABASE_URL when not set
+    
+    # Connection pool
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = -1  # Seconds before a connection is replaced, -1 to never recycle
+    DB_POOL_PRE_PING: bool = True
+    
+    # SQLite pragmas, applied to every new connection
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024
+    SQLITE_CACHE_SIZE: int = -64000  # Negative values are in KiB
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    
+    # Query instrumentation
+    SLOW_QUERY_MS: int = 200  # Statements slower than this are logged with their plan
+    
+    # Group commit: funnel writes through a single writer that commits in batches
+    GROUP_COMMIT_ENABLED: bool = False
+    GROUP_COMMIT_INTERVAL_MS: int = 5
+    GROUP_COMMIT_MAX_BATCH: int = 100
+    
+    # Read replicas for read-only endpoints
+    READ_REPLICA_URLS: str = ""  # Comma-separated database URLs
+    REPLICA_HEALTH_CHECK_SECONDS: int = 30
+    READ_YOUR_WRITES_SECONDS: int = 5  # Read from the primary this long after a caller writes
+    
+    # Per-plant shards: keep each plant's submissions in its own SQLite file
+    SHARD_BY_PLANT: bool = False
+    SHARD_DIR: str = "shards"
+    
+    # Cold archive: submissions older than this move to submissions_archive
+    ARCHIVE_AFTER_DAYS: int = 730
+    ARCHIVE_BATCH_SIZE: int = 1000
     
     # JWT
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     
+    # List endpoints
+    LIST_COUNT_MODE: str = "exact"  # exact, cached or estimated
+    COUNT_CACHE_TTL_SECONDS: int = 60
+    
     # File uploads
     UPLOADS_DIR: str = "uploads"
     MAX_FILES_PER_FOLDER: int = 100
+    IMPORT_BATCH_SIZE: int = 500  # Rows inserted per transaction by bulk imports
+    BATCH_MAX_SUBMISSIONS: int = 50  # Submissions accepted by one POST /submissions/batch
+    IDEMPOTENCY_TTL_SECONDS: int = 24 * 60 * 60  # How long a response is replayed for its Idempotency-Key
+    IDEMPOTENCY_WAIT_SECONDS: int = 30  # How long a replay waits for the original request, after which its claim counts as abandoned
+    FILE_DELETION_DELAY_SECONDS: int = 60 * 60  # How long replaced files are kept before deletion
+    
+    # Reports
+    REPORT_WORKERS: Optional[int] = None  # Defaults to the number of CPU cores
+    REPORT_CACHE_ENABLED: bool = True
+    REPORT_CACHE_DIR: str = "report_cache"  # Shared by every worker process
+    REPORT_SPOOL_THRESHOLD: int = 8 * 1024 * 1024  # Reports above this size are spooled to disk
+    
+    # Report pre-generation (cache warming)
+    REPORT_PREGEN_ENABLED: bool = False
+    REPORT_PREGEN_HOUR: int = 2  # Local hour of the nightly run
+    REPORT_PREGEN_SUBMISSIONS: int = 50  # Re-render a plant after this many new submissions
+    REPORT_PREGEN_INTERVAL_SECONDS: int = 60
+    REPORT_PREGEN_LOCK_FILE: str = "report_scheduler.lock"  # Held by the one worker running the scheduler
     
     @field_validator("UPLOADS_DIR")
     @classmethod
@@ -29,6 +87,20 @@ class Settings(BaseSettings):
             path.mkdir(parents=True)
         return v
     
+    @field_validator("SQLITE_JOURNAL_MODE")
+    @classmethod
+    def validate_journal_mode(cls, v):
+        if v.upper() not in {"DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"}:
+            raise ValueError(f"Invalid SQLite journal mode: {v}")
+        return v.upper()
+    
+    @field_validator("SQLITE_SYNCHRONOUS")
+    @classmethod
+    def validate_synchronous(cls, v):
+        if v.upper() not in {"OFF", "NORMAL", "FULL", "EXTRA"}:
+            raise ValueError(f"Invalid SQLite synchronous setting: {v}")
+        return v.upper()
+    
     model_config = {
         "env_file": ".env",
         "case_sensitive": True
@@ -0,0 +1,143 @@
+"""
+Count strategies for paginated list endpoints.
+
+- exact: COUNT(*) over the filtered query on every page
+- cached: exact counts remembered per (table, plant_id), invalidated on writes
+  and expired after COUNT_CACHE_TTL_SECONDS so other workers' writes show up
+- estimated: row estimates from the planner statistics (sqlite_stat1 after
+  ANALYZE, pg_class / EXPLAIN on Postgres), falling back to exact when the
+  database has no statistics yet. sqlite_stat1 only knows the average rows
+  per plant, so per-plant totals on SQLite are counted exactly instead; that
+  count is an index-only scan of ix_<table>_plant_id (plant_id, id).
+"""
+from sqlalchemy import select, func, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from typing import Optional, Tuple
+import enum
+import json
+import threading
+import time
+
+from .config import settings
+
+
+class CountMode(str, enum.Enum):
+    EXACT = "exact"
+    CACHED = "cached"
+    ESTIMATED = "estimated"
+
+
+class CountCache:
+    """In-process cache of exact counts keyed by (table, plant_id)"""
+
+    def __init__(self):
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def get(self, table: str, plant_id: Optional[int] = None) -> Optional[int]:
+        with self._lock:
+            entry = self._counts.get((table, plant_id))
+        if entry is None or time.monotonic() - entry[1] > settings.COUNT_CACHE_TTL_SECONDS:
+            return None
+        return entry[0]
+
+    def set(self, table: str, plant_id: Optional[int], count: int):
+        with self._lock:
+            self._counts[(table, plant_id)] = (count, time.monotonic())
+
+    def invalidate(self, table: str, plant_id: Optional[int] = None):
+        """Drop the count for a plant along with the all-plants count it is part of"""
+        with self._lock:
+            self._counts.pop((table, plant_id), None)
+            self._counts.pop((table, None), None)
+
+    def clear(self):
+        with self._lock:
+            self._counts.clear()
+
+
+count_cache = CountCache()
+
+
+def _estimate_sqlite(db: Session, table: str, plant_id: Optional[int]) -> Optional[int]:
+    # A plant's own row count isn't in the statistics, only the average over plants
+    if plant_id is not None:
+        return None
+
+    # sqlite_stat1 only exists once ANALYZE has been run
+    has_stats = db.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'")
+    ).scalar()
+    if not has_stats:
+        return None
+
+    stats = dict(db.execute(
+        text("SELECT idx, stat FROM sqlite_stat1 WHERE tbl = :tbl"), {"tbl": table}
+    ).all())
+    if not stats:
+        return None
+
+    # The first number of every stat row is the table's row count
+    return int(next(iter(stats.values())).split()[0])
+
+
+def _estimate_postgresql(db: Session, table: str, plant_id: Optional[int]) -> Optional[int]:
+    if plant_id is None:
+        estimate = db.execute(
+            text("SELECT reltuples FROM pg_class WHERE relname = :tbl"), {"tbl": table}
+        ).scalar()
+        # reltuples is -1 until the table has been vacuumed or analyzed
+        return int(estimate) if estimate is not None and estimate >= 0 else None
+
+    plan = db.execute(
+        text(f"EXPLAIN (FORMAT JSON) SELECT 1 FROM {table} WHERE plant_id = :plant_id"), {"plant_id": plant_id}
+    ).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def estimate_count(db: Session, table: str, plant_id: Optional[int] = None) -> Optional[int]:
+    """Estimate the rows of a table (optionally for one plant) from planner statistics"""
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        return _estimate_sqlite(db, table, plant_id)
+    if dialect == "postgresql":
+        return _estimate_postgresql(db, table, plant_id)
+    return None
+
+
+async def count_total(
+    db: AsyncSession,
+    query,
+    table: str,
+    plant_id: Optional[int],
+    mode: CountMode,
+) -> Tuple[int, str]:
+    """
+    Count the rows of a list query with the requested strategy.
+    Returns the total along with the mode that actually produced it.
+    """
+    if mode == CountMode.CACHED:
+        cached = count_cache.get(table, plant_id)
+        if cached is not None:
+            return cached, CountMode.CACHED.value
+    elif mode == CountMode.ESTIMATED:
+        estimate = await db.run_sync(estimate_count, table, plant_id)
+        if estimate is not None:
+            return estimate, CountMode.ESTIMATED.value
+
+    total = await db.scalar(select(func.count()).select_from(query.subquery()))
+    if mode == CountMode.CACHED:
+        count_cache.set(table, plant_id, total)
+    return total, CountMode.EXACT.value
+
+
+def least_exact_mode(modes) -> str:
+    """Return the least exact of the count modes that went into a combined total"""
+    modes = set(modes)
+    for mode in (CountMode.ESTIMATED.value, CountMode.CACHED.value):
+        if mode in modes:
+            return mode
+    return CountMode.EXACT.value
\ No newline at end of file
@@ -1,17 +1,228 @@
-from sqlalchemy import create_engine
+from fastapi import Request
+from loguru import logger
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+import itertools
+import threading
+import time
 from .config import settings
 
 SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
 
-connect_args = {"check_same_thread": False} if SQLALCHEMY_DATABASE_URL.startswith("sqlite") else {}
+# Async drivers used by the routers for each sync backend
+ASYNC_DRIVERS = {
+    "sqlite": "aiosqlite",
+    "postgresql": "asyncpg",
+}
 
+
+def get_async_database_url(database_url: str) -> str:
+    """Map a sync database URL onto the matching async driver"""
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    if backend in ASYNC_DRIVERS:
+        url = url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}")
+    return url.render_as_string(hide_password=False)
+
+
+def get_engine_options(database_url: str, is_async: bool = False) -> dict:
+    """Build create_engine() keyword arguments from the pool settings"""
+    url = make_url(database_url)
+    options = {
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+    }
+
+    if url.get_backend_name() == "sqlite":
+        if not is_async:
+            options["connect_args"] = {"check_same_thread": False}
+        # In-memory databases live on a single shared connection
+        if url.database in (None, "", ":memory:"):
+            return options
+        # aiosqlite defaults to NullPool, which would reopen (and re-tune) a connection per request
+        if is_async:
+            options["poolclass"] = AsyncAdaptedQueuePool
+
+    options.update(
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+    )
+    return options
+
+
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """
+    Tune every new SQLite connection. WAL lets readers run alongside the
+    single writer, and busy_timeout makes writers wait for the lock instead
+    of failing with "database is locked" during upload bursts.
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}")
+    cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+    cursor.execute(f"PRAGMA cache_size={int(settings.SQLITE_CACHE_SIZE)}")
+    cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+    cursor.close()
+
+
+def param_shape(parameters) -> Any:
+    """Describe bound parameters by type only, so logs never carry submitted values"""
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        # executemany passes a sequence of parameter sets
+        if parameters and isinstance(parameters[0], (dict, list, tuple)):
+            return {"rows": len(parameters), "shape": param_shape(parameters[0])}
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__ if parameters is not None else None
+
+
+class QueryStats:
+    """Queries issued while handling one request"""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.slowest_seconds = 0.0
+        self.slowest_statement = None
+        self.slowest_params = None
+
+    def record(self, statement: str, parameters, seconds: float):
+        self.count += 1
+        self.seconds += seconds
+        if seconds > self.slowest_seconds:
+            self.slowest_seconds = seconds
+            self.slowest_statement = statement
+            self.slowest_params = param_shape(parameters)
+
+    def headers(self) -> Dict[str, str]:
+        return {
+            "X-DB-Query-Count": str(self.count),
+            "X-DB-Time-Ms": f"{self.seconds * 1000:.2f}",
+            "X-DB-Slowest-Ms": f"{self.slowest_seconds * 1000:.2f}",
+        }
+
+
+class QueryMetrics:
+    """Process-wide query counters, exposed on the admin metrics endpoint"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = 0
+            self.queries = 0
+            self.seconds = 0.0
+            self.slow_queries = 0
+            self.max_queries_per_request = 0
+
+    def record_request(self, stats: QueryStats):
+        with self._lock:
+            self.requests += 1
+            self.max_queries_per_request = max(self.max_queries_per_request, stats.count)
+
+    def record_query(self, seconds: float, slow: bool):
+        with self._lock:
+            self.queries += 1
+            self.seconds += seconds
+            self.slow_queries += int(slow)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "queries": self.queries,
+                "db_time_ms": round(self.seconds * 1000, 2),
+                "slow_queries": self.slow_queries,
+                "avg_queries_per_request": round(self.queries / self.requests, 2) if self.requests else 0,
+                "max_queries_per_request": self.max_queries_per_request,
+            }
+
+
+query_metrics = QueryMetrics()
+
+# Stats of the request being handled, set by the instrumentation middleware
+current_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("current_query_stats", default=None)
+
+EXPLAIN_PREFIXES = {
+    "sqlite": "EXPLAIN QUERY PLAN ",
+    "postgresql": "EXPLAIN ",
+    "mysql": "EXPLAIN ",
+}
+
+
+def explain_statement(connection, statement: str, parameters) -> Optional[List[str]]:
+    """Fetch the plan of a read statement on the connection that just ran it"""
+    prefix = EXPLAIN_PREFIXES.get(connection.dialect.name)
+    if prefix is None or not statement.lstrip().upper().startswith(("SELECT", "WITH")):
+        return None
+    try:
+        cursor = connection.connection.cursor()
+        try:
+            cursor.execute(prefix + statement, parameters)
+            return [" ".join(str(column) for column in row) for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+    except Exception as e:
+        return [f"EXPLAIN failed: {str(e)}"]
+
+
+# The hooks are registered on the Engine class so the primary, replica and
+# shard engines (and the sync side of every async engine) are all covered
+@event.listens_for(Engine, "before_cursor_execute")
+def start_query_timer(connection, cursor, statement, parameters, context, executemany):
+    connection.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def record_query(connection, cursor, statement, parameters, context, executemany):
+    seconds = time.perf_counter() - connection.info["query_started"].pop()
+    slow = seconds * 1000 >= settings.SLOW_QUERY_MS
+
+    query_metrics.record_query(seconds, slow)
+    stats = current_query_stats.get()
+    if stats is not None:
+        stats.record(statement, parameters, seconds)
+
+    if slow:
+        logger.bind(
+            slow_query=True,
+            duration_ms=round(seconds * 1000, 2),
+            statement=statement,
+            params=param_shape(parameters),
+            plan=None if executemany else explain_statement(connection, statement, parameters),
+        ).warning(f"Slow query ({seconds * 1000:.1f} ms): {statement}")
+
+
+ASYNC_SQLALCHEMY_DATABASE_URL = settings.ASYNC_DATABASE_URL or get_async_database_url(SQLALCHEMY_DATABASE_URL)
+
+# Sync engine, kept for Alembic, scripts and report generation
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL, 
-    connect_args=connect_args
+    **get_engine_options(SQLALCHEMY_DATABASE_URL)
 )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine used by the API routers so DB round-trips don't block the event loop
+async_engine = create_async_engine(
+    ASYNC_SQLALCHEMY_DATABASE_URL,
+    **get_engine_options(ASYNC_SQLALCHEMY_DATABASE_URL, is_async=True)
+)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+if engine.dialect.name == "sqlite":
+    event.listen(engine, "connect", set_sqlite_pragmas)
+if async_engine.dialect.name == "sqlite":
+    event.listen(async_engine.sync_engine, "connect", set_sqlite_pragmas)
+
 class Base(DeclarativeBase):
     pass
 
@@ -20,4 +231,130 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+class Replica:
+    """Engines and session factories for one read replica"""
+
+    def __init__(self, database_url: str):
+        self.url = make_url(database_url).render_as_string(hide_password=True)
+        self.engine = create_engine(database_url, **get_engine_options(database_url))
+        async_url = get_async_database_url(database_url)
+        self.async_engine = create_async_engine(async_url, **get_engine_options(async_url, is_async=True))
+        if self.engine.dialect.name == "sqlite":
+            event.listen(self.engine, "connect", set_sqlite_pragmas)
+            event.listen(self.async_engine.sync_engine, "connect", set_sqlite_pragmas)
+
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        self.AsyncSessionLocal = async_sessionmaker(self.async_engine, autoflush=False, expire_on_commit=False)
+        self.healthy = True
+        self.checked_at = None
+
+
+class ReplicaRouter:
+    """
+    Picks the database for read-only sessions.
+
+    Reads go to the configured replicas in turn, skipping any that failed
+    their last health check, and fall back to the primary when none is
+    healthy. A caller that wrote within READ_YOUR_WRITES_SECONDS keeps
+    reading from the primary, so replication lag never hides its own writes.
+    """
+
+    def __init__(self, database_urls: List[str]):
+        self.replicas = [Replica(database_url) for database_url in database_urls]
+        self._turn = itertools.count()
+        self._writes = {}
+        self._lock = threading.Lock()
+
+    def mark_write(self, caller: str):
+        """Remember that a caller just wrote to the primary"""
+        if not self.replicas:
+            return
+        now = time.monotonic()
+        with self._lock:
+            self._writes[caller] = now
+            if len(self._writes) > 10000:
+                self._writes = {
+                    key: written for key, written in self._writes.items()
+                    if now - written < settings.READ_YOUR_WRITES_SECONDS
+                }
+
+    def is_sticky(self, caller: str) -> bool:
+        """Whether a caller wrote recently enough that it must read from the primary"""
+        with self._lock:
+            written = self._writes.get(caller)
+        return written is not None and time.monotonic() - written < settings.READ_YOUR_WRITES_SECONDS
+
+    def _candidates(self, caller: Optional[str]) -> List[Replica]:
+        if not self.replicas or (caller and self.is_sticky(caller)):
+            return []
+        start = next(self._turn) % len(self.replicas)
+        return self.replicas[start:] + self.replicas[:start]
+
+    @staticmethod
+    def _check_due(replica: Replica) -> bool:
+        return replica.checked_at is None or time.monotonic() - replica.checked_at >= settings.REPLICA_HEALTH_CHECK_SECONDS
+
+    @staticmethod
+    def _record_check(replica: Replica, healthy: bool, error: Exception = None):
+        if healthy and not replica.healthy:
+            logger.info(f"Read replica {replica.url} is healthy again")
+        elif not healthy and replica.healthy:
+            logger.warning(f"Read replica {replica.url} failed its health check: {str(error)}")
+        replica.healthy = healthy
+        replica.checked_at = time.monotonic()
+
+    def choose(self, caller: Optional[str] = None) -> Optional[Replica]:
+        """Return a healthy replica for a caller, or None to read from the primary"""
+        for replica in self._candidates(caller):
+            if self._check_due(replica):
+                try:
+                    with replica.engine.connect() as connection:
+                        connection.execute(text("SELECT 1"))
+                    self._record_check(replica, True)
+                except Exception as e:
+                    self._record_check(replica, False, e)
+            if replica.healthy:
+                return replica
+        return None
+
+    async def choose_async(self, caller: Optional[str] = None) -> Optional[Replica]:
+        """Async counterpart of choose()"""
+        for replica in self._candidates(caller):
+            if self._check_due(replica):
+                try:
+                    async with replica.async_engine.connect() as connection:
+                        await connection.execute(text("SELECT 1"))
+                    self._record_check(replica, True)
+                except Exception as e:
+                    self._record_check(replica, False, e)
+            if replica.healthy:
+                return replica
+        return None
+
+
+replica_router = ReplicaRouter([url.strip() for url in settings.READ_REPLICA_URLS.split(",") if url.strip()])
+
+
+def read_caller(request: Request) -> str:
+    """Identify the caller of a request for read-your-writes stickiness"""
+    return request.headers.get("authorization") or (request.client.host if request.client else "")
+
+def get_read_db(request: Request):
+    replica = replica_router.choose(read_caller(request))
+    db = (replica.SessionLocal if replica else SessionLocal)()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_read_db(request: Request):
+    replica = await replica_router.choose_async(read_caller(request))
+    async with (replica.AsyncSessionLocal if replica else AsyncSessionLocal)() as db:
+        yield db
\ No newline at end of file
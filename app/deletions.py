@@ -0,0 +1,71 @@
+"""
+Deferred deletion of replaced upload files.
+
+When an upsert replaces a submission's image, the old file is not deleted
+right away: a report being generated or a download in flight may still be
+reading it, and the update itself could be rolled back. Its path is queued
+in `file_deletions` instead, in the same transaction as the update, and
+deleted from storage once FILE_DELETION_DELAY_SECONDS have passed. Storage
+then holds one set of images per employee rather than every version ever
+uploaded. Run the purge from cron with:
+
+    python -m app.deletions
+"""
+from datetime import datetime, timedelta
+from typing import Iterable
+import sys
+
+from loguru import logger
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .models import FileDeletion
+from .storage import file_storage
+
+
+def queue_file_deletions(db, paths: Iterable[str], now: datetime = None):
+    """Queue saved files for deletion; committed along with the caller's transaction"""
+    now = now or datetime.now()
+    db.add_all([FileDeletion(path=path, queued_at=now) for path in paths if path])
+
+
+def purge_file_deletions(db: Session, now: datetime = None, batch_size: int = 1000) -> int:
+    """Delete the queued files whose grace period is over and return how many were deleted"""
+    cutoff = (now or datetime.now()) - timedelta(seconds=settings.FILE_DELETION_DELAY_SECONDS)
+
+    purged = 0
+    while True:
+        entries = db.execute(
+            select(FileDeletion.id, FileDeletion.path)
+            .where(FileDeletion.queued_at <= cutoff)
+            .order_by(FileDeletion.id)
+            .limit(batch_size)
+        ).all()
+        if not entries:
+            break
+
+        for _, path in entries:
+            try:
+                file_storage.remove(path)
+            except OSError as e:
+                # Dropped from the queue anyway, so one bad path can't block the rest
+                logger.warning(f"Could not delete replaced file {path}: {str(e)}")
+        db.execute(delete(FileDeletion).where(FileDeletion.id.in_([entry_id for entry_id, _ in entries])))
+        db.commit()
+        purged += len(entries)
+    return purged
+
+
+if __name__ == "__main__":
+    from .database import SessionLocal
+
+    if sys.argv[1:]:
+        print("Usage: python -m app.deletions")
+        sys.exit(1)
+
+    db = SessionLocal()
+    try:
+        print(f"Deleted {purge_file_deletions(db)} replaced files")
+    finally:
+        db.close()
\ No newline at end of file
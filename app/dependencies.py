@@ -1,11 +1,11 @@
 from fastapi import Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from .database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from .database import get_async_db
 from .models import User, RoleType
 from .security import get_current_user
 
 
-def get_current_admin(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def get_current_admin(current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
     """
     Verify the user is an admin (either super_admin or regular_admin)
     """
@@ -17,7 +17,7 @@ def get_current_admin(current_user: User = Depends(get_current_user), db: Sessio
     return current_user
 
 
-def get_super_admin(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def get_super_admin(current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
     """
     Verify the user is a super_admin
     """
@@ -0,0 +1,253 @@
+"""
+Duplicate detection for submissions.
+
+Every submission carries normalized copies of its CIN, TE ID and grey card
+number (cin_key, te_id_key and grey_card_key, upper-cased without whitespace
+or dashes), each with its own index. A new submission is a duplicate when
+any of the three matches an existing one, which is one index seek per key
+instead of a comparison against the whole table. Clusters of existing
+duplicates come from a GROUP BY over a key index, which reads the index
+alone.
+
+That check runs before the insert, so two concurrent requests could both
+pass it. `submission_identity_keys` closes the gap: triggers on submissions
+claim each new key there in the same statement, and its primary key on
+(field, key) makes the second claim fail with an IntegrityError, which the
+endpoints answer with 409. Submissions stored before it existed keep their
+duplicates; the earliest of them holds the key.
+"""
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event, func, or_, select, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from .database import Base
+from .models import Submission, SubmissionIdentityKey, normalize_identifier
+
+
+# Identifier fields and the normalized key column each one is matched on
+DUPLICATE_KEYS = {
+    "cin": Submission.cin_key,
+    "te_id": Submission.te_id_key,
+    "grey_card_number": Submission.grey_card_key,
+}
+
+
+IDENTITY_TABLE = SubmissionIdentityKey.__tablename__
+
+_SQLITE_DDL = [
+    "CREATE TRIGGER IF NOT EXISTS submission_identity_insert AFTER INSERT ON submissions BEGIN "
+    + " ".join(
+        f"INSERT INTO {IDENTITY_TABLE} (field, key, submission_id) "
+        f"SELECT '{field}', new.{column.key}, new.id WHERE new.{column.key} IS NOT NULL;"
+        for field, column in DUPLICATE_KEYS.items()
+    )
+    + " END",
+    # Only keys that changed are released and claimed again, so updating a
+    # submission that predates the table doesn't trip over its own duplicates
+    f"CREATE TRIGGER IF NOT EXISTS submission_identity_update AFTER UPDATE OF "
+    f"{', '.join(column.key for column in DUPLICATE_KEYS.values())} ON submissions BEGIN "
+    + " ".join(
+        f"DELETE FROM {IDENTITY_TABLE} WHERE field = '{field}' AND submission_id = old.id "
+        f"AND new.{column.key} IS NOT old.{column.key}; "
+        f"INSERT INTO {IDENTITY_TABLE} (field, key, submission_id) "
+        f"SELECT '{field}', new.{column.key}, new.id WHERE new.{column.key} IS NOT NULL "
+        f"AND new.{column.key} IS NOT old.{column.key};"
+        for field, column in DUPLICATE_KEYS.items()
+    )
+    + " END",
+    f"CREATE TRIGGER IF NOT EXISTS submission_identity_delete AFTER DELETE ON submissions BEGIN "
+    f"DELETE FROM {IDENTITY_TABLE} WHERE submission_id = old.id; END",
+]
+
+_POSTGRES_FUNCTION = (
+    "CREATE OR REPLACE FUNCTION sync_submission_identity_keys() RETURNS trigger AS $$ BEGIN "
+    f"IF TG_OP = 'DELETE' THEN DELETE FROM {IDENTITY_TABLE} WHERE submission_id = OLD.id; RETURN OLD; END IF; "
+    + " ".join(
+        f"IF TG_OP = 'INSERT' OR NEW.{column.key} IS DISTINCT FROM OLD.{column.key} THEN "
+        f"DELETE FROM {IDENTITY_TABLE} WHERE field = '{field}' AND submission_id = NEW.id; "
+        f"IF NEW.{column.key} IS NOT NULL THEN INSERT INTO {IDENTITY_TABLE} (field, key, submission_id) "
+        f"VALUES ('{field}', NEW.{column.key}, NEW.id); END IF; END IF;"
+        for field, column in DUPLICATE_KEYS.items()
+    )
+    + " RETURN NEW; END $$ LANGUAGE plpgsql"
+)
+
+_POSTGRES_TRIGGER = (
+    "CREATE TRIGGER submission_identity_sync AFTER INSERT OR UPDATE OR DELETE ON submissions "
+    "FOR EACH ROW EXECUTE FUNCTION sync_submission_identity_keys()"
+)
+
+
+def rebuild_identity_keys(connection) -> None:
+    """Refill the claimed keys from the submissions table, the earliest submission holding each"""
+    ignore, conflict = ("OR IGNORE ", "") if connection.dialect.name == "sqlite" else ("", " ON CONFLICT DO NOTHING")
+    connection.execute(text(f"DELETE FROM {IDENTITY_TABLE}"))
+    for field, column in DUPLICATE_KEYS.items():
+        connection.execute(text(
+            f"INSERT {ignore}INTO {IDENTITY_TABLE} (field, key, submission_id) "
+            f"SELECT '{field}', {column.key}, id FROM submissions WHERE {column.key} IS NOT NULL ORDER BY id{conflict}"
+        ))
+
+
+def ensure_identity_keys(connection) -> bool:
+    """
+    Create the triggers claiming identity keys if they are missing, filling
+    the table from the existing submissions. Returns True if they were created.
+    """
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        exists = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'submission_identity_insert'")
+        ).scalar()
+        for statement in _SQLITE_DDL:
+            connection.execute(text(statement))
+    elif dialect == "postgresql":
+        exists = connection.execute(
+            text("SELECT 1 FROM pg_trigger WHERE tgname = 'submission_identity_sync'")
+        ).scalar()
+        connection.execute(text(_POSTGRES_FUNCTION))
+        if not exists:
+            connection.execute(text(_POSTGRES_TRIGGER))
+    else:
+        return False
+
+    if not exists:
+        rebuild_identity_keys(connection)
+    return not exists
+
+
+def _create_identity_sync(target, connection, tables=None, **kw):
+    # Both tables must exist, so this runs once the whole schema is created
+    if tables is None or any(table.name in (IDENTITY_TABLE, "submissions") for table in tables):
+        ensure_identity_keys(connection)
+
+
+event.listen(Base.metadata, "after_create", _create_identity_sync)
+
+
+def is_duplicate_error(error: IntegrityError) -> bool:
+    """Whether an IntegrityError comes from claiming an identity key another submission holds"""
+    return IDENTITY_TABLE in str(error.orig)
+
+
+def identity_keys(cin: Optional[str], te_id: Optional[str], grey_card_number: Optional[str]) -> Dict[str, str]:
+    """Normalize the identifiers of a submission, leaving out empty ones"""
+    values = {"cin": cin, "te_id": te_id, "grey_card_number": grey_card_number}
+    keys = {field: normalize_identifier(value) for field, value in values.items()}
+    return {field: key for field, key in keys.items() if key}
+
+
+def duplicate_query(keys: Dict[str, str], limit: int = 10):
+    """Select the submissions sharing any of the given normalized identifiers"""
+    return (
+        select(Submission.id, *DUPLICATE_KEYS.values())
+        .where(or_(*[DUPLICATE_KEYS[field] == key for field, key in keys.items()]))
+        .order_by(Submission.id)
+        .limit(limit)
+    )
+
+
+def describe_matches(rows, keys: Dict[str, str]) -> List[Dict[str, Any]]:
+    """Turn duplicate rows into [{"submission_id": id, "fields": [matching fields]}]"""
+    matches = []
+    for row in rows:
+        fields = [field for field, key in keys.items() if getattr(row, DUPLICATE_KEYS[field].key) == key]
+        matches.append({"submission_id": row.id, "fields": fields})
+    return matches
+
+
+async def find_duplicates(sessions, keys: Dict[str, str]) -> List[Dict[str, Any]]:
+    """Look for existing submissions sharing an identifier, in every given session"""
+    if not keys:
+        return []
+    rows = []
+    for session in sessions:
+        rows += (await session.execute(duplicate_query(keys))).all()
+    return describe_matches(sorted(rows, key=lambda row: row.id), keys)
+
+
+def find_duplicates_sync(db: Session, keys: Dict[str, str]) -> List[Dict[str, Any]]:
+    """Sync counterpart of find_duplicates() for a single session"""
+    if not keys:
+        return []
+    return describe_matches(db.execute(duplicate_query(keys)).all(), keys)
+
+
+def find_claimed_keys(db: Session, keys_by_row: Dict[Any, Dict[str, str]], chunk_size: int = 500):
+    """
+    Look up many rows' identifiers at once, as for a whole import sheet.
+    Returns {row: [{"submission_id": id, "fields": [matching fields]}]} for
+    the rows sharing an identifier with a stored submission. Each field's
+    keys are matched against the claimed identity keys in chunks of
+    `chunk_size`, so the cost is a few queries rather than one per row.
+    """
+    keys_by_field = {}
+    for keys in keys_by_row.values():
+        for field, key in keys.items():
+            keys_by_field.setdefault(field, set()).add(key)
+
+    holders = {}
+    for field, field_keys in keys_by_field.items():
+        field_keys = sorted(field_keys)
+        for start in range(0, len(field_keys), chunk_size):
+            holders.update(
+                ((field, key), submission_id)
+                for key, submission_id in db.execute(
+                    select(SubmissionIdentityKey.key, SubmissionIdentityKey.submission_id).where(
+                        SubmissionIdentityKey.field == field,
+                        SubmissionIdentityKey.key.in_(field_keys[start:start + chunk_size]),
+                    )
+                ).all()
+            )
+
+    matches = {}
+    for row, keys in keys_by_row.items():
+        fields_by_submission = {}
+        for field, key in keys.items():
+            if (field, key) in holders:
+                fields_by_submission.setdefault(holders[(field, key)], []).append(field)
+        if fields_by_submission:
+            matches[row] = [
+                {"submission_id": submission_id, "fields": fields}
+                for submission_id, fields in sorted(fields_by_submission.items())
+            ]
+    return matches
+
+
+def cluster_query(field: str, limit: int):
+    """Group submissions by one normalized identifier and keep the values used more than once"""
+    key = DUPLICATE_KEYS[field]
+    return (
+        select(key, func.count().label("count"))
+        .where(key.isnot(None))
+        .group_by(key)
+        .having(func.count() > 1)
+        .order_by(key)
+        .limit(limit)
+    )
+
+
+def duplicate_clusters(db: Session, field: str, limit: int = 100) -> List[Dict[str, Any]]:
+    """
+    Return the clusters of submissions sharing a normalized identifier, as
+    [{"value": key, "count": n, "submission_ids": [...]}]
+    """
+    key = DUPLICATE_KEYS[field]
+    counts = db.execute(cluster_query(field, limit)).all()
+    if not counts:
+        return []
+
+    members = {}
+    rows = db.execute(
+        select(key, Submission.id).where(key.in_([value for value, _ in counts])).order_by(key, Submission.id)
+    ).all()
+    for value, submission_id in rows:
+        members.setdefault(value, []).append(submission_id)
+
+    return [
+        {"value": value, "count": count, "submission_ids": members.get(value, [])}
+        for value, count in counts
+    ]
\ No newline at end of file
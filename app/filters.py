@@ -0,0 +1,86 @@
+"""
+Filters and sort orders of the submissions listing.
+
+Only allowlisted fields can be filtered or sorted on, and each filter maps
+onto a predicate an index can answer: equality on te_id, grey_card_number
+and admin_id, and half-open ranges on the raw date columns (wrapping a
+column in a function such as DATE() would hide it from its index).
+"""
+from fastapi import HTTPException, status
+from datetime import date, datetime, time, timedelta
+from typing import Callable, List, Optional, Tuple
+
+
+# Sortable fields; each one is the leading column of an index
+SORT_FIELDS = ["id", "created_at", "date_of_birth"]
+
+
+def _check_range(name: str, start: Optional[date], end: Optional[date]):
+    if start and end and start > end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"{name}_from must not be after {name}_to"
+        )
+
+
+def _day_range(query, column, start: Optional[date], end: Optional[date]):
+    if start:
+        query = query.where(column >= datetime.combine(start, time.min))
+    if end:
+        query = query.where(column < datetime.combine(end + timedelta(days=1), time.min))
+    return query
+
+
+def apply_filters(
+    query,
+    model,
+    created_from: Optional[date] = None,
+    created_to: Optional[date] = None,
+    dob_from: Optional[date] = None,
+    dob_to: Optional[date] = None,
+    admin_id: Optional[int] = None,
+    te_id: Optional[str] = None,
+    grey_card_number: Optional[str] = None,
+):
+    """Add the given filters to a submissions (or archived submissions) query"""
+    _check_range("created", created_from, created_to)
+    _check_range("dob", dob_from, dob_to)
+
+    query = _day_range(query, model.created_at, created_from, created_to)
+    query = _day_range(query, model.date_of_birth, dob_from, dob_to)
+    if admin_id is not None:
+        query = query.where(model.admin_id == admin_id)
+    if te_id:
+        query = query.where(model.te_id == te_id)
+    if grey_card_number:
+        query = query.where(model.grey_card_number == grey_card_number)
+    return query
+
+
+def parse_sort(sort: str) -> Tuple[str, bool]:
+    """Split a sort parameter such as "-created_at" into (field, descending)"""
+    field, descending = (sort[1:], True) if sort.startswith("-") else (sort, False)
+    if field not in SORT_FIELDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported sort: {sort}. Use one of {', '.join(SORT_FIELDS)}, optionally prefixed with -"
+        )
+    return field, descending
+
+
+def apply_sort(query, model, field: str, descending: bool):
+    """
+    Order a query by a sort field with id as the tie-breaker. Both run in
+    the same direction so an index on (field, id) can be read backwards.
+    """
+    if field == "id" and not descending:
+        # paginate() orders by id already
+        return query
+    if descending:
+        return query.order_by(getattr(model, field).desc(), model.id.desc())
+    return query.order_by(getattr(model, field), model.id)
+
+
+def sort_key(field: str) -> Callable:
+    """Key ordering merged rows like the database does, with NULLs first"""
+    return lambda row: (getattr(row, field) is not None, getattr(row, field))
\ No newline at end of file
@@ -0,0 +1,127 @@
+"""
+Idempotency keys for submission creation.
+
+A client that sends an Idempotency-Key header can safely retry a POST after
+a timeout. The first request with a key claims it by inserting a row into
+`idempotency_keys` (the primary key makes the claim atomic across workers)
+and stores its response there when it finishes. A retry with the same key
+gets the stored response back without anything being written or uploaded
+again; a retry that arrives while the original is still running waits for
+it. A claim still in progress after IDEMPOTENCY_WAIT_SECONDS is treated as
+abandoned (its worker died before releasing it), and the next retry takes
+it over. Keys expire after IDEMPOTENCY_TTL_SECONDS.
+"""
+from datetime import datetime, timedelta
+from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from typing import Any, Dict, Optional
+import asyncio
+import hashlib
+import json
+import time
+
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .config import settings
+from .models import IdempotencyKey
+
+
+POLL_INTERVAL_SECONDS = 0.1
+
+
+def request_fingerprint(fields: Dict[str, Any]) -> str:
+    """Hash the fields of a request, to tell a retry from a different request reusing its key"""
+    payload = json.dumps(jsonable_encoder(fields), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _replay(record: IdempotencyKey) -> JSONResponse:
+    return JSONResponse(
+        status_code=record.status_code,
+        content=json.loads(record.response),
+        headers={"Idempotent-Replayed": "true"}
+    )
+
+
+async def _fetch(db: AsyncSession, admin_id: int, key: str) -> Optional[IdempotencyKey]:
+    result = await db.execute(
+        select(IdempotencyKey)
+        .where(IdempotencyKey.admin_id == admin_id, IdempotencyKey.key == key)
+        .execution_options(populate_existing=True)
+    )
+    return result.scalar_one_or_none()
+
+
+async def claim_key(db: AsyncSession, admin_id: int, key: str, fingerprint: str) -> Optional[JSONResponse]:
+    """
+    Claim an idempotency key for a new request. Returns None when the caller
+    should go ahead and handle the request, or the stored response to send
+    back when the key was already used.
+    """
+    now = datetime.now()
+    expired = now - timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS)
+    await db.execute(delete(IdempotencyKey).where(IdempotencyKey.created_at < expired))
+
+    db.add(IdempotencyKey(admin_id=admin_id, key=key, fingerprint=fingerprint, created_at=now))
+    try:
+        await db.commit()
+        return None
+    except IntegrityError:
+        await db.rollback()
+
+    # Someone holds the key: wait for their response if they are still running
+    deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+    while True:
+        record = await _fetch(db, admin_id, key)
+        if record is None:
+            # The original request failed and released the key, so this one takes over
+            return await claim_key(db, admin_id, key, fingerprint)
+        if record.fingerprint != fingerprint:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Idempotency-Key was already used for a different request"
+            )
+        if record.status_code is not None:
+            return _replay(record)
+        if record.created_at < datetime.now() - timedelta(seconds=settings.IDEMPOTENCY_WAIT_SECONDS):
+            # Only one waiter deletes the abandoned claim; the primary key settles who claims it next
+            await db.execute(delete(IdempotencyKey).where(
+                IdempotencyKey.admin_id == admin_id,
+                IdempotencyKey.key == key,
+                IdempotencyKey.status_code.is_(None),
+                IdempotencyKey.created_at == record.created_at,
+            ))
+            await db.commit()
+            return await claim_key(db, admin_id, key, fingerprint)
+        if time.monotonic() >= deadline:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="A request with this Idempotency-Key is still in progress"
+            )
+        await db.rollback()
+        await asyncio.sleep(POLL_INTERVAL_SECONDS)
+
+
+async def store_response(db: AsyncSession, admin_id: int, key: str, status_code: int, content: Any):
+    """Remember the response of a request that claimed a key"""
+    record = await _fetch(db, admin_id, key)
+    # The claim may have been taken over as abandoned and already answered
+    if record is None or record.status_code is not None:
+        return
+    record.status_code = status_code
+    record.response = json.dumps(jsonable_encoder(content))
+    await db.commit()
+
+
+async def release_key(db: AsyncSession, admin_id: int, key: str):
+    """Give up a claimed key after the request failed, so a retry can run it again"""
+    await db.rollback()
+    await db.execute(delete(IdempotencyKey).where(
+        IdempotencyKey.admin_id == admin_id,
+        IdempotencyKey.key == key,
+        IdempotencyKey.status_code.is_(None),
+    ))
+    await db.commit()
\ No newline at end of file
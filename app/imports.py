@@ -0,0 +1,324 @@
+"""
+Bulk submission import.
+
+Takes a CSV or XLSX sheet with one employee per row plus a ZIP of their
+images, named in the sheet's cin_file, picture_file and grey_card_file
+columns. Every row is validated up front with the same rules as a single
+submission (SubmissionCreate and FileValidator, with image sizes read from
+the ZIP directory without extracting anything). Plants are resolved with
+one query for the whole sheet, and duplicates of stored submissions with a
+few chunked lookups per database rather than one per row. Valid rows are then imported
+IMPORT_BATCH_SIZE at a time: their images are streamed out of the ZIP into
+FileStorage and the rows inserted and committed together with their daily
+counts. Invalid rows, including duplicates of stored submissions or of
+earlier rows, are skipped and reported with their errors.
+
+    python -m app.imports employees.xlsx images.zip --admin-id 1 [--dry-run]
+"""
+from collections import defaultdict
+from datetime import date, datetime
+from pathlib import PurePosixPath
+from typing import Any, Dict, List, Optional, Tuple
+import argparse
+import csv
+import io
+import os
+import zipfile
+
+from loguru import logger
+from openpyxl import load_workbook
+from pydantic import ValidationError
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .counts import count_cache
+from .models import Plant, Submission, normalize_plant_name
+from .schemas import SubmissionCreate
+from .duplicates import find_claimed_keys, identity_keys, is_duplicate_error
+from .shards import submission_session, submission_sessions
+from .stats import record_submissions
+from .storage import MAX_FILE_SIZE, FileValidator, file_storage
+
+
+# Sheet columns holding the image names, and the storage type of each image
+FILE_COLUMNS = {
+    "cin_file": "cin",
+    "picture_file": "pic",
+    "grey_card_file": "grey_card",
+}
+
+REQUIRED_COLUMNS = list(SubmissionCreate.model_fields) + list(FILE_COLUMNS)
+
+
+class ImportFileError(ValueError):
+    """The sheet or the image archive can't be read at all"""
+
+
+def _cell(value) -> Any:
+    if isinstance(value, str):
+        return value.strip() or None
+    if isinstance(value, float) and value.is_integer():
+        # Spreadsheets store numeric ids such as TE IDs as floats
+        return str(int(value))
+    if isinstance(value, (int, float)):
+        return str(value)
+    return value
+
+
+def _date_of_birth(value) -> Any:
+    # Sheets usually hold plain dates, which SubmissionCreate's datetime rejects
+    if isinstance(value, str):
+        try:
+            return datetime.combine(date.fromisoformat(value), datetime.min.time())
+        except ValueError:
+            return value
+    return value
+
+
+def read_rows(fileobj, filename: str) -> List[Tuple[int, Dict[str, Any]]]:
+    """Read a CSV or XLSX sheet into (sheet row number, {column: value}) pairs"""
+    extension = os.path.splitext(filename or "")[1].lower()
+    if extension == ".csv":
+        try:
+            text = fileobj.read().decode("utf-8-sig")
+        except UnicodeDecodeError:
+            raise ImportFileError("CSV files must be UTF-8 encoded")
+        reader = csv.reader(io.StringIO(text))
+        lines = list(reader)
+    elif extension == ".xlsx":
+        try:
+            workbook = load_workbook(fileobj, read_only=True, data_only=True)
+        except Exception as e:
+            raise ImportFileError(f"Could not read the workbook: {str(e)}")
+        lines = list(workbook.active.iter_rows(values_only=True))
+        workbook.close()
+    else:
+        raise ImportFileError("Rows must be a .csv or .xlsx file")
+
+    if not lines:
+        raise ImportFileError("The sheet is empty")
+
+    header = [str(name).strip().lower() if name is not None else "" for name in lines[0]]
+    missing = [name for name in REQUIRED_COLUMNS if name not in header]
+    if missing:
+        raise ImportFileError(f"Missing columns: {', '.join(missing)}")
+
+    rows = []
+    for number, line in enumerate(lines[1:], start=2):
+        values = {name: _cell(value) for name, value in zip(header, line) if name}
+        values["date_of_birth"] = _date_of_birth(values.get("date_of_birth"))
+        # Skip blank lines, which spreadsheets often leave at the end
+        if any(value is not None for value in values.values()):
+            rows.append((number, values))
+    return rows
+
+
+def _image_index(images: zipfile.ZipFile) -> Dict[str, zipfile.ZipInfo]:
+    """Map the file names in the archive (ignoring folders) to their entries"""
+    index = {}
+    for info in images.infolist():
+        if not info.is_dir():
+            index[PurePosixPath(info.filename).name] = info
+    return index
+
+
+def _plants(db: Session, names) -> Dict[str, Plant]:
+    """Resolve every distinct plant name of the sheet in one query"""
+    keys = {normalize_plant_name(name).lower() for name in names if normalize_plant_name(name)}
+    if not keys:
+        return {}
+    plants = db.execute(select(Plant).where(func.lower(Plant.name).in_(keys))).scalars().all()
+    return {plant.name.lower(): plant for plant in plants}
+
+
+def validate_rows(db: Session, rows, images: zipfile.ZipFile):
+    """
+    Validate every row of a sheet before anything is written. Returns the
+    valid rows as (row number, SubmissionCreate, plant, {file type: zip entry})
+    and the errors as [{"row": number, "errors": [...]}].
+    """
+    index = _image_index(images)
+    plants = _plants(db, [values.get("plant") for _, values in rows])
+    seen_keys = {}
+
+    checked, keys_by_row = [], {}
+    for number, values in rows:
+        row_errors = []
+        submission = None
+        try:
+            submission = SubmissionCreate(**{name: values.get(name) for name in SubmissionCreate.model_fields})
+        except ValidationError as e:
+            row_errors += [f"{error['loc'][0]}: {error['msg']}" for error in e.errors()]
+        else:
+            keys_by_row[number] = identity_keys(submission.cin, submission.te_id, submission.grey_card_number)
+        checked.append((number, values, submission, row_errors))
+
+    # Duplicates of stored submissions, looked up for the whole sheet at once in every database
+    stored_duplicates = defaultdict(list)
+    with submission_sessions(db) as sessions:
+        for session in sessions.values():
+            for number, matches in find_claimed_keys(session, keys_by_row).items():
+                stored_duplicates[number] += matches
+
+    valid, errors = [], []
+    for number, values, submission, row_errors in checked:
+        # Duplicates of stored submissions, or of an earlier row of the sheet
+        if submission is not None:
+            keys = keys_by_row[number]
+            for duplicate in stored_duplicates[number]:
+                row_errors.append(
+                    f"Duplicate of submission {duplicate['submission_id']} ({', '.join(duplicate['fields'])})"
+                )
+            for field, key in keys.items():
+                if (field, key) in seen_keys:
+                    row_errors.append(f"Duplicate of row {seen_keys[(field, key)]} ({field})")
+                else:
+                    seen_keys[(field, key)] = number
+
+        plant = None
+        name = normalize_plant_name(values.get("plant"))
+        if name:
+            plant = plants.get(name.lower())
+            if plant is None:
+                row_errors.append(f"Unknown plant: {values.get('plant')}")
+
+        entries = {}
+        for column, file_type in FILE_COLUMNS.items():
+            filename = values.get(column)
+            if not filename:
+                row_errors.append(f"{column}: Field required")
+                continue
+            error = FileValidator.filename_error(filename, file_type)
+            info = index.get(filename)
+            if error:
+                row_errors.append(f"{column}: {error}")
+            elif info is None:
+                row_errors.append(f"{column}: {filename} is not in the image archive")
+            elif info.file_size > MAX_FILE_SIZE:
+                row_errors.append(f"{column}: File too large")
+            else:
+                entries[file_type] = info
+
+        if row_errors:
+            errors.append({"row": number, "errors": row_errors})
+        else:
+            valid.append((number, submission, plant, entries))
+    return valid, errors
+
+
+def _import_batch(db: Session, batch, images: zipfile.ZipFile, admin_id: int) -> List[int]:
+    saved = []
+    try:
+        submissions = []
+        for _, submission, plant, entries in batch:
+            paths = {}
+            for file_type, info in entries.items():
+                with images.open(info) as source:
+                    path = file_storage.save_stream(source, PurePosixPath(info.filename).name, plant.name, file_type)
+                saved.append(path)
+                paths[file_type] = path
+            submissions.append(Submission(
+                **{**submission.model_dump(), "plant": plant.name},
+                plant_id=plant.id,
+                cin_file_path=paths["cin"],
+                picture_file_path=paths["pic"],
+                grey_card_file_path=paths["grey_card"],
+                admin_id=admin_id
+            ))
+
+        db.add_all(submissions)
+        db.flush()
+        # Keep the daily statistics rollup in the same transaction
+        record_submissions(db, submissions)
+        db.commit()
+        return [submission.id for submission in submissions]
+    except Exception:
+        db.rollback()
+        for path in saved:
+            file_storage.remove(path)
+        raise
+
+
+def import_submissions(
+    db: Session,
+    rows_file,
+    rows_filename: str,
+    images_file,
+    admin_id: int,
+    dry_run: bool = False,
+    batch_size: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Validate and import a sheet of submissions with their image archive.
+    Rows with errors are skipped; the report lists them by sheet row number.
+    """
+    batch_size = batch_size or settings.IMPORT_BATCH_SIZE
+    rows = read_rows(rows_file, rows_filename)
+    try:
+        images = zipfile.ZipFile(images_file)
+    except zipfile.BadZipFile:
+        raise ImportFileError("Images must be a ZIP archive")
+
+    with images:
+        valid, errors = validate_rows(db, rows, images)
+
+        submission_ids = []
+        if not dry_run:
+            # In shard mode each plant's rows go to its own database file
+            by_plant = defaultdict(list)
+            for row in valid:
+                by_plant[row[2].id].append(row)
+
+            for plant_id, plant_rows in by_plant.items():
+                with submission_session(db, plant_id, create=True) as target_db:
+                    for start in range(0, len(plant_rows), batch_size):
+                        batch = plant_rows[start:start + batch_size]
+                        try:
+                            submission_ids += _import_batch(target_db, batch, images, admin_id)
+                        except Exception as e:
+                            logger.error(f"Import batch failed: {str(e)}")
+                            reason = str(e)
+                            if isinstance(e, IntegrityError) and is_duplicate_error(e):
+                                reason = "a submission with the same identifiers was stored meanwhile"
+                            errors += [{"row": number, "errors": [f"Import failed: {reason}"]} for number, *_ in batch]
+                count_cache.invalidate("submissions", plant_id)
+
+    errors.sort(key=lambda error: error["row"])
+    return {
+        "rows": len(rows),
+        "valid": len(valid),
+        "imported": len(submission_ids),
+        "failed": len(errors),
+        "dry_run": dry_run,
+        "submission_ids": submission_ids,
+        "errors": errors,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import submissions from a CSV or XLSX sheet and a ZIP of images")
+    parser.add_argument("rows", help="CSV or XLSX file with one employee per row")
+    parser.add_argument("images", help="ZIP archive with the images named in the sheet")
+    parser.add_argument("--admin-id", type=int, required=True, help="Admin the submissions are recorded for")
+    parser.add_argument("--dry-run", action="store_true", help="Only validate the rows")
+    args = parser.parse_args(argv)
+
+    from .database import SessionLocal
+
+    with open(args.rows, "rb") as rows_file, open(args.images, "rb") as images_file, SessionLocal() as db:
+        try:
+            report = import_submissions(db, rows_file, args.rows, images_file, args.admin_id, dry_run=args.dry_run)
+        except ImportFileError as e:
+            parser.error(str(e))
+
+    for error in report["errors"]:
+        print(f"Row {error['row']}: {'; '.join(error['errors'])}")
+    action = "Validated" if report["dry_run"] else "Imported"
+    count = report["valid"] if report["dry_run"] else report["imported"]
+    print(f"{action} {count} of {report['rows']} rows, {report['failed']} with errors")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -11,7 +11,15 @@ import time
 
 from .config import settings
 from .routers import auth, submissions, admin
-from .database import engine, Base
+from .database import engine, Base, replica_router, read_caller, current_query_stats, query_metrics, QueryStats
+from .reports import shutdown_report_pool
+from .scheduler import report_scheduler
+from .writer import group_writer
+from .shards import shard_router
+from .search import ensure_search_index
+from .summaries import ensure_submission_summary
+from .duplicates import ensure_identity_keys
+from .responses import FastJSONResponse
 
 # Configure logger
 logger.add(
@@ -24,11 +32,25 @@ logger.add(
     diagnose=True,
 )
 
+# Slow queries go to their own JSON log, with their plan attached
+logger.add(
+    "logs/slow_queries.log",
+    rotation="100 MB",
+    retention="10 days",
+    level="WARNING",
+    filter=lambda record: record["extra"].get("slow_query", False),
+    serialize=True,
+)
+
 # Create logs directory if it doesn't exist
 os.makedirs("logs", exist_ok=True)
 
 # Create database tables
 Base.metadata.create_all(bind=engine)
+with engine.begin() as connection:
+    ensure_search_index(connection)
+    ensure_submission_summary(connection)
+    ensure_identity_keys(connection)
 
 # Initialize rate limiter
 limiter = Limiter(key_func=get_remote_address)
@@ -38,6 +60,7 @@ app = FastAPI(
     title=settings.APP_NAME,
     description="FastAPI backend for TE Project data collection system",
     version="1.0.0",
+    default_response_class=FastJSONResponse,
 )
 
 # Add CORS middleware
@@ -53,6 +76,35 @@ app.add_middleware(
 app.state.limiter = limiter
 app.add_middleware(SlowAPIMiddleware)
 
+# Pin callers to the primary for a moment after they write, so reads from
+# replicas that are still catching up never hide their own writes
+@app.middleware("http")
+async def track_writes(request: Request, call_next):
+    response = await call_next(request)
+    if request.method not in ("GET", "HEAD", "OPTIONS") and response.status_code < 400:
+        replica_router.mark_write(read_caller(request))
+    return response
+
+# Count the queries each request issues; in debug mode they are also
+# reported back in response headers
+@app.middleware("http")
+async def instrument_queries(request: Request, call_next):
+    stats = QueryStats()
+    token = current_query_stats.set(stats)
+    try:
+        response = await call_next(request)
+    finally:
+        current_query_stats.reset(token)
+    query_metrics.record_request(stats)
+    if settings.DEBUG:
+        response.headers.update(stats.headers())
+    if stats.slowest_statement is not None and stats.slowest_seconds * 1000 >= settings.SLOW_QUERY_MS:
+        logger.info(
+            f"{request.method} {request.url.path} ran {stats.count} queries in {stats.seconds * 1000:.1f} ms, "
+            f"slowest {stats.slowest_seconds * 1000:.1f} ms with params {stats.slowest_params}"
+        )
+    return response
+
 # Add rate limits to routes
 @limiter.limit("10/minute")
 @app.post("/auth/login")
@@ -72,6 +124,36 @@ async def limiter_create_submission_proxy(request: Request):
     # This is just a proxy for rate limiting
     pass
 
+# Pre-render plant reports in the background when enabled
+@app.on_event("startup")
+async def start_report_scheduler():
+    if settings.REPORT_PREGEN_ENABLED and settings.REPORT_CACHE_ENABLED:
+        report_scheduler.start()
+
+@app.on_event("shutdown")
+async def stop_report_scheduler():
+    report_scheduler.stop()
+
+# Stop the worker processes rendering per-plant reports
+@app.on_event("shutdown")
+async def stop_report_pool():
+    shutdown_report_pool()
+
+# Batch writes through a single writer when group commit is enabled
+@app.on_event("startup")
+async def start_group_writer():
+    if settings.GROUP_COMMIT_ENABLED:
+        await group_writer.start()
+
+@app.on_event("shutdown")
+async def stop_group_writer():
+    await group_writer.stop()
+
+# Close the per-plant shard connections
+@app.on_event("shutdown")
+async def dispose_shards():
+    await shard_router.dispose()
+
 # Include routers
 app.include_router(auth.router)
 app.include_router(submissions.router)
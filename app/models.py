@@ -1,7 +1,9 @@
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, DateTime, Text
-from sqlalchemy.orm import relationship
+from sqlalchemy import Boolean, Column, ForeignKey, Index, Integer, String, Date, DateTime, Text, event, inspect, select
+from sqlalchemy.orm import Session, relationship
 from sqlalchemy.sql import func
+from typing import Optional
 import enum
+import re
 from .database import Base
 
 
@@ -10,6 +12,15 @@ class RoleType(str, enum.Enum):
     REGULAR_ADMIN = "regular_admin"
 
 
+class Plant(Base):
+    """Lookup table of plants, referenced by users and submissions through plant_id"""
+    __tablename__ = "plants"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String, unique=True, nullable=False)
+    created_at = Column(DateTime, default=func.now())
+
+
 class User(Base):
     __tablename__ = "users"
 
@@ -20,17 +31,36 @@ class User(Base):
     hashed_password = Column(String)
     te_id = Column(String, unique=True, index=True)
     role = Column(String, default=RoleType.REGULAR_ADMIN)  # SQLite doesn't support ENUM directly
-    plant = Column(String)
+    plant = Column(String)  # Display name, kept in sync with plant_id
+    plant_id = Column(Integer, ForeignKey("plants.id"), index=True)
     must_reset_password = Column(Boolean, default=True)
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, onupdate=func.now())
 
+    plant_record = relationship("Plant")
     submissions = relationship("Submission", back_populates="admin")
 
 
 class Submission(Base):
     __tablename__ = "submissions"
+    __table_args__ = (
+        # Plant filter and keyset pagination within a plant:
+        # plant_id = ? AND id > ? ORDER BY id
+        Index("ix_submissions_plant_id", "plant_id", "id"),
+        # Covers the report columns and the report cache watermark, so per-plant
+        # reports and watermark checks never touch the table itself
+        Index(
+            "ix_submissions_plant_report",
+            "plant_id", "last_name", "first_name", "te_id", "cin",
+            "grey_card_number", "date_of_birth", "updated_at",
+        ),
+        # Submissions old enough to archive; listings and their filters read
+        # submission_summary, which carries its own indexes
+        Index("ix_submissions_created_at", "created_at", "id"),
+        # Ids are never reused once the rows holding them are archived or deleted
+        {"sqlite_autoincrement": True},
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     first_name = Column(String)
@@ -39,12 +69,194 @@ class Submission(Base):
     te_id = Column(String, index=True)
     date_of_birth = Column(DateTime)
     grey_card_number = Column(String, index=True)
-    plant = Column(String, index=True)
+    plant = Column(String)  # Display name and storage directory, kept in sync with plant_id
+    plant_id = Column(Integer, ForeignKey("plants.id"))
     cin_file_path = Column(String)
     picture_file_path = Column(String)
     grey_card_file_path = Column(String)
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, onupdate=func.now())
     admin_id = Column(Integer, ForeignKey("users.id"))
+    # Normalized identifiers for duplicate detection (app/duplicates.py)
+    cin_key = Column(String, index=True)
+    te_id_key = Column(String, index=True)
+    grey_card_key = Column(String, index=True)
     
-    admin = relationship("User", back_populates="submissions")
\ No newline at end of file
+    plant_record = relationship("Plant")
+    admin = relationship("User", back_populates="submissions")
+
+
+class ArchivedSubmission(Base):
+    """
+    Submissions moved out of the hot table by the archive job (app/archive.py).
+    Same columns and ids as submissions, but only the index the listings need.
+    """
+    __tablename__ = "submissions_archive"
+    __table_args__ = (
+        Index("ix_submissions_archive_plant_id", "plant_id", "id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    first_name = Column(String)
+    last_name = Column(String)
+    cin = Column(String)
+    te_id = Column(String)
+    date_of_birth = Column(DateTime)
+    grey_card_number = Column(String)
+    plant = Column(String)
+    plant_id = Column(Integer, ForeignKey("plants.id"))
+    cin_file_path = Column(String)
+    picture_file_path = Column(String)
+    grey_card_file_path = Column(String)
+    created_at = Column(DateTime)
+    updated_at = Column(DateTime)
+    admin_id = Column(Integer, ForeignKey("users.id"))
+    cin_key = Column(String)
+    te_id_key = Column(String)
+    grey_card_key = Column(String)
+    archived_at = Column(DateTime, default=func.now())
+
+
+class SubmissionSummary(Base):
+    """
+    Slim projection of submissions with only the fields list pages show,
+    kept in sync with the submissions table by triggers (app/summaries.py)
+    """
+    __tablename__ = "submission_summary"
+    __table_args__ = (
+        # The listing filters and sorts of app/filters.py, as on submissions
+        Index("ix_submission_summary_plant_id", "plant_id", "id"),
+        Index("ix_submission_summary_plant_created_at", "plant_id", "created_at", "id"),
+        Index("ix_submission_summary_created_at", "created_at", "id"),
+        Index("ix_submission_summary_date_of_birth", "date_of_birth", "id"),
+        Index("ix_submission_summary_plant_date_of_birth", "plant_id", "date_of_birth", "id"),
+        Index("ix_submission_summary_admin_id", "admin_id", "id"),
+    )
+
+    id = Column(Integer, primary_key=True)  # Same id as the submission
+    first_name = Column(String)
+    last_name = Column(String)
+    cin = Column(String)
+    te_id = Column(String, index=True)
+    date_of_birth = Column(DateTime)
+    grey_card_number = Column(String, index=True)
+    plant = Column(String)
+    plant_id = Column(Integer)
+    admin_id = Column(Integer)
+    created_at = Column(DateTime)
+
+
+class SubmissionIdentityKey(Base):
+    """
+    Normalized identifiers claimed by submissions, unique per field, kept in
+    sync with the submissions table by triggers (app/duplicates.py)
+    """
+    __tablename__ = "submission_identity_keys"
+
+    field = Column(String, primary_key=True)  # cin, te_id or grey_card_number
+    key = Column(String, primary_key=True)
+    submission_id = Column(Integer, nullable=False, index=True)
+
+
+class SubmissionDailyCount(Base):
+    """Rollup of submission counts per plant, day and admin, maintained on insert"""
+    __tablename__ = "submission_daily_counts"
+
+    # 0 for submissions without a plant or an admin
+    plant_id = Column(Integer, primary_key=True)
+    day = Column(Date, primary_key=True)
+    admin_id = Column(Integer, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
+class IdempotencyKey(Base):
+    """
+    Responses of POST /submissions/ requests sent with an Idempotency-Key,
+    replayed when a client retries the same key (see app/idempotency.py)
+    """
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        # Expired keys are purged by creation time
+        Index("ix_idempotency_keys_created_at", "created_at"),
+    )
+
+    admin_id = Column(Integer, primary_key=True)
+    key = Column(String(255), primary_key=True)
+    fingerprint = Column(String(64), nullable=False)  # Hash of the request fields
+    status_code = Column(Integer)  # NULL while the original request is still running
+    response = Column(Text)
+    created_at = Column(DateTime, nullable=False)
+
+
+class FileDeletion(Base):
+    """
+    Uploaded files replaced by a submission update, deleted from storage once
+    FILE_DELETION_DELAY_SECONDS have passed (see app/deletions.py)
+    """
+    __tablename__ = "file_deletions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    path = Column(String, nullable=False)
+    queued_at = Column(DateTime, nullable=False, default=func.now(), index=True)
+
+
+def normalize_identifier(value: Optional[str]) -> Optional[str]:
+    """Drop whitespace and dashes and upper-case an identifier, so "ab 123" and "AB123" compare equal"""
+    if value is None:
+        return None
+    return re.sub(r"[\s-]", "", value).upper() or None
+
+
+def normalize_plant_name(name: Optional[str]) -> Optional[str]:
+    """Trim and collapse whitespace so "Plant  A " and "Plant A" are the same plant"""
+    if name is None:
+        return None
+    name = " ".join(name.split())
+    return name or None
+
+
+@event.listens_for(Session, "before_flush")
+def assign_plants(session, flush_context, instances):
+    """
+    Resolve the plant name of new or re-assigned users and submissions to a
+    plants row, so every row carries a plant_id. Names are matched
+    case-insensitively; a plant is only created when no match exists.
+    """
+    created = {}
+    for obj in list(session.new) + list(session.dirty):
+        if not isinstance(obj, (User, Submission)):
+            continue
+        state = inspect(obj)
+        if state.persistent and not state.attrs.plant.history.has_changes():
+            continue
+        if state.pending and (obj.plant_id is not None or obj.plant_record is not None):
+            continue
+
+        name = normalize_plant_name(obj.plant)
+        if name is None:
+            obj.plant_record = None
+            continue
+
+        plant = created.get(name.lower())
+        if plant is None:
+            with session.no_autoflush:
+                plant = session.execute(
+                    select(Plant).where(func.lower(Plant.name) == name.lower())
+                ).scalar_one_or_none()
+        if plant is None:
+            plant = Plant(name=name)
+            session.add(plant)
+            created[name.lower()] = plant
+
+        obj.plant_record = plant
+        obj.plant = plant.name
+
+
+@event.listens_for(Session, "before_flush")
+def assign_identity_keys(session, flush_context, instances):
+    """Keep the normalized duplicate-detection keys of submissions in sync with their identifiers"""
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, Submission):
+            obj.cin_key = normalize_identifier(obj.cin)
+            obj.te_id_key = normalize_identifier(obj.te_id)
+            obj.grey_card_key = normalize_identifier(obj.grey_card_number)
\ No newline at end of file
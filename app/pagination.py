@@ -0,0 +1,97 @@
+from fastapi import HTTPException, status
+from typing import Callable, List, Optional, Tuple
+import base64
+import json
+
+
+def encode_cursor(last_id: int) -> str:
+    """Encode the id of the last row on a page as an opaque continuation token"""
+    payload = json.dumps({"id": last_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    """Decode a continuation token back into the id to continue after"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        last_id = json.loads(base64.urlsafe_b64decode(padded))["id"]
+        if not isinstance(last_id, int):
+            raise ValueError("id must be an integer")
+        return last_id
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
+
+
+def paginate(query, id_column, skip: int, limit: int, cursor: Optional[str] = None):
+    """
+    Apply keyset pagination when a cursor is given and offset pagination otherwise.
+
+    Keyset pages seek straight to `id > cursor` through the index instead of
+    walking and discarding `skip` rows. One extra row is fetched so the caller
+    can tell whether another page follows.
+    """
+    query = query.order_by(id_column)
+    if cursor:
+        query = query.where(id_column > decode_cursor(cursor))
+    else:
+        query = query.offset(skip)
+    return query.limit(limit + 1)
+
+
+def _fetch_rows(result, query):
+    # Entity queries give back model instances, column queries give back rows
+    descriptions = query.column_descriptions
+    if len(descriptions) == 1 and descriptions[0]["expr"] is descriptions[0].get("entity"):
+        return result.scalars().all()
+    return result.all()
+
+
+def page_with_cursor(rows, limit: int):
+    """Trim the extra row fetched by paginate() and return (rows, next_cursor)"""
+    rows = list(rows)
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        if rows:
+            next_cursor = encode_cursor(rows[-1].id)
+    return rows, next_cursor
+
+
+async def fetch_merged_page(
+    sources: List[Tuple],
+    skip: int,
+    limit: int,
+    cursor: Optional[str] = None,
+    sort_key: Optional[Callable] = None,
+    descending: bool = False,
+):
+    """
+    Fetch one page over several (session, query, id_column) sources, merged
+    in id order, with the extra row paginate() adds to detect a following page.
+    Queries already ordered by another column are merged by `sort_key`
+    instead, with id as the tie-breaker in the same direction.
+    Entity queries return model instances and column queries return rows.
+
+    Used when a listing spans several tables or databases whose ids don't
+    overlap, such as per-plant shards or the hot and archived submissions.
+    """
+    if len(sources) == 1:
+        session, query, id_column = sources[0]
+        result = await session.execute(paginate(query, id_column, skip, limit, cursor))
+        return _fetch_rows(result, query)
+
+    # Every source could hold the whole page, so each one is asked for all
+    # of it and the merged rows are cut down afterwards
+    offset = 0 if cursor else skip
+    rows = []
+    for session, query, id_column in sources:
+        result = await session.execute(paginate(query, id_column, 0, offset + limit, cursor))
+        rows.extend(_fetch_rows(result, query))
+    if sort_key is None:
+        rows.sort(key=lambda row: row.id)
+    else:
+        rows.sort(key=lambda row: (sort_key(row), row.id), reverse=descending)
+    return rows[offset:offset + limit + 1]
\ No newline at end of file
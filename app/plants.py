@@ -0,0 +1,30 @@
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from typing import Dict, Optional
+
+from .models import Plant, normalize_plant_name
+
+
+def _plant_query(name: Optional[str]):
+    name = normalize_plant_name(name)
+    if name is None:
+        return None
+    return select(Plant).where(func.lower(Plant.name) == name.lower())
+
+
+def get_plant(db: Session, name: Optional[str]) -> Optional[Plant]:
+    """Look up a plant by name, ignoring case and extra whitespace"""
+    query = _plant_query(name)
+    return db.execute(query).scalar_one_or_none() if query is not None else None
+
+
+async def resolve_plant(db: AsyncSession, name: Optional[str]) -> Optional[Plant]:
+    """Look up a plant by name, ignoring case and extra whitespace"""
+    query = _plant_query(name)
+    return (await db.execute(query)).scalar_one_or_none() if query is not None else None
+
+
+def plant_names(db: Session) -> Dict[int, str]:
+    """Return {plant id: plant name} for every plant"""
+    return dict(db.execute(select(Plant.id, Plant.name)).all())
\ No newline at end of file
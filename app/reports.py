@@ -1,108 +1,423 @@
 from openpyxl import Workbook
 from openpyxl.styles import Font, Alignment, PatternFill
+from sqlalchemy import func
 from sqlalchemy.orm import Session
-from .models import Submission
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from .models import ArchivedSubmission, Submission
+from .plants import plant_names
+from .shards import submission_sessions
+from .config import settings
 from io import BytesIO
 from datetime import datetime
+import json
+import multiprocessing
+import os
+import re
+import shutil
+import tempfile
+import threading
+import zipfile
+
+
+# Size of the chunks report files are streamed to clients in
+REPORT_CHUNK_SIZE = 64 * 1024
+
+# Sheet title, column headers and filename prefix for each report format
+REPORT_FORMATS = {
+    1: {
+        "title": "Employee Data",
+        "headers": ["Last Name", "First Name", "CIN", "TE ID", "Date of Birth"],
+        "filename": "employee_data_format1",
+    },
+    2: {
+        "title": "Employee Grey Cards",
+        "headers": ["Last Name", "First Name", "Grey Card Number", "TE ID"],
+        "filename": "employee_grey_cards_format2",
+    },
+}
+
+
+def _report_query(db: Session, report_format: int, plant_id: int = None, model=Submission):
+    """
+    Build the query selecting the (plant_id, *columns) tuples of a report format
+    """
+    if report_format == 1:
+        columns = [model.last_name, model.first_name, model.cin,
+                   model.te_id, model.date_of_birth]
+    else:
+        columns = [model.last_name, model.first_name,
+                   model.grey_card_number, model.te_id]
+
+    query = db.query(model.plant_id, *columns)
+    if plant_id:
+        query = query.filter(model.plant_id == plant_id)
+    return query
+
+
+def _query_rows(db: Session, report_format: int, plant_id: int = None, include_archived: bool = False):
+    """
+    Query the (plant_id, *columns) tuples needed for a report format
+    """
+    models = [Submission, ArchivedSubmission] if include_archived else [Submission]
+
+    rows = []
+    # In shard mode, the all-plants report reads every plant's database
+    with submission_sessions(db, plant_id) as sessions:
+        for session in sessions.values():
+            for model in models:
+                for row in _report_query(session, report_format, plant_id, model).all():
+                    values = list(row)
+                    if report_format == 1:
+                        values[5] = values[5].strftime("%Y-%m-%d")
+                    rows.append(tuple(values))
+    return rows
+
+
+def _build_workbook(report_format: int, rows) -> Workbook:
+    """
+    Build a single-sheet workbook for the given report format and rows
+    """
+    spec = REPORT_FORMATS[report_format]
+
+    wb = Workbook()
+    ws = wb.active
+    ws.title = spec["title"]
+
+    # Set up headers
+    for col_num, header in enumerate(spec["headers"], 1):
+        cell = ws.cell(row=1, column=col_num)
+        cell.value = header
+        cell.font = Font(bold=True)
+        cell.fill = PatternFill(start_color="DDDDDD", end_color="DDDDDD", fill_type="solid")
+        cell.alignment = Alignment(horizontal="center")
+
+    # Add data rows
+    for row_num, row in enumerate(rows, 2):
+        for col_num, value in enumerate(row, 1):
+            ws.cell(row=row_num, column=col_num).value = value
+
+    # Auto-adjust column widths
+    for column in ws.columns:
+        max_length = 0
+        column_letter = column[0].column_letter
+        for cell in column:
+            if cell.value:
+                max_length = max(max_length, len(str(cell.value)))
+        adjusted_width = (max_length + 2)
+        ws.column_dimensions[column_letter].width = adjusted_width
+
+    return wb
+
+
+def _render_workbook(report_format: int, rows) -> bytes:
+    """
+    Render rows into a single-sheet workbook and return the xlsx bytes.
+
+    Kept at module level so it can be sent to worker processes.
+    """
+    output = BytesIO()
+    _build_workbook(report_format, rows).save(output)
+    return output.getvalue()
+
+
+def spooled_output():
+    """
+    Return a temporary file that stays in memory up to REPORT_SPOOL_THRESHOLD
+    bytes and rolls over to disk above it. It is deleted once closed.
+    """
+    return tempfile.SpooledTemporaryFile(max_size=settings.REPORT_SPOOL_THRESHOLD)
+
+
+def iter_report(output, chunk_size: int = REPORT_CHUNK_SIZE):
+    """Stream a report file in chunks and close it once fully sent"""
+    try:
+        while True:
+            chunk = output.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        output.close()
+
+
+def plant_watermarks(db: Session):
+    """
+    Return {plant_id: (count, max id, max updated_at)} for every plant.
+
+    The None key holds the watermark over all plants. A report is up to date
+    as long as the watermark it was rendered at has not changed.
+    """
+    rows = []
+    with submission_sessions(db) as sessions:
+        for session in sessions.values():
+            rows += session.query(
+                Submission.plant_id,
+                func.count(Submission.id),
+                func.max(Submission.id),
+                func.max(Submission.updated_at),
+            ).group_by(Submission.plant_id).all()
+
+    # A plant being split has rows in both the main database and its shard
+    watermarks = {}
+    for plant_id, count, max_id, updated in rows:
+        if plant_id in watermarks:
+            count, max_id, updated = _merge_watermarks([watermarks[plant_id], (count, max_id, updated)])
+        watermarks[plant_id] = (count, max_id, updated)
+    watermarks[None] = _merge_watermarks(watermarks.values())
+    return watermarks
+
+
+def _watermark_query(db: Session, plant_id: int = None):
+    """Build the query reading the watermark of one database"""
+    query = db.query(func.count(Submission.id), func.max(Submission.id), func.max(Submission.updated_at))
+    if plant_id:
+        query = query.filter(Submission.plant_id == plant_id)
+    return query
+
+
+def _watermark(db: Session, plant_id: int = None):
+    """Return the (count, max id, max updated_at) watermark for one plant or all plants"""
+    marks = []
+    with submission_sessions(db, plant_id) as sessions:
+        for session in sessions.values():
+            marks.append(tuple(_watermark_query(session, plant_id).one()))
+
+    if len(marks) == 1:
+        return marks[0]
+    return _merge_watermarks(marks)
+
+
+def _merge_watermarks(marks):
+    """Combine (count, max id, max updated_at) watermarks taken over different rows"""
+    marks = list(marks)
+    return (
+        sum(mark[0] for mark in marks),
+        max((mark[1] for mark in marks if mark[1]), default=None),
+        max((mark[2] for mark in marks if mark[2]), default=None),
+    )
+
+
+class ReportCache:
+    """
+    Cache of rendered reports keyed by (format, plant_id), shared on disk.
+
+    Entries remember the submissions watermark they were rendered at and are
+    only served while it still matches the database. They live as files in
+    REPORT_CACHE_DIR, so every worker process of a deployment serves the
+    reports pre-rendered by the scheduler, whichever process rendered them.
+    Each entry is a report file plus a small JSON file naming it and its
+    watermark; both are replaced atomically, so readers see either the old
+    entry or the new one.
+    """
+
+    def __init__(self, directory: str = None):
+        self._directory = directory
+
+    @property
+    def directory(self) -> str:
+        return self._directory or settings.REPORT_CACHE_DIR
+
+    def _entry_path(self, report_format: int, plant_id: int) -> str:
+        return os.path.join(self.directory, f"{report_format}_{plant_id or 'all'}.json")
+
+    def _read_entry(self, report_format: int, plant_id: int):
+        try:
+            with open(self._entry_path(report_format, plant_id)) as entry_file:
+                return json.load(entry_file)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _watermark_key(watermark):
+        count, max_id, updated = watermark
+        return [count, max_id, updated.isoformat() if updated else None]
+
+    def get(self, report_format: int, plant_id: int, watermark):
+        entry = self._read_entry(report_format, plant_id)
+        if entry is None or entry["watermark"] != self._watermark_key(watermark):
+            return None
+        try:
+            return open(os.path.join(self.directory, entry["file"]), "rb"), entry["filename"]
+        except OSError:
+            # Replaced by another process between reading the entry and opening it
+            return None
+
+    def set(self, report_format: int, plant_id: int, watermark, output, filename: str):
+        """Store a rendered report file"""
+        os.makedirs(self.directory, exist_ok=True)
+        prefix = f"{report_format}_{plant_id or 'all'}_"
+        fd, path = tempfile.mkstemp(prefix=prefix, suffix=".report", dir=self.directory)
+        with os.fdopen(fd, "wb") as cache_file:
+            shutil.copyfileobj(output, cache_file, REPORT_CHUNK_SIZE)
+        output.seek(0)
+
+        previous = self._read_entry(report_format, plant_id)
+        fd, entry_path = tempfile.mkstemp(prefix=prefix, suffix=".json.tmp", dir=self.directory)
+        with os.fdopen(fd, "w") as entry_file:
+            json.dump({
+                "watermark": self._watermark_key(watermark),
+                "file": os.path.basename(path),
+                "filename": filename,
+            }, entry_file)
+        os.replace(entry_path, self._entry_path(report_format, plant_id))
+        if previous:
+            self._discard(os.path.join(self.directory, previous["file"]))
+
+    def watermark(self, report_format: int, plant_id: int):
+        """Return the watermark a cached report was rendered at, or None"""
+        entry = self._read_entry(report_format, plant_id)
+        if entry is None:
+            return None
+        count, max_id, updated = entry["watermark"]
+        return count, max_id, datetime.fromisoformat(updated) if updated else None
+
+    def clear(self):
+        if os.path.isdir(self.directory):
+            for name in os.listdir(self.directory):
+                self._discard(os.path.join(self.directory, name))
+
+    @staticmethod
+    def _discard(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            # Still open by a response being streamed on platforms that lock open files
+            pass
+
+
+report_cache = ReportCache()
+
+
+def _plant_filename(plant_id: int, plant: str) -> str:
+    """
+    Make a plant name safe to use as a file name inside an archive. The plant
+    id is appended, since names differing only in replaced characters would
+    otherwise collide.
+    """
+    if plant_id is None:
+        return "unassigned"
+    return re.sub(r"[^\w\- ]", "_", plant or "") + f"_{plant_id}"
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def report_pool() -> ProcessPoolExecutor:
+    """
+    Return the process pool rendering per-plant workbooks, started on first use.
+
+    One pool is shared by every request rather than started per report. Its
+    workers are spawned, not forked: reports are generated from threadpool
+    threads, and forking a multi-threaded server can copy locks held by other
+    threads into the child, where nothing will ever release them.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.REPORT_WORKERS or os.cpu_count() or 1,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def shutdown_report_pool():
+    """Stop the report worker processes, if they were started"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
 
 
 class ReportGenerator:
     @staticmethod
-    def generate_format_1(db: Session, plant: str = None):
+    def generate(db: Session, report_format: int, plant_id: int = None, include_archived: bool = False):
         """
-        Generate Format 1 report: Last Name, First Name, CIN, TE ID, Date of Birth
+        Generate a single-sheet report for the given format and optional plant
         """
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Employee Data"
-        
-        # Set up headers
-        headers = ["Last Name", "First Name", "CIN", "TE ID", "Date of Birth"]
-        for col_num, header in enumerate(headers, 1):
-            cell = ws.cell(row=1, column=col_num)
-            cell.value = header
-            cell.font = Font(bold=True)
-            cell.fill = PatternFill(start_color="DDDDDD", end_color="DDDDDD", fill_type="solid")
-            cell.alignment = Alignment(horizontal="center")
-        
-        # Query data
-        query = db.query(Submission)
-        if plant:
-            query = query.filter(Submission.plant == plant)
-        submissions = query.all()
-        
-        # Add data rows
-        for row_num, submission in enumerate(submissions, 2):
-            ws.cell(row=row_num, column=1).value = submission.last_name
-            ws.cell(row=row_num, column=2).value = submission.first_name
-            ws.cell(row=row_num, column=3).value = submission.cin
-            ws.cell(row=row_num, column=4).value = submission.te_id
-            ws.cell(row=row_num, column=5).value = submission.date_of_birth.strftime("%Y-%m-%d")
-        
-        # Auto-adjust column widths
-        for column in ws.columns:
-            max_length = 0
-            column_letter = column[0].column_letter
-            for cell in column:
-                if cell.value:
-                    max_length = max(max_length, len(str(cell.value)))
-            adjusted_width = (max_length + 2)
-            ws.column_dimensions[column_letter].width = adjusted_width
-        
-        # Save to BytesIO
-        output = BytesIO()
-        wb.save(output)
+        rows = [row[1:] for row in _query_rows(db, report_format, plant_id, include_archived)]
+
+        # Save to a spooled temporary file so large reports are not held in memory twice
+        output = spooled_output()
+        _build_workbook(report_format, rows).save(output)
         output.seek(0)
-        
-        return output, f"employee_data_format1_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-    
+
+        prefix = REPORT_FORMATS[report_format]["filename"]
+        return output, f"{prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+
     @staticmethod
-    def generate_format_2(db: Session, plant: str = None):
+    def generate_cached(db: Session, report_format: int, plant_id: int = None, watermark=None):
+        """
+        Serve a report from the report cache, rendering and storing it on a miss
+        """
+        if not settings.REPORT_CACHE_ENABLED:
+            return ReportGenerator.generate(db, report_format, plant_id)
+
+        # Take the watermark before querying rows, so a submission that lands
+        # mid-render makes the entry stale rather than silently missing
+        if watermark is None:
+            watermark = _watermark(db, plant_id)
+        cached = report_cache.get(report_format, plant_id, watermark)
+        if cached:
+            return cached
+
+        output, filename = ReportGenerator.generate(db, report_format, plant_id)
+        report_cache.set(report_format, plant_id, watermark, output, filename)
+        return output, filename
+
+    @staticmethod
+    def generate_format_1(db: Session, plant_id: int = None):
+        """
+        Generate Format 1 report: Last Name, First Name, CIN, TE ID, Date of Birth
+        """
+        return ReportGenerator.generate(db, 1, plant_id)
+
+    @staticmethod
+    def generate_format_2(db: Session, plant_id: int = None):
         """
         Generate Format 2 report: Last Name, First Name, Grey Card Number, TE ID
         """
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Employee Grey Cards"
-        
-        # Set up headers
-        headers = ["Last Name", "First Name", "Grey Card Number", "TE ID"]
-        for col_num, header in enumerate(headers, 1):
-            cell = ws.cell(row=1, column=col_num)
-            cell.value = header
-            cell.font = Font(bold=True)
-            cell.fill = PatternFill(start_color="DDDDDD", end_color="DDDDDD", fill_type="solid")
-            cell.alignment = Alignment(horizontal="center")
-        
-        # Query data
-        query = db.query(Submission)
-        if plant:
-            query = query.filter(Submission.plant == plant)
-        submissions = query.all()
-        
-        # Add data rows
-        for row_num, submission in enumerate(submissions, 2):
-            ws.cell(row=row_num, column=1).value = submission.last_name
-            ws.cell(row=row_num, column=2).value = submission.first_name
-            ws.cell(row=row_num, column=3).value = submission.grey_card_number
-            ws.cell(row=row_num, column=4).value = submission.te_id
-        
-        # Auto-adjust column widths
-        for column in ws.columns:
-            max_length = 0
-            column_letter = column[0].column_letter
-            for cell in column:
-                if cell.value:
-                    max_length = max(max_length, len(str(cell.value)))
-            adjusted_width = (max_length + 2)
-            ws.column_dimensions[column_letter].width = adjusted_width
-        
-        # Save to BytesIO
-        output = BytesIO()
-        wb.save(output)
+        return ReportGenerator.generate(db, 2, plant_id)
+
+    @staticmethod
+    def generate_by_plant(db: Session, report_format: int, max_workers: int = None, include_archived: bool = False):
+        """
+        Generate one workbook per plant and bundle them into a ZIP archive.
+
+        Workbooks are rendered in parallel by the shared report pool, so
+        rendering every plant scales with the number of available cores.
+        max_workers=1 renders them in this thread instead.
+        """
+        names = plant_names(db)
+        rows_by_plant = {}
+        for row in _query_rows(db, report_format, include_archived=include_archived):
+            rows_by_plant.setdefault(row[0], []).append(row[1:])
+
+        plants = [_plant_filename(plant_id, names.get(plant_id)) for plant_id in rows_by_plant]
+        workers = max_workers or settings.REPORT_WORKERS or os.cpu_count() or 1
+        workers = min(workers, len(plants))
+
+        prefix = REPORT_FORMATS[report_format]["filename"]
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+
+        # xlsx files are already deflated, so store them as-is. Workbooks are
+        # written as they come back from the workers rather than all at once.
+        output = spooled_output()
+        with zipfile.ZipFile(output, "w", compression=zipfile.ZIP_STORED) as archive:
+            # Only pay for a process pool when there is more than one plant to render
+            if workers > 1:
+                workbooks = report_pool().map(_render_workbook, repeat(report_format), rows_by_plant.values())
+                for plant, workbook in zip(plants, workbooks):
+                    archive.writestr(f"{prefix}_{plant}.xlsx", workbook)
+            else:
+                for plant, rows in zip(plants, rows_by_plant.values()):
+                    archive.writestr(f"{prefix}_{plant}.xlsx", _render_workbook(report_format, rows))
         output.seek(0)
-        
-        return output, f"employee_grey_cards_format2_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+
+        return output, f"{prefix}_by_plant_{timestamp}.zip"
 
 
 report_generator = ReportGenerator()
\ No newline at end of file
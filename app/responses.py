@@ -0,0 +1,53 @@
+"""
+Typed JSON responses.
+
+Endpoints hand their content to typed_response() with the schema it must
+match. The content is validated (reading ORM objects and rows by attribute)
+through a TypeAdapter built once per schema, and the validated value is
+rendered by FastJSONResponse with orjson, which writes datetimes, dates and
+enums natively. That skips FastAPI's response_model pass and the recursive
+jsonable_encoder walk. Without orjson installed, the stdlib encoder is used.
+"""
+from functools import lru_cache
+from typing import Any, Mapping, Optional
+
+from fastapi.exceptions import ResponseValidationError
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter, ValidationError
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson when it is installed"""
+
+    def render(self, content: Any) -> bytes:
+        if orjson is None:
+            return super().render(content)
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+@lru_cache(maxsize=None)
+def type_adapter(schema) -> TypeAdapter:
+    """Return the TypeAdapter of a response schema, built on first use"""
+    return TypeAdapter(schema)
+
+
+def typed_response(
+    schema,
+    content: Any,
+    status_code: int = 200,
+    headers: Optional[Mapping[str, str]] = None,
+) -> FastJSONResponse:
+    """Validate response content against a schema and render it as JSON"""
+    adapter = type_adapter(schema)
+    try:
+        value = adapter.validate_python(content, from_attributes=True)
+    except ValidationError as e:
+        raise ResponseValidationError(errors=e.errors(), body=content)
+    # orjson encodes datetimes and enums itself; the stdlib encoder needs JSON-ready values
+    data = adapter.dump_python(value, mode="python" if orjson is not None else "json")
+    return FastJSONResponse(data, status_code=status_code, headers=headers)
\ No newline at end of file
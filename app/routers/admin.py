@@ -1,14 +1,33 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Response
+from fastapi import APIRouter, Depends, HTTPException, Query, status, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional, Dict, Any
 from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 
-from ..database import get_db
+from ..database import get_async_db, get_async_read_db, get_read_db, query_metrics
 from ..models import User, RoleType
-from ..schemas import User as UserSchema, UserCreate, UserUpdate, ReportFormat
+from ..schemas import (
+    DBMetrics,
+    DuplicatesResponse,
+    ReportFormat,
+    ResponseBase,
+    UserCreate,
+    UserListResponse,
+    UserResponse,
+    UserUpdate,
+)
 from ..dependencies import get_super_admin, get_current_admin
 from ..security import get_password_hash
-from ..reports import report_generator
+from ..reports import report_generator, iter_report
+from ..pagination import paginate, page_with_cursor
+from ..counts import CountMode, count_total, count_cache
+from ..config import settings
+from ..duplicates import DUPLICATE_KEYS, duplicate_clusters
+from ..shards import submission_sessions
+from ..responses import FastJSONResponse, typed_response
 
 
 router = APIRouter(
@@ -17,18 +36,19 @@ router = APIRouter(
 )
 
 
-@router.post("/users", response_model=Dict[str, Any], status_code=status.HTTP_201_CREATED)
+@router.post("/users", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 async def create_user(
     user_create: UserCreate,
     current_user: User = Depends(get_super_admin),
-    db: Session = Depends(get_db)
-) -> Dict[str, Any]:
+    db: AsyncSession = Depends(get_async_db)
+) -> FastJSONResponse:
     # Check if username or email already exists
-    db_user = db.query(User).filter(
+    result = await db.execute(select(User).where(
         (User.username == user_create.username) | 
         (User.email == user_create.email) |
         (User.te_id == user_create.te_id)
-    ).first()
+    ))
+    db_user = result.scalars().first()
     
     if db_user:
         raise HTTPException(
@@ -38,7 +58,7 @@ async def create_user(
     
     # Set default password to TE ID if not provided
     password = user_create.password if user_create.password else user_create.te_id
-    hashed_password = get_password_hash(password)
+    hashed_password = await run_in_threadpool(get_password_hash, password)
     
     # Create new user
     db_user = User(
@@ -53,73 +73,73 @@ async def create_user(
     )
     
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    count_cache.invalidate("users")
     
-    return {
+    return typed_response(UserResponse, {
         "status": "success",
         "message": "User created successfully",
-        "user": {
-            "id": db_user.id,
-            "username": db_user.username,
-            "email": db_user.email,
-            "full_name": db_user.full_name,
-            "te_id": db_user.te_id,
-            "plant": db_user.plant,
-            "role": db_user.role
-        }
-    }
-
-
-@router.get("/users", response_model=Dict[str, Any])
+        "user": db_user
+    }, status.HTTP_201_CREATED)
+
+
+@router.get("/users", response_model=UserListResponse)
 async def read_users(
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    count: Optional[CountMode] = None,
     current_user: User = Depends(get_super_admin),
-    db: Session = Depends(get_db)
-) -> Dict[str, Any]:
-    # Get total count for pagination
-    total_count = db.query(User).count()
+    db: AsyncSession = Depends(get_async_read_db)
+) -> FastJSONResponse:
+    # Get total count for pagination with the requested strategy
+    total_count, total_mode = await count_total(
+        db, select(User), "users", None, count or CountMode(settings.LIST_COUNT_MODE)
+    )
     
-    # Apply pagination
-    users = db.query(User).offset(skip).limit(limit).all()
+    # Apply pagination, by cursor when given and by offset otherwise
+    result = await db.execute(paginate(select(User), User.id, skip, limit, cursor))
+    users, next_cursor = page_with_cursor(result.scalars().all(), limit)
     
-    return {
+    return typed_response(UserListResponse, {
         "status": "success",
         "total": total_count,
+        "total_mode": total_mode,
         "skip": skip,
         "limit": limit,
+        "next_cursor": next_cursor,
         "users": users
-    }
+    })
 
 
-@router.get("/users/{user_id}", response_model=Dict[str, Any])
+@router.get("/users/{user_id}", response_model=UserResponse)
 async def read_user(
     user_id: int,
     current_user: User = Depends(get_super_admin),
-    db: Session = Depends(get_db)
-) -> Dict[str, Any]:
-    db_user = db.query(User).filter(User.id == user_id).first()
+    db: AsyncSession = Depends(get_async_read_db)
+) -> FastJSONResponse:
+    db_user = await db.get(User, user_id)
     if not db_user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
     
-    return {
+    return typed_response(UserResponse, {
         "status": "success",
         "user": db_user
-    }
+    })
 
 
-@router.put("/users/{user_id}", response_model=Dict[str, Any])
+@router.put("/users/{user_id}", response_model=UserResponse)
 async def update_user(
     user_id: int,
     user_update: UserUpdate,
     current_user: User = Depends(get_super_admin),
-    db: Session = Depends(get_db)
-) -> Dict[str, Any]:
-    db_user = db.query(User).filter(User.id == user_id).first()
+    db: AsyncSession = Depends(get_async_db)
+) -> FastJSONResponse:
+    db_user = await db.get(User, user_id)
     if not db_user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -131,23 +151,23 @@ async def update_user(
     for key, value in update_data.items():
         setattr(db_user, key, value)
     
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     
-    return {
+    return typed_response(UserResponse, {
         "status": "success",
         "message": "User updated successfully",
         "user": db_user
-    }
+    })
 
 
-@router.delete("/users/{user_id}", status_code=status.HTTP_200_OK)
+@router.delete("/users/{user_id}", status_code=status.HTTP_200_OK, response_model=ResponseBase)
 async def delete_user(
     user_id: int,
     current_user: User = Depends(get_super_admin),
-    db: Session = Depends(get_db)
-) -> Dict[str, Any]:
-    db_user = db.query(User).filter(User.id == user_id).first()
+    db: AsyncSession = Depends(get_async_db)
+) -> FastJSONResponse:
+    db_user = await db.get(User, user_id)
     if not db_user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -161,31 +181,89 @@ async def delete_user(
             detail="Cannot delete your own account"
         )
     
-    db.delete(db_user)
-    db.commit()
+    await db.delete(db_user)
+    await db.commit()
+    count_cache.invalidate("users")
     
-    return {
+    return typed_response(ResponseBase, {
         "status": "success",
         "message": f"User {db_user.username} deleted successfully"
-    }
+    })
+
 
+@router.get("/metrics/db", response_model=DBMetrics)
+async def read_db_metrics(current_user: User = Depends(get_super_admin)) -> FastJSONResponse:
+    """Query counts and database time since the process started"""
+    return typed_response(DBMetrics, query_metrics.snapshot())
 
+
+@router.get("/duplicates", response_model=DuplicatesResponse)
+def read_duplicates(
+    field: str = "cin",
+    limit: int = Query(100, ge=1, le=1000),
+    current_user: User = Depends(get_super_admin),
+    db: Session = Depends(get_read_db)
+) -> FastJSONResponse:
+    """Clusters of submissions sharing a normalized CIN, TE ID or grey card number"""
+    if field not in DUPLICATE_KEYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"field must be one of {', '.join(DUPLICATE_KEYS)}"
+        )
+    
+    # In shard mode each plant's database is grouped on its own
+    clusters = []
+    with submission_sessions(db) as sessions:
+        for session in sessions.values():
+            clusters += duplicate_clusters(session, field, limit)
+    
+    return typed_response(DuplicatesResponse, {
+        "status": "success",
+        "field": field,
+        "clusters": clusters[:limit]
+    })
+
+
+# Report rendering is CPU-bound and uses the sync session, so this route is a
+# plain function that FastAPI runs in its threadpool instead of on the event loop
 @router.get("/reports")
-async def generate_report(
+def generate_report(
     report_format: ReportFormat,
+    split_by_plant: bool = False,
+    include_archived: bool = False,
     current_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     # For regular admins, only show their plant's data
-    plant = current_user.plant if current_user.role == RoleType.REGULAR_ADMIN else None
+    plant_id = current_user.plant_id if current_user.role == RoleType.REGULAR_ADMIN else None
     
-    if report_format.format == 1:
-        output, filename = report_generator.generate_format_1(db, plant)
+    # Super admins can get one workbook per plant, rendered in parallel
+    if split_by_plant and plant_id is None:
+        output, filename = report_generator.generate_by_plant(
+            db, report_format.format, include_archived=include_archived
+        )
+        return _report_response(output, filename, "application/zip")
+    
+    # Reports including archived submissions are rare, so they skip the report cache
+    if include_archived:
+        output, filename = report_generator.generate(db, report_format.format, plant_id, include_archived=True)
     else:
-        output, filename = report_generator.generate_format_2(db, plant)
+        output, filename = report_generator.generate_cached(db, report_format.format, plant_id)
     
+    return _report_response(
+        output, filename, "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    )
+
+
+def _report_response(output, filename: str, media_type: str) -> StreamingResponse:
+    """
+    Stream a report file in chunks. The file is closed (and its spooled
+    temporary file deleted) once the response completes, even if the
+    client disconnects before the stream is exhausted.
+    """
     return StreamingResponse(
-        output,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={"Content-Disposition": f"attachment; filename={filename}"}
+        iter_report(output),
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+        background=BackgroundTask(output.close)
     )
\ No newline at end of file
@@ -1,15 +1,17 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Request, Body
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm, OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
 from typing import Any, Dict, Union
 import logging
 
-from ..database import get_db
+from ..database import get_async_db
 from ..models import User
-from ..schemas import Token, LoginRequest, PasswordReset, User as UserSchema
+from ..schemas import Token, LoginRequest, PasswordReset, UserInfoResponse, UserResponse
+from ..responses import FastJSONResponse, typed_response
 from ..security import (
-    authenticate_user, 
+    authenticate_user_async, 
     create_access_token, 
     get_password_hash, 
     get_current_user,
@@ -29,8 +31,8 @@ async def login_for_access_token(
     request: Request,
     form_data: Union[OAuth2PasswordRequestForm, None] = Depends(None),
     login_data: Union[LoginRequest, None] = None,
-    db: Session = Depends(get_db)
-) -> Dict[str, Any]:
+    db: AsyncSession = Depends(get_async_db)
+) -> FastJSONResponse:
     """
     Authenticate user and return access token with user info
     """
@@ -65,7 +67,7 @@ async def login_for_access_token(
         
         # Authenticate user
         print(f"Debug - Authenticating user: {username}")
-        user = authenticate_user(db, username, password)
+        user = await authenticate_user_async(db, username, password)
         if not user:
             print(f"Debug - Authentication failed for user: {username}")
             raise HTTPException(
@@ -96,7 +98,7 @@ async def login_for_access_token(
             }
         }
         print(f"Debug - Returning token and user data")
-        return response_data
+        return typed_response(Token, response_data)
 
     except HTTPException as he:
         # Re-raise HTTP exceptions as they are already properly formatted
@@ -111,38 +113,31 @@ async def login_for_access_token(
         )
 
 
-@router.post("/reset-password", response_model=Dict[str, Any])
+@router.post("/reset-password", response_model=UserInfoResponse)
 async def reset_password(
     password_data: PasswordReset,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-) -> Dict[str, Any]:
+    db: AsyncSession = Depends(get_async_db)
+) -> FastJSONResponse:
     try:
         # Verify current password
-        if not verify_password(password_data.current_password, current_user.hashed_password):
+        if not await run_in_threadpool(verify_password, password_data.current_password, current_user.hashed_password):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Current password is incorrect"
             )
         
         # Update password
-        current_user.hashed_password = get_password_hash(password_data.new_password)
+        current_user.hashed_password = await run_in_threadpool(get_password_hash, password_data.new_password)
         current_user.must_reset_password = False
-        db.commit()
-        db.refresh(current_user)
+        await db.commit()
+        await db.refresh(current_user)
         
-        return {
+        return typed_response(UserInfoResponse, {
             "status": "success",
             "message": "Password updated successfully",
-            "user": {
-                "id": current_user.id,
-                "username": current_user.username,
-                "email": current_user.email,
-                "full_name": current_user.full_name,
-                "role": current_user.role,
-                "must_reset_password": current_user.must_reset_password
-            }
-        }
+            "user": current_user
+        })
     except HTTPException as he:
         raise
     except Exception as e:
@@ -152,23 +147,13 @@ async def reset_password(
         )
 
 
-@router.get("/me", response_model=Dict[str, Any])
-async def read_users_me(current_user: User = Depends(get_current_user)) -> Dict[str, Any]:
+@router.get("/me", response_model=UserResponse)
+async def read_users_me(current_user: User = Depends(get_current_user)) -> FastJSONResponse:
     try:
-        return {
+        return typed_response(UserResponse, {
             "status": "success",
-            "user": {
-                "id": current_user.id,
-                "username": current_user.username,
-                "email": current_user.email,
-                "full_name": current_user.full_name,
-                "te_id": current_user.te_id,
-                "plant": current_user.plant,
-                "role": current_user.role,
-                "must_reset_password": current_user.must_reset_password,
-                "is_active": current_user.is_active
-            }
-        }
+            "user": current_user
+        })
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
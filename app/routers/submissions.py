@@ -1,11 +1,46 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Request
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Header, Query, Request
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List, Optional, Dict, Any
-from ..database import get_db
-from ..models import Submission, User, RoleType
-from ..schemas import Submission as SubmissionSchema, SubmissionCreate
+from typing import List, Optional, Dict, Any, Tuple
+from datetime import date
+from ..database import get_db, get_async_db, get_async_read_db
+from ..models import ArchivedSubmission, Submission, SubmissionSummary, User, RoleType
+from ..schemas import (
+    SubmissionCreate,
+    SubmissionBatchResponse,
+    SubmissionCreatedResponse,
+    SubmissionDetailResponse,
+    SubmissionImportResponse,
+    SubmissionListResponse,
+    SubmissionSearchResponse,
+    SubmissionStatsResponse,
+    SubmissionUpdatedResponse,
+)
 from ..dependencies import get_current_admin
-from ..storage import file_storage
+from ..storage import MAX_FILE_SIZE, FileValidator, file_storage
+from ..stats import record_submissions, query_daily_counts
+from ..pagination import fetch_merged_page, page_with_cursor
+from ..counts import CountMode, count_cache, least_exact_mode
+from ..config import settings
+from ..writer import group_writer
+from ..plants import plant_names, resolve_plant
+from ..shards import async_submission_session, async_submission_sessions, count_across, shard_router
+from ..archive import archive_requested
+from ..search import count_matches, search_submissions
+from ..filters import apply_filters, apply_sort, parse_sort, sort_key
+from ..imports import ImportFileError, import_submissions
+from ..idempotency import claim_key, release_key, request_fingerprint, store_response
+from ..duplicates import find_duplicates, identity_keys, is_duplicate_error
+from ..summaries import LIST_COLUMNS, summary_select
+from ..responses import FastJSONResponse, typed_response
+from ..deletions import queue_file_deletions
+from collections import Counter, defaultdict
+from contextlib import AsyncExitStack
+from pydantic import ValidationError
+from loguru import logger
+import asyncio
 import json
 
 router = APIRouter(
@@ -14,7 +49,12 @@ router = APIRouter(
 )
 
 
-@router.post("/", status_code=status.HTTP_201_CREATED, response_model=Dict[str, Any])
+@router.post(
+    "/",
+    status_code=status.HTTP_201_CREATED,
+    response_model=SubmissionCreatedResponse,
+    responses={status.HTTP_200_OK: {"model": SubmissionUpdatedResponse, "description": "Updated by an upsert"}}
+)
 async def create_submission(
     request: Request,
     first_name: str = Form(...),
@@ -27,9 +67,16 @@ async def create_submission(
     cin_file: UploadFile = File(...),
     picture_file: UploadFile = File(...),
     grey_card_file: UploadFile = File(...),
+    upsert: bool = Form(False),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
     current_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
-) -> Dict[str, Any]:
+    db: AsyncSession = Depends(get_async_db)
+) -> FastJSONResponse:
+    """
+    Create a submission. With upsert=true, an existing submission with the
+    same TE ID is updated in place instead (200 rather than 201), and only
+    the files whose content changed are replaced.
+    """
     # Create submission data
     submission_data = {
         "first_name": first_name,
@@ -40,7 +87,57 @@ async def create_submission(
         "grey_card_number": grey_card_number,
         "plant": plant
     }
+    files = {"cin": cin_file, "pic": picture_file, "grey_card": grey_card_file}
     
+    if not idempotency_key:
+        status_code, content = await _store_submission(submission_data, files, current_user, db, upsert)
+        return _write_response(status_code, content)
+    
+    # A retry of a keyed request gets the original response back, without
+    # storing the submission or its files a second time
+    fingerprint = request_fingerprint({
+        **submission_data, **{file_type: upload.filename for file_type, upload in files.items()}, "upsert": upsert
+    })
+    # The key is kept on its own session: the rollbacks of claiming and
+    # releasing it must not expire current_user or the request's own work
+    admin_id = current_user.id
+    async with AsyncSession(db.bind, autoflush=False, expire_on_commit=False) as key_db:
+        replay = await claim_key(key_db, admin_id, idempotency_key, fingerprint)
+        if replay is not None:
+            return replay
+        # Cancellation (a client disconnect) releases the key too, not just errors
+        try:
+            status_code, content = await _store_submission(submission_data, files, current_user, db, upsert)
+        except BaseException:
+            # Ends any write left open, so the release is not stuck behind its lock
+            await db.rollback()
+            await release_key(key_db, admin_id, idempotency_key)
+            raise
+        await store_response(key_db, admin_id, idempotency_key, status_code, content)
+    return _write_response(status_code, content)
+
+
+def _duplicate_conflict(duplicates: Optional[List[Dict[str, Any]]] = None) -> HTTPException:
+    # Without the matches when the identity keys' unique constraint caught a concurrent duplicate
+    detail = {"message": "A submission with the same identifiers already exists"}
+    if duplicates is not None:
+        detail["duplicates"] = duplicates
+    return HTTPException(status_code=status.HTTP_409_CONFLICT, detail=detail)
+
+
+def _write_response(status_code: int, content: Dict[str, Any]) -> FastJSONResponse:
+    schema = SubmissionUpdatedResponse if status_code == status.HTTP_200_OK else SubmissionCreatedResponse
+    return typed_response(schema, content, status_code)
+
+
+async def _store_submission(
+    submission_data: Dict[str, Any],
+    files: Dict[str, UploadFile],
+    current_user: User,
+    db: AsyncSession,
+    upsert: bool = False
+) -> Tuple[int, Dict[str, Any]]:
+    """Store a submission and return the response status code and body"""
     # Validate submission data using Pydantic model
     try:
         submission_create = SubmissionCreate(**submission_data)
@@ -50,11 +147,36 @@ async def create_submission(
             detail=f"Invalid submission data: {str(e)}"
         )
     
+    # Only accept known plants, so a typo can't start a new plant (or upload directory)
+    db_plant = await resolve_plant(db, submission_create.plant)
+    if db_plant is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown plant: {submission_data['plant']}"
+        )
+    
+    # Refuse a second submission for the same employee before any file is written
+    keys = identity_keys(submission_create.cin, submission_create.te_id, submission_create.grey_card_number)
+    async with async_submission_sessions(db) as sessions:
+        duplicates = await find_duplicates(sessions.values(), keys)
+    
+    # An upsert updates the submission registered under the same TE ID
+    existing_id = None
+    if upsert:
+        existing_id = next((match["submission_id"] for match in duplicates if "te_id" in match["fields"]), None)
+        duplicates = [match for match in duplicates if match["submission_id"] != existing_id]
+    if duplicates:
+        raise _duplicate_conflict(duplicates)
+    if existing_id is not None:
+        return status.HTTP_200_OK, await _update_submission(
+            existing_id, submission_create, db_plant, files, current_user, db
+        )
+    
     # Save files
     try:
-        cin_path = await file_storage.save_file(cin_file, plant, "cin")
-        picture_path = await file_storage.save_file(picture_file, plant, "pic")
-        grey_card_path = await file_storage.save_file(grey_card_file, plant, "grey_card")
+        cin_path = await file_storage.save_file(files["cin"], db_plant.name, "cin")
+        picture_path = await file_storage.save_file(files["pic"], db_plant.name, "pic")
+        grey_card_path = await file_storage.save_file(files["grey_card"], db_plant.name, "grey_card")
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -62,76 +184,603 @@ async def create_submission(
         )
     
     # Create submission in database
-    db_submission = Submission(
-        **submission_data,
-        cin_file_path=cin_path,
-        picture_file_path=picture_path,
-        grey_card_file_path=grey_card_path,
-        admin_id=current_user.id  # Set the admin ID
-    )
+    async def insert_submission(session: AsyncSession) -> int:
+        db_submission = Submission(
+            **{**submission_create.model_dump(), "plant": db_plant.name},
+            plant_id=db_plant.id,
+            cin_file_path=cin_path,
+            picture_file_path=picture_path,
+            grey_card_file_path=grey_card_path,
+            admin_id=current_user.id  # Set the admin ID
+        )
+        session.add(db_submission)
+        await session.flush()
+        
+        # Keep the daily statistics rollup in the same transaction
+        await session.run_sync(record_submissions, [db_submission])
+        return db_submission.id
     
-    db.add(db_submission)
-    db.commit()
-    db.refresh(db_submission)
+    # In shard mode the submission goes to its plant's own database file
+    async with async_submission_session(db, db_plant.id, create=True) as target_db:
+        try:
+            # Funnel the insert through the group-commit writer when it is running
+            if group_writer.running and target_db is db:
+                submission_id = await group_writer.submit(insert_submission)
+            else:
+                submission_id = await insert_submission(target_db)
+                await target_db.commit()
+        except IntegrityError as e:
+            # A concurrent request stored the same identifiers after our check
+            await target_db.rollback()
+            for path in (cin_path, picture_path, grey_card_path):
+                file_storage.remove(path)
+            if is_duplicate_error(e):
+                raise _duplicate_conflict()
+            raise
+        
+        db_submission = await target_db.get(Submission, submission_id, populate_existing=True)
+    count_cache.invalidate("submissions", db_plant.id)
     
     # Return more comprehensive response
-    return {
+    return status.HTTP_201_CREATED, {
         "status": "success",
         "message": "Submission created successfully",
-        "submission": {
-            "id": db_submission.id,
-            "first_name": db_submission.first_name,
-            "last_name": db_submission.last_name,
-            "cin": db_submission.cin,
-            "te_id": db_submission.te_id,
-            "plant": db_submission.plant,
-            "created_at": db_submission.created_at
-        }
+        "submission": _submission_summary(db_submission)
+    }
+
+
+# Upload keys of a submission's files and the columns holding their paths
+FILE_PATH_COLUMNS = {
+    "cin": "cin_file_path",
+    "pic": "picture_file_path",
+    "grey_card": "grey_card_file_path",
+}
+
+
+async def _update_submission(
+    submission_id: int,
+    submission_create: SubmissionCreate,
+    db_plant,
+    files: Dict[str, UploadFile],
+    current_user: User,
+    db: AsyncSession
+) -> Dict[str, Any]:
+    """Update a submission in place, replacing only the files whose content changed"""
+    # Every upload is checked, even the ones that end up unchanged
+    try:
+        for file_type, upload in files.items():
+            await file_storage.validated_content(upload, file_type)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"File upload error: {str(e)}"
+        )
+    
+    async with async_submission_session(db, shard_router.plant_for_id(submission_id)) as target_db:
+        db_submission = await target_db.get(Submission, submission_id)
+        if db_submission is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Submission not found")
+        # Regular admins can only update their own plant's submissions
+        if current_user.role == RoleType.REGULAR_ADMIN and db_submission.plant_id != current_user.plant_id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Not authorized to access this submission"
+            )
+        # Moving an employee to another plant would move their rollup counts and shard too
+        if db_submission.plant_id != db_plant.id:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"TE ID {submission_create.te_id} is registered at plant {db_submission.plant}"
+            )
+        
+        replaced, saved, new_paths = [], [], {}
+        try:
+            for file_type, column in FILE_PATH_COLUMNS.items():
+                if await file_storage.same_content(files[file_type], getattr(db_submission, column)):
+                    continue
+                new_path = await file_storage.save_file(files[file_type], db_plant.name, file_type)
+                saved.append(new_path)
+                replaced.append(file_type)
+                new_paths[column] = new_path
+            values = {**submission_create.model_dump(), "plant": db_plant.name, **new_paths}
+            
+            def apply_update(submission: Submission, deletions_db) -> None:
+                # The old files may still be read by a report, so they are deleted later
+                queue_file_deletions(deletions_db, [getattr(submission, column) for column in new_paths])
+                for field, value in values.items():
+                    setattr(submission, field, value)
+            
+            # Funnel the update through the group-commit writer when it is running
+            if group_writer.running and target_db is db:
+                async def update_submission(session: AsyncSession) -> None:
+                    submission = await session.get(Submission, submission_id)
+                    # Archived or removed since it was read above
+                    if submission is None:
+                        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Submission not found")
+                    apply_update(submission, session)
+                    await session.flush()
+                
+                await group_writer.submit(update_submission)
+            else:
+                apply_update(db_submission, db)
+                await target_db.commit()
+                if target_db is not db:
+                    await db.commit()
+        except Exception as e:
+            await target_db.rollback()
+            for path in saved:
+                file_storage.remove(path)
+            if isinstance(e, IntegrityError) and is_duplicate_error(e):
+                raise _duplicate_conflict()
+            raise
+        
+        await target_db.refresh(db_submission)
+    
+    return {
+        "status": "success",
+        "message": "Submission updated successfully",
+        "submission": _submission_summary(db_submission),
+        "replaced_files": replaced
     }
 
 
-@router.get("/", response_model=Dict[str, Any])
+def _submission_summary(db_submission: Submission) -> Dict[str, Any]:
+    return {name: getattr(db_submission, name) for name in LIST_COLUMNS}
+
+
+# Files of a batch item, keyed by storage type, and the item field naming each
+BATCH_FILE_FIELDS = {
+    "cin": "cin_file",
+    "pic": "picture_file",
+    "grey_card": "grey_card_file",
+}
+
+
+@router.post("/batch", status_code=status.HTTP_201_CREATED, response_model=SubmissionBatchResponse)
+async def create_submission_batch(
+    request: Request,
+    submissions: str = Form(...),
+    files: List[UploadFile] = File(...),
+    current_user: User = Depends(get_current_admin),
+    db: AsyncSession = Depends(get_async_db)
+) -> FastJSONResponse:
+    """
+    Create several submissions from one multipart request. `submissions` is a
+    JSON array of submission fields, where cin_file, picture_file and
+    grey_card_file name the uploaded `files` belonging to each item. Every
+    item is validated before anything is stored, and all of them are
+    inserted in one transaction, so the batch is stored whole or not at all.
+    In shard mode each plant's shard commits on its own: if only some of them
+    fail, the rest stay stored and the response (207) says which items were
+    created and which failed.
+    """
+    try:
+        items = json.loads(submissions)
+    except ValueError:
+        items = None
+    if not isinstance(items, list) or not items or not all(isinstance(item, dict) for item in items):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="submissions must be a non-empty JSON array of objects"
+        )
+    if len(items) > settings.BATCH_MAX_SUBMISSIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"A batch holds at most {settings.BATCH_MAX_SUBMISSIONS} submissions"
+        )
+    
+    uploads = {upload.filename: upload for upload in files}
+    # Only file names count; anything else is reported on its own item below
+    referenced = Counter(
+        item.get(field) for item in items for field in BATCH_FILE_FIELDS.values()
+        if isinstance(item.get(field), str)
+    )
+    plants = {}
+    seen_keys = {}
+    
+    # Validate every item up front, with the same rules as a single submission
+    results, valid = [], []
+    for index, item in enumerate(items):
+        errors = []
+        try:
+            submission_create = SubmissionCreate(**{name: item.get(name) for name in SubmissionCreate.model_fields})
+        except ValidationError as e:
+            submission_create = None
+            errors += [f"{error['loc'][0]}: {error['msg']}" for error in e.errors()]
+        
+        db_plant = None
+        if submission_create is not None:
+            key = submission_create.plant.strip().lower()
+            if key not in plants:
+                plants[key] = await resolve_plant(db, submission_create.plant)
+            db_plant = plants[key]
+            if db_plant is None:
+                errors.append(f"Unknown plant: {submission_create.plant}")
+            
+            # Duplicates of stored submissions, or of an earlier item of this batch
+            keys = identity_keys(submission_create.cin, submission_create.te_id, submission_create.grey_card_number)
+            async with async_submission_sessions(db) as sessions:
+                for duplicate in await find_duplicates(sessions.values(), keys):
+                    errors.append(
+                        f"Duplicate of submission {duplicate['submission_id']} ({', '.join(duplicate['fields'])})"
+                    )
+            for field, key in keys.items():
+                if (field, key) in seen_keys:
+                    errors.append(f"Duplicate of item {seen_keys[(field, key)]} ({field})")
+                else:
+                    seen_keys[(field, key)] = index
+        
+        item_files = {}
+        for file_type, field in BATCH_FILE_FIELDS.items():
+            filename = item.get(field)
+            if filename is not None and not isinstance(filename, str):
+                errors.append(f"{field}: must be the name of an uploaded file")
+                continue
+            upload = uploads.get(filename)
+            if upload is None:
+                errors.append(f"{field}: no uploaded file named {filename}")
+            elif referenced[filename] > 1:
+                errors.append(f"{field}: {filename} is used more than once")
+            elif FileValidator.filename_error(filename, file_type):
+                errors.append(f"{field}: {FileValidator.filename_error(filename, file_type)}")
+            elif upload.content_type not in ("image/jpeg", "image/png"):
+                errors.append(f"{field}: Invalid file type. Only JPEG and PNG are supported.")
+            elif upload.size is not None and upload.size > MAX_FILE_SIZE:
+                errors.append(f"{field}: File too large")
+            else:
+                item_files[file_type] = upload
+        
+        if errors:
+            results.append({"index": index, "status": "invalid", "errors": errors})
+        else:
+            results.append({"index": index, "status": "valid"})
+            valid.append((index, submission_create, db_plant, item_files))
+    
+    if len(valid) < len(items):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail={"message": "Invalid submissions in batch, nothing was stored", "results": results}
+        )
+    
+    # Persist every file concurrently
+    saves = [
+        file_storage.save_file(upload, db_plant.name, file_type)
+        for _, _, db_plant, item_files in valid
+        for file_type, upload in item_files.items()
+    ]
+    outcomes = await asyncio.gather(*saves, return_exceptions=True)
+    saved = [outcome for outcome in outcomes if isinstance(outcome, str)]
+    failures = [outcome for outcome in outcomes if isinstance(outcome, Exception)]
+    if failures:
+        for path in saved:
+            file_storage.remove(path)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"File upload error: {getattr(failures[0], 'detail', str(failures[0]))}"
+        )
+    paths = iter(saved)
+    
+    db_submissions = {}
+    by_plant = defaultdict(list)
+    for index, submission_create, db_plant, item_files in valid:
+        file_paths = {file_type: next(paths) for file_type in item_files}
+        db_submissions[index] = Submission(
+            **{**submission_create.model_dump(), "plant": db_plant.name},
+            plant_id=db_plant.id,
+            cin_file_path=file_paths["cin"],
+            picture_file_path=file_paths["pic"],
+            grey_card_file_path=file_paths["grey_card"],
+            admin_id=current_user.id
+        )
+        by_plant[db_plant.id].append(db_submissions[index])
+    
+    # One transaction for the whole batch; in shard mode, one per plant shard
+    failed = {}
+    async with AsyncExitStack() as stack:
+        targets = defaultdict(list)
+        try:
+            for plant_id, plant_submissions in by_plant.items():
+                target_db = await stack.enter_async_context(async_submission_session(db, plant_id, create=True))
+                target_db.add_all(plant_submissions)
+                await target_db.flush()
+                # Keep the daily statistics rollup in the same transaction
+                await target_db.run_sync(record_submissions, plant_submissions)
+                targets[target_db].append(plant_id)
+        except Exception as e:
+            await db.rollback()
+            for path in saved:
+                file_storage.remove(path)
+            if isinstance(e, IntegrityError) and is_duplicate_error(e):
+                raise _duplicate_conflict()
+            raise
+        
+        # A failed shard commit only loses its own plants' submissions and files
+        for target_db, plant_ids in targets.items():
+            try:
+                await target_db.commit()
+            except Exception as e:
+                await target_db.rollback()
+                logger.error(f"Batch commit failed for plants {plant_ids}: {str(e)}")
+                for plant_id in plant_ids:
+                    failed[plant_id] = e
+                    for db_submission in by_plant[plant_id]:
+                        for column in FILE_PATH_COLUMNS.values():
+                            file_storage.remove(getattr(db_submission, column))
+    if len(failed) == len(by_plant):
+        raise next(iter(failed.values()))
+    
+    for plant_id in by_plant:
+        if plant_id not in failed:
+            count_cache.invalidate("submissions", plant_id)
+    
+    results = []
+    for index in sorted(db_submissions):
+        plant_id = db_submissions[index].plant_id
+        if plant_id in failed:
+            results.append({
+                "index": index,
+                "status": "failed",
+                "errors": [f"Could not be stored: {str(failed[plant_id])}"]
+            })
+        else:
+            results.append({"index": index, "status": "created", "submission": db_submissions[index]})
+    created = sum(result["status"] == "created" for result in results)
+    
+    return typed_response(SubmissionBatchResponse, {
+        "status": "success" if not failed else "partial",
+        "message": f"{created} submissions created successfully" if not failed
+                   else f"{created} of {len(results)} submissions created",
+        "results": results
+    }, status.HTTP_201_CREATED if not failed else status.HTTP_207_MULTI_STATUS)
+
+
+# Importing parses the sheet, copies images and inserts rows with the sync
+# session, so this route is a plain function run in FastAPI's threadpool
+@router.post("/import", response_model=SubmissionImportResponse)
+def import_submission_sheet(
+    rows_file: UploadFile = File(...),
+    images_file: UploadFile = File(...),
+    dry_run: bool = Form(False),
+    current_user: User = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+) -> FastJSONResponse:
+    try:
+        report = import_submissions(
+            db, rows_file.file, rows_file.filename, images_file.file, current_user.id, dry_run=dry_run
+        )
+    except ImportFileError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    return typed_response(SubmissionImportResponse, {
+        "status": "success",
+        "message": f"{report['imported']} of {report['rows']} rows imported" if not dry_run
+                   else f"{report['valid']} of {report['rows']} rows are valid",
+        **report
+    })
+
+
+@router.get("/", response_model=SubmissionListResponse)
 async def read_submissions(
     request: Request,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     plant: Optional[str] = None,
+    created_from: Optional[date] = None,
+    created_to: Optional[date] = None,
+    dob_from: Optional[date] = None,
+    dob_to: Optional[date] = None,
+    admin_id: Optional[int] = None,
+    te_id: Optional[str] = None,
+    grey_card_number: Optional[str] = None,
+    sort: str = "id",
+    include_archived: bool = False,
+    count: Optional[CountMode] = None,
     current_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
-) -> Dict[str, Any]:
-    query = db.query(Submission)
+    db: AsyncSession = Depends(get_async_read_db)
+) -> FastJSONResponse:
+    plant_scoped = False
+    plant_id = None
     
     # Filter by plant if user is regular admin
     if current_user.role == RoleType.REGULAR_ADMIN:
-        query = query.filter(Submission.plant == current_user.plant)
+        plant_scoped, plant_id = True, current_user.plant_id
     # Filter by specified plant if provided
     elif plant:
-        query = query.filter(Submission.plant == plant)
+        db_plant = await resolve_plant(db, plant)
+        if db_plant is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Plant not found"
+            )
+        plant_scoped, plant_id = True, db_plant.id
+    
+    # Cursors continue after an id, so they only work in id order
+    sort_field, descending = parse_sort(sort)
+    if cursor and (sort_field != "id" or descending):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor pagination is only supported when sorting by id"
+        )
+    
+    filters = {
+        "created_from": created_from,
+        "created_to": created_to,
+        "dob_from": dob_from,
+        "dob_to": dob_to,
+        "admin_id": admin_id,
+        "te_id": te_id,
+        "grey_card_number": grey_card_number,
+    }
     
-    # Get total count for pagination
-    total_count = query.count()
+    def filtered(table):
+        columns = table.c
+        query = summary_select(table)
+        if plant_scoped:
+            query = query.where(columns.plant_id == plant_id)
+        query = apply_filters(query, columns, **filters)
+        return apply_sort(query, columns, sort_field, descending)
     
-    # Apply pagination
-    submissions = query.offset(skip).limit(limit).all()
+    # Pages are read from the slim summary projection as plain rows; its
+    # counts are cached and estimated as those of the submissions table
+    tables = [(SubmissionSummary.__table__, Submission.__tablename__)]
+    # Old submissions are only read from the archive when the caller asks for them
+    if include_archived or archive_requested(created_from, created_to):
+        tables.append((ArchivedSubmission.__table__, ArchivedSubmission.__tablename__))
+    
+    # Cached and estimated counts only know per-plant totals, so filtered listings count exactly
+    count_mode = count or CountMode(settings.LIST_COUNT_MODE)
+    if any(value is not None for value in filters.values()):
+        count_mode = CountMode.EXACT
+    
+    # In shard mode, a cross-plant listing fans out over every plant's database
+    async with async_submission_sessions(db, plant_id) as sessions:
+        totals, sources = [], []
+        for table, count_table in tables:
+            query = filtered(table)
+            # Get total count for pagination with the requested strategy
+            totals.append(await count_across(sessions, query, count_table, count_mode))
+            sources += [(session, query, table.c.id) for session in sessions.values()]
+        
+        # Apply pagination, by cursor when given and by offset otherwise
+        rows = await fetch_merged_page(
+            sources, skip, limit, cursor,
+            sort_key=None if sort_field == "id" and not descending else sort_key(sort_field),
+            descending=descending
+        )
+    total_count = sum(total for total, _ in totals)
+    total_mode = least_exact_mode(mode for _, mode in totals)
+    submissions, next_cursor = page_with_cursor(rows, limit)
+    if sort_field != "id" or descending:
+        next_cursor = None
     
     # Return enhanced response with pagination info
-    return {
+    return typed_response(SubmissionListResponse, {
         "status": "success",
         "total": total_count,
+        "total_mode": total_mode,
         "skip": skip,
         "limit": limit,
+        "next_cursor": next_cursor,
         "submissions": submissions
-    }
+    })
+
+
+@router.get("/stats", response_model=SubmissionStatsResponse)
+async def read_submission_stats(
+    request: Request,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    plant: Optional[str] = None,
+    admin_id: Optional[int] = None,
+    current_user: User = Depends(get_current_admin),
+    db: AsyncSession = Depends(get_async_read_db)
+) -> FastJSONResponse:
+    # Regular admins only see their own plant's statistics
+    plant_id = None
+    if current_user.role == RoleType.REGULAR_ADMIN:
+        plant_id = current_user.plant_id
+    elif plant:
+        db_plant = await resolve_plant(db, plant)
+        if db_plant is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Plant not found"
+            )
+        plant_id = db_plant.id
+    
+    # In shard mode each plant's rollup lives in its own database file
+    rows = []
+    async with async_submission_sessions(db, plant_id) as sessions:
+        for session in sessions.values():
+            rows += await session.run_sync(
+                query_daily_counts, plant_id=plant_id, start=start, end=end, admin_id=admin_id
+            )
+    rows.sort(key=lambda row: (row.day, row.plant_id, row.admin_id))
+    
+    # The rollup is keyed by plant id; names are looked up for display
+    names = await db.run_sync(plant_names)
+    return typed_response(SubmissionStatsResponse, {
+        "status": "success",
+        "total": sum(row.count for row in rows),
+        "stats": [
+            {
+                "plant": names.get(row.plant_id),
+                "plant_id": row.plant_id or None,
+                "day": row.day,
+                "admin_id": row.admin_id,
+                "count": row.count,
+            }
+            for row in rows
+        ]
+    })
 
 
-@router.get("/{submission_id}", response_model=Dict[str, Any])
+# Declared before /{submission_id} so "search" is not taken for an id
+@router.get("/search", response_model=SubmissionSearchResponse)
+async def search(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    plant: Optional[str] = None,
+    current_user: User = Depends(get_current_admin),
+    db: AsyncSession = Depends(get_async_read_db)
+) -> FastJSONResponse:
+    plant_id = None
+    
+    # Regular admins only search their own plant
+    if current_user.role == RoleType.REGULAR_ADMIN:
+        plant_id = current_user.plant_id
+    elif plant:
+        db_plant = await resolve_plant(db, plant)
+        if db_plant is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Plant not found"
+            )
+        plant_id = db_plant.id
+    
+    # In shard mode every plant's index is searched and the hits merged by rank
+    matches, total = [], 0
+    async with async_submission_sessions(db, plant_id) as sessions:
+        for session in sessions.values():
+            session_matches = await search_submissions(session, q, plant_id, limit)
+            matches += session_matches
+            # Only a full page can have more matches behind it
+            if len(session_matches) < limit:
+                total += len(session_matches)
+            else:
+                total += await count_matches(session, q, plant_id)
+    matches.sort(key=lambda match: (match[1], match[0].id))
+    
+    return typed_response(SubmissionSearchResponse, {
+        "status": "success",
+        "query": q,
+        "total": total,
+        "submissions": [
+            {**_submission_summary(submission), "rank": rank}
+            for submission, rank in matches[:limit]
+        ]
+    })
+
+
+@router.get("/{submission_id}", response_model=SubmissionDetailResponse)
 async def read_submission(
     request: Request,
     submission_id: int,
     current_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
-) -> Dict[str, Any]:
-    submission = db.query(Submission).filter(Submission.id == submission_id).first()
+    db: AsyncSession = Depends(get_async_read_db)
+) -> FastJSONResponse:
+    # In shard mode the id tells which plant's database holds the submission
+    async with async_submission_session(db, shard_router.plant_for_id(submission_id)) as source_db:
+        # Archived rows keep their ids, so a miss may still be in the archive
+        submission = (
+            await source_db.get(Submission, submission_id)
+            or await source_db.get(ArchivedSubmission, submission_id)
+        )
     if not submission:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -139,13 +788,14 @@ async def read_submission(
         )
     
     # Check if regular admin has access to this submission
-    if current_user.role == RoleType.REGULAR_ADMIN and submission.plant != current_user.plant:
+    if current_user.role == RoleType.REGULAR_ADMIN and submission.plant_id != current_user.plant_id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not authorized to access this submission"
         )
     
-    return {
+    # Archived rows have the same fields, so both validate as a Submission
+    return typed_response(SubmissionDetailResponse, {
         "status": "success",
         "submission": submission
-    }
\ No newline at end of file
+    })
\ No newline at end of file
@@ -0,0 +1,124 @@
+from datetime import datetime
+from loguru import logger
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+from .config import settings
+from .database import SessionLocal
+from .reports import REPORT_FORMATS, plant_watermarks, report_cache, report_generator
+
+
+class ReportScheduler:
+    """
+    Background thread that pre-renders the standard reports into the report cache.
+
+    Every plant (and the all-plants report used by super admins) is rendered
+    once a night, and in between as soon as it has no cached report or has
+    received enough new submissions since its cached report was rendered.
+
+    Only one process of a deployment runs the scheduler: start() takes an
+    exclusive lock on REPORT_PREGEN_LOCK_FILE, and the other workers started
+    from the same directory leave pre-generation to the process holding it.
+    The report cache is shared on disk, so they serve what it renders.
+    """
+
+    def __init__(self, session_factory=SessionLocal, hour: int = None,
+                 threshold: int = None, interval: int = None, lock_file: str = None):
+        self.session_factory = session_factory
+        self.hour = settings.REPORT_PREGEN_HOUR if hour is None else hour
+        self.threshold = settings.REPORT_PREGEN_SUBMISSIONS if threshold is None else threshold
+        self.interval = settings.REPORT_PREGEN_INTERVAL_SECONDS if interval is None else interval
+        self.lock_file = settings.REPORT_PREGEN_LOCK_FILE if lock_file is None else lock_file
+        self._last_nightly_run = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock_fd = None
+
+    def start(self) -> bool:
+        """Start the scheduler thread unless another process runs it; returns whether it runs here"""
+        if self._thread and self._thread.is_alive():
+            return True
+        if not self._acquire_lock():
+            logger.info("Report scheduler already runs in another process")
+            return False
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="report-scheduler", daemon=True)
+        self._thread.start()
+        logger.info("Report scheduler started")
+        return True
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.interval)
+            self._thread = None
+        self._release_lock()
+
+    def _acquire_lock(self) -> bool:
+        fd = os.open(self.lock_file, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        except OSError:
+            os.close(fd)
+            return False
+        self._lock_fd = fd
+        return True
+
+    def _release_lock(self):
+        if self._lock_fd is None:
+            return
+        # Closing the file releases the lock on every platform
+        os.close(self._lock_fd)
+        self._lock_fd = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            now = datetime.now()
+            nightly = now.hour == self.hour and self._last_nightly_run != now.date()
+            try:
+                rendered = self.warm(force=nightly)
+            except Exception as e:
+                logger.error(f"Report pre-generation failed: {str(e)}")
+                continue
+            if nightly:
+                self._last_nightly_run = now.date()
+            if rendered:
+                logger.info(f"Pre-generated {rendered} report(s)")
+
+    def _is_due(self, report_format: int, plant_id: int, watermark, force: bool) -> bool:
+        cached = report_cache.watermark(report_format, plant_id)
+        if cached == watermark:
+            return False
+        if force:
+            return True
+        # Outside the nightly run, render reports never cached and re-render
+        # those that fell far enough behind
+        return cached is None or watermark[0] - cached[0] >= self.threshold
+
+    def warm(self, force: bool = False) -> int:
+        """
+        Render every due report into the cache and return how many were rendered
+        """
+        rendered = 0
+        db = self.session_factory()
+        try:
+            for plant_id, watermark in plant_watermarks(db).items():
+                for report_format in REPORT_FORMATS:
+                    if self._is_due(report_format, plant_id, watermark, force):
+                        report_generator.generate_cached(db, report_format, plant_id, watermark=watermark)
+                        rendered += 1
+        finally:
+            db.close()
+        return rendered
+
+
+report_scheduler = ReportScheduler()
\ No newline at end of file
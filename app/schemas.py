@@ -1,6 +1,6 @@
 from pydantic import BaseModel, EmailStr, Field, field_validator
 from typing import Optional, List, Dict, Any
-from datetime import datetime
+from datetime import date, datetime
 import re
 from .models import RoleType
 
@@ -44,6 +44,30 @@ class User(UserInDB):
     pass
 
 
+class UserRecord(BaseModel):
+    """
+    A user as stored, for responses. Users without a plant or with emails
+    that predate validation don't pass UserBase, so responses read stored
+    users through these plain fields instead.
+    """
+    id: int
+    username: Optional[str] = None
+    email: Optional[str] = None
+    full_name: Optional[str] = None
+    te_id: Optional[str] = None
+    plant: Optional[str] = None
+    plant_id: Optional[int] = None
+    role: Optional[str] = None
+    is_active: Optional[bool] = None
+    must_reset_password: Optional[bool] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    model_config = {
+        "from_attributes": True
+    }
+
+
 class UserInfo(BaseModel):
     id: int
     username: str
@@ -96,7 +120,7 @@ class ResponseBase(BaseModel):
 
 
 class UserResponse(ResponseBase):
-    user: User
+    user: UserRecord
 
 
 class TokenResponse(ResponseBase):
@@ -138,7 +162,7 @@ class SubmissionInDB(SubmissionBase):
     grey_card_file_path: str
     created_at: datetime
     updated_at: Optional[datetime] = None
-    admin_id: int
+    admin_id: Optional[int] = None  # Cleared when the admin's account is deleted
     
     model_config = {
         "from_attributes": True
@@ -154,5 +178,145 @@ class SubmissionResponse(ResponseBase):
     submissions: Optional[List[Submission]] = None
 
 
+class SubmissionRecord(BaseModel):
+    """
+    A submission as stored. Every column is nullable and rows written before
+    the input validators (or by imports) may not pass them, so responses read
+    stored rows through these plain fields rather than SubmissionBase.
+    """
+    id: int
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    cin: Optional[str] = None
+    te_id: Optional[str] = None
+    date_of_birth: Optional[datetime] = None
+    grey_card_number: Optional[str] = None
+    plant: Optional[str] = None
+    plant_id: Optional[int] = None
+    admin_id: Optional[int] = None
+    created_at: Optional[datetime] = None
+
+    model_config = {
+        "from_attributes": True
+    }
+
+
+class SubmissionListItem(SubmissionRecord):
+    """The list-view fields of a submission (see app/summaries.py)"""
+    pass
+
+
+class SubmissionDetail(SubmissionRecord):
+    cin_file_path: Optional[str] = None
+    picture_file_path: Optional[str] = None
+    grey_card_file_path: Optional[str] = None
+    updated_at: Optional[datetime] = None
+
+
+class PageResponse(ResponseBase):
+    total: int
+    total_mode: str
+    skip: int
+    limit: int
+    next_cursor: Optional[str] = None
+
+
+class SubmissionListResponse(PageResponse):
+    submissions: List[SubmissionListItem]
+
+
+class SubmissionDetailResponse(ResponseBase):
+    submission: SubmissionDetail
+
+
+class SubmissionCreatedResponse(ResponseBase):
+    submission: SubmissionListItem
+
+
+class SubmissionUpdatedResponse(SubmissionCreatedResponse):
+    replaced_files: List[str]
+
+
+class BatchItemResult(BaseModel):
+    index: int
+    status: str
+    submission: Optional[SubmissionListItem] = None
+    errors: Optional[List[str]] = None
+
+
+class SubmissionBatchResponse(ResponseBase):
+    results: List[BatchItemResult]
+
+
+class ImportRowError(BaseModel):
+    row: int
+    errors: List[str]
+
+
+class SubmissionImportResponse(ResponseBase):
+    rows: int
+    valid: int
+    imported: int
+    failed: int
+    dry_run: bool
+    submission_ids: List[int]
+    errors: List[ImportRowError]
+
+
+class DailyCount(BaseModel):
+    plant: Optional[str] = None
+    plant_id: Optional[int] = None
+    day: date
+    admin_id: Optional[int] = None
+    count: int
+
+    model_config = {
+        "from_attributes": True
+    }
+
+
+class SubmissionStatsResponse(ResponseBase):
+    total: int
+    stats: List[DailyCount]
+
+
+class SearchResult(SubmissionListItem):
+    rank: float
+
+
+class SubmissionSearchResponse(ResponseBase):
+    query: str
+    total: int
+    submissions: List[SearchResult]
+
+
+class UserListResponse(PageResponse):
+    users: List[UserRecord]
+
+
+class UserInfoResponse(ResponseBase):
+    user: UserInfo
+
+
+class DuplicateCluster(BaseModel):
+    value: str
+    count: int
+    submission_ids: List[int]
+
+
+class DuplicatesResponse(ResponseBase):
+    field: str
+    clusters: List[DuplicateCluster]
+
+
+class DBMetrics(BaseModel):
+    requests: int
+    queries: int
+    db_time_ms: float
+    slow_queries: int
+    avg_queries_per_request: float
+    max_queries_per_request: int
+
+
 class ReportFormat(BaseModel):
     format: int = Field(..., ge=1, le=2)
\ No newline at end of file
@@ -0,0 +1,202 @@
+"""
+Full-text search over submissions.
+
+On SQLite the searchable columns are indexed by the `submissions_fts` FTS5
+table, an external-content index over `submissions` that triggers keep in
+sync on insert, update and delete (so archiving a row also unindexes it). The
+unicode61 tokenizer folds case and accents, and the prefix indexes make
+`term*` lookups cheap, so every word of a query matches as a prefix.
+
+On Postgres a trigram GIN index over the unaccented, lower-cased columns
+serves the same lookups: each word matches at the start of a word of the
+document, through a regex the index can answer, ranked by word similarity.
+
+Rebuild the SQLite index from the submissions table with:
+
+    python -m app.search rebuild
+"""
+from loguru import logger
+from typing import List, Optional, Tuple
+import re
+import sys
+
+from sqlalchemy import DDL, column, event, func, literal_column, or_, select, table, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import Submission
+
+
+SEARCH_COLUMNS = ["first_name", "last_name", "cin", "te_id", "grey_card_number"]
+
+FTS_TABLE = "submissions_fts"
+
+_fts = table(FTS_TABLE, column("rowid"), column("rank"))
+
+_SQLITE_DDL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    f"{', '.join(SEARCH_COLUMNS)}, content='submissions', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    f"CREATE TRIGGER IF NOT EXISTS submissions_fts_insert AFTER INSERT ON submissions BEGIN "
+    f"INSERT INTO {FTS_TABLE} (rowid, {', '.join(SEARCH_COLUMNS)}) "
+    f"VALUES (new.id, {', '.join('new.' + name for name in SEARCH_COLUMNS)}); END",
+    f"CREATE TRIGGER IF NOT EXISTS submissions_fts_delete AFTER DELETE ON submissions BEGIN "
+    f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, {', '.join(SEARCH_COLUMNS)}) "
+    f"VALUES ('delete', old.id, {', '.join('old.' + name for name in SEARCH_COLUMNS)}); END",
+    f"CREATE TRIGGER IF NOT EXISTS submissions_fts_update AFTER UPDATE ON submissions BEGIN "
+    f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, {', '.join(SEARCH_COLUMNS)}) "
+    f"VALUES ('delete', old.id, {', '.join('old.' + name for name in SEARCH_COLUMNS)}); "
+    f"INSERT INTO {FTS_TABLE} (rowid, {', '.join(SEARCH_COLUMNS)}) "
+    f"VALUES (new.id, {', '.join('new.' + name for name in SEARCH_COLUMNS)}); END",
+]
+
+# unaccent() is only STABLE, so it is wrapped to be usable in an index expression
+_POSTGRES_DOCUMENT = (
+    "submission_search_text(first_name, last_name, cin, te_id, grey_card_number)"
+)
+
+_POSTGRES_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    "CREATE OR REPLACE FUNCTION submission_search_text(text, text, text, text, text) RETURNS text AS "
+    "$$ SELECT lower(public.unaccent('public.unaccent', concat_ws(' ', $1, $2, $3, $4, $5))) $$ "
+    "LANGUAGE sql IMMUTABLE PARALLEL SAFE",
+    f"CREATE INDEX IF NOT EXISTS ix_submissions_search ON submissions USING gin ({_POSTGRES_DOCUMENT} gin_trgm_ops)",
+]
+
+
+def ensure_search_index(connection) -> bool:
+    """
+    Create the search index and its sync triggers if they are missing,
+    filling it from the existing submissions. Returns True if it was created.
+    """
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        exists = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": FTS_TABLE}
+        ).scalar()
+        for statement in _SQLITE_DDL:
+            connection.execute(text(statement))
+        if not exists:
+            connection.execute(text(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('rebuild')"))
+        return not exists
+
+    if dialect == "postgresql":
+        try:
+            with connection.begin_nested():
+                for statement in _POSTGRES_DDL:
+                    connection.execute(text(statement))
+        except Exception as e:
+            logger.warning(f"Could not create the submissions search index: {str(e)}")
+            return False
+        return True
+
+    return False
+
+
+def _create_search_index(target, connection, **kw):
+    ensure_search_index(connection)
+
+
+event.listen(Submission.__table__, "after_create", _create_search_index)
+event.listen(
+    Submission.__table__,
+    "before_drop",
+    DDL(f"DROP TABLE IF EXISTS {FTS_TABLE}").execute_if(dialect="sqlite"),
+)
+
+
+def search_terms(query: str) -> List[str]:
+    """Split a search string into the words that must all match"""
+    return re.findall(r"\w+", query)
+
+
+def _fts_query(terms: List[str]) -> str:
+    # Quoting keeps FTS5 operators in user input from being interpreted
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def _search_text(value: str):
+    # Folded by the same function as the indexed document, so both sides match
+    return func.submission_search_text(value, None, None, None, None)
+
+
+def search_statement(dialect: str, query: str, plant_id: Optional[int] = None, limit: int = 20):
+    """
+    Build a statement returning (Submission, rank) rows for a search string,
+    best match first (a lower rank is a better match on every backend).
+    """
+    terms = search_terms(query)
+
+    if dialect == "sqlite":
+        rank = _fts.c.rank
+        statement = (
+            select(Submission, rank)
+            .join(_fts, _fts.c.rowid == Submission.id)
+            .where(literal_column(FTS_TABLE).op("MATCH")(_fts_query(terms)))
+        )
+    elif dialect == "postgresql":
+        document = literal_column(_POSTGRES_DOCUMENT)
+        rank = -func.word_similarity(_search_text(query), document)
+        statement = select(Submission, rank.label("rank"))
+        for term in terms:
+            # \m anchors each term at the start of a word, as the FTS5 prefix queries do
+            pattern = literal_column(r"'\m'").concat(_search_text(term)).self_group()
+            statement = statement.where(document.op("~")(pattern))
+    else:
+        rank = literal_column("0")
+        statement = select(Submission, rank.label("rank"))
+        for term in terms:
+            statement = statement.where(or_(*[
+                getattr(Submission, name).ilike(f"{term}%") for name in SEARCH_COLUMNS
+            ]))
+
+    if plant_id is not None:
+        statement = statement.where(Submission.plant_id == plant_id)
+    return statement.order_by(rank, Submission.id).limit(limit)
+
+
+async def search_submissions(
+    db: AsyncSession,
+    query: str,
+    plant_id: Optional[int] = None,
+    limit: int = 20,
+) -> List[Tuple[Submission, float]]:
+    """Return up to `limit` (submission, rank) pairs matching every word of the query"""
+    if not search_terms(query):
+        return []
+    statement = search_statement(db.get_bind().dialect.name, query, plant_id, limit)
+    result = await db.execute(statement)
+    return [(submission, rank) for submission, rank in result.all()]
+
+
+async def count_matches(db: AsyncSession, query: str, plant_id: Optional[int] = None) -> int:
+    """Count every submission matching the query, not just the returned page"""
+    if not search_terms(query):
+        return 0
+    statement = search_statement(db.get_bind().dialect.name, query, plant_id).order_by(None).limit(None)
+    return (await db.execute(select(func.count()).select_from(statement.subquery()))).scalar()
+
+
+def rebuild_search_index(connection) -> None:
+    """Re-index every submission from scratch"""
+    if connection.dialect.name == "sqlite":
+        ensure_search_index(connection)
+        connection.execute(text(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('rebuild')"))
+    elif connection.dialect.name == "postgresql":
+        connection.execute(text("REINDEX INDEX ix_submissions_search"))
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["rebuild"]:
+        print("Usage: python -m app.search rebuild")
+        sys.exit(1)
+
+    from .database import engine
+    from .shards import shard_router
+
+    with engine.begin() as connection:
+        rebuild_search_index(connection)
+    for plant_id in shard_router.plant_ids():
+        with shard_router.engine(plant_id).begin() as connection:
+            rebuild_search_index(connection)
+    print("Search index rebuilt")
\ No newline at end of file
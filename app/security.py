@@ -1,12 +1,16 @@
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
+from loguru import logger
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from .config import settings
-from .database import get_db
+from .database import get_async_db
 from .models import User, RoleType
 from .schemas import TokenData
 
@@ -24,28 +28,46 @@ def get_password_hash(password):
     return pwd_context.hash(password)
 
 
+def _verify_login(user: Optional[User], password: str):
+    """
+    Check a looked-up user and their password, returning the user or False.
+    Only user ids are logged, never the username that was tried.
+    """
+    if not user:
+        logger.info("Login refused: unknown username")
+        return False
+
+    if not user.is_active:
+        logger.info(f"Login refused: user {user.id} is inactive")
+        return False
+
+    if not verify_password(password, user.hashed_password):
+        logger.info(f"Login refused: wrong password for user {user.id}")
+        return False
+
+    logger.info(f"User {user.id} authenticated")
+    return user
+
+
 def authenticate_user(db: Session, username: str, password: str):
     """Authenticate a user by username and password"""
     try:
-        print(f"Security - Looking up user: {username}")
-        user = db.query(User).filter(User.username == username).first()
-        
-        if not user:
-            print(f"Security - User not found: {username}")
-            return False
-        
-        if not user.is_active:
-            print(f"Security - User is inactive: {username}")
-            return False
-            
-        if not verify_password(password, user.hashed_password):
-            print(f"Security - Invalid password for user: {username}")
-            return False
-            
-        print(f"Security - User authenticated successfully: {username}")
-        return user
+        return _verify_login(db.query(User).filter(User.username == username).first(), password)
+    except Exception as e:
+        logger.error(f"Error during authentication: {str(e)}")
+        return False
+
+
+async def authenticate_user_async(db: AsyncSession, username: str, password: str):
+    """
+    Authenticate a user by username and password on an async session.
+    Password hashing runs in the threadpool so it does not block the event loop.
+    """
+    try:
+        result = await db.execute(select(User).where(User.username == username))
+        return await run_in_threadpool(_verify_login, result.scalars().first(), password)
     except Exception as e:
-        print(f"Security - Error during authentication: {str(e)}")
+        logger.error(f"Error during authentication: {str(e)}")
         return False
 
 
@@ -65,7 +87,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
         raise
 
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
     """Get the current authenticated user from JWT token"""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -86,7 +108,8 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
         raise credentials_exception
     
     try:
-        user = db.query(User).filter(User.username == token_data.username).first()
+        result = await db.execute(select(User).where(User.username == token_data.username))
+        user = result.scalars().first()
         if user is None:
             print(f"Security - User from token not found: {token_data.username}")
             raise credentials_exception
@@ -0,0 +1,341 @@
+"""
+Per-plant SQLite shards.
+
+With SHARD_BY_PLANT enabled, each plant's submissions (with their archive
+and daily rollup) live in their own SQLite file under SHARD_DIR, so writes at
+different plants never wait on the same database lock. Users, plants and
+everything else stay in the main database. Queries scoped to one plant go
+to its shard; cross-plant queries fan out over every shard, plus the main
+database for submissions not split out yet, and merge.
+
+Submission ids are allocated from a per-shard range starting at
+plant_id * SHARD_ID_SPAN, so they stay unique across shards and the shard
+holding a submission can be told from its id alone.
+
+Move the submissions of an existing database, archived ones included, into
+shards with the command below, which can be re-run if it is interrupted:
+
+    python -m app.shards split
+"""
+from contextlib import asynccontextmanager, contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional
+import re
+import sys
+import threading
+
+from sqlalchemy import Column, Integer, MetaData, String, Table, create_engine, delete, event, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .counts import CountMode, count_cache, count_total, least_exact_mode
+from .database import Base, get_async_database_url, get_engine_options, set_sqlite_pragmas
+from .duplicates import ensure_identity_keys
+from .models import ArchivedSubmission, Submission, SubmissionDailyCount, SubmissionIdentityKey, SubmissionSummary
+from .search import ensure_search_index
+from .summaries import ensure_submission_summary
+from .stats import rebuild_daily_counts
+
+
+SHARD_ID_SPAN = 10 ** 9
+
+# Journal of the rows split() copied into a shard, by the id they had in the
+# main database, so an interrupted split never copies a row twice
+SHARD_MOVES_TABLE = "shard_moves"
+
+# Tables that live in every shard rather than in the main database
+SHARD_TABLES = [
+    Submission.__tablename__,
+    ArchivedSubmission.__tablename__,
+    SubmissionDailyCount.__tablename__,
+    SubmissionSummary.__tablename__,
+    SubmissionIdentityKey.__tablename__,
+    SHARD_MOVES_TABLE,
+]
+
+
+def _shard_metadata() -> MetaData:
+    metadata = MetaData()
+    for table in Base.metadata.sorted_tables:
+        table.to_metadata(metadata)
+    Table(
+        SHARD_MOVES_TABLE, metadata,
+        Column("source_table", String, primary_key=True),
+        Column("source_id", Integer, primary_key=True),
+        Column("id", Integer, nullable=False),
+    )
+    return metadata
+
+
+class ShardRouter:
+    """Creates and hands out sessions for the per-plant shard databases"""
+
+    def __init__(self):
+        self._metadata = _shard_metadata()
+        self._engines = {}
+        self._async_engines = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return settings.SHARD_BY_PLANT
+
+    def path(self, plant_id: int) -> Path:
+        return Path(settings.SHARD_DIR) / f"plant_{plant_id}.db"
+
+    def exists(self, plant_id: int) -> bool:
+        return plant_id in self._engines or self.path(plant_id).exists()
+
+    def plant_ids(self) -> List[int]:
+        """Return the ids of every plant that has a shard"""
+        plant_ids = set(self._engines)
+        for path in Path(settings.SHARD_DIR).glob("plant_*.db"):
+            match = re.fullmatch(r"plant_(\d+)\.db", path.name)
+            if match:
+                plant_ids.add(int(match.group(1)))
+        return sorted(plant_ids)
+
+    @staticmethod
+    def plant_for_id(submission_id: int) -> int:
+        """Return the id of the plant whose shard allocated a submission id"""
+        return submission_id // SHARD_ID_SPAN
+
+    def engine(self, plant_id: int):
+        """Return the sync engine of a plant's shard, creating the shard on first use"""
+        with self._lock:
+            if plant_id not in self._engines:
+                path = self.path(plant_id)
+                path.parent.mkdir(parents=True, exist_ok=True)
+                database_url = f"sqlite:///{path}"
+
+                engine = create_engine(database_url, **get_engine_options(database_url))
+                event.listen(engine, "connect", set_sqlite_pragmas)
+                self._create_schema(engine, plant_id)
+                self._engines[plant_id] = engine
+            return self._engines[plant_id]
+
+    def async_engine(self, plant_id: int):
+        """Return the async engine of a plant's shard, creating the shard on first use"""
+        self.engine(plant_id)
+        with self._lock:
+            if plant_id not in self._async_engines:
+                database_url = get_async_database_url(f"sqlite:///{self.path(plant_id)}")
+                engine = create_async_engine(database_url, **get_engine_options(database_url, is_async=True))
+                event.listen(engine.sync_engine, "connect", set_sqlite_pragmas)
+                self._async_engines[plant_id] = engine
+            return self._async_engines[plant_id]
+
+    def _create_schema(self, engine, plant_id: int):
+        tables = [self._metadata.tables[name] for name in SHARD_TABLES]
+        self._metadata.create_all(engine, tables=tables)
+        with engine.begin() as connection:
+            ensure_search_index(connection)
+            ensure_submission_summary(connection)
+            ensure_identity_keys(connection)
+            seeded = connection.execute(
+                text("SELECT 1 FROM sqlite_sequence WHERE name = :name"), {"name": Submission.__tablename__}
+            ).scalar()
+            if not seeded:
+                connection.execute(
+                    text("INSERT INTO sqlite_sequence (name, seq) VALUES (:name, :seq)"),
+                    {"name": Submission.__tablename__, "seq": plant_id * SHARD_ID_SPAN},
+                )
+
+    def session(self, plant_id: int) -> Session:
+        return Session(self.engine(plant_id), autoflush=False)
+
+    def async_session(self, plant_id: int) -> AsyncSession:
+        return AsyncSession(self.async_engine(plant_id), autoflush=False, expire_on_commit=False)
+
+    async def dispose(self):
+        with self._lock:
+            engines, async_engines = self._engines, self._async_engines
+            self._engines, self._async_engines = {}, {}
+        for engine in async_engines.values():
+            await engine.dispose()
+        for engine in engines.values():
+            engine.dispose()
+
+
+shard_router = ShardRouter()
+
+
+def _shard_ids(plant_id: Optional[int], create: bool) -> Optional[List[int]]:
+    """
+    Return the shards holding a plant's submissions (every shard when plant_id
+    is None), or None when they are in the main database
+    """
+    if not shard_router.enabled:
+        return None
+    if plant_id is None:
+        return shard_router.plant_ids()
+    if create or shard_router.exists(plant_id):
+        return [plant_id]
+    return None
+
+
+@contextmanager
+def submission_sessions(db: Session, plant_id: Optional[int] = None):
+    """
+    Yield {plant_id: session} for the sync sessions holding one plant's
+    submissions, or every plant's when plant_id is None. Outside shard mode
+    that is just `db`. Every plant's includes `db` under the None key, since
+    the main database keeps the submissions that were never split.
+    """
+    shard_ids = _shard_ids(plant_id, create=False)
+    if shard_ids is None:
+        yield {plant_id: db}
+        return
+
+    sessions = {shard_id: shard_router.session(shard_id) for shard_id in shard_ids}
+    try:
+        yield {None: db, **sessions} if plant_id is None else sessions
+    finally:
+        for session in sessions.values():
+            session.close()
+
+
+@contextmanager
+def submission_session(db: Session, plant_id: Optional[int], create: bool = False):
+    """
+    Yield the sync session holding a single plant's submissions. With
+    create=True the plant's shard is created if it doesn't exist yet, for writes.
+    """
+    shard_ids = _shard_ids(plant_id, create=create) if plant_id is not None else None
+    if shard_ids is None:
+        yield db
+        return
+
+    with shard_router.session(shard_ids[0]) as session:
+        yield session
+
+
+@asynccontextmanager
+async def async_submission_sessions(db: AsyncSession, plant_id: Optional[int] = None):
+    """Async counterpart of submission_sessions()"""
+    shard_ids = _shard_ids(plant_id, create=False)
+    if shard_ids is None:
+        yield {plant_id: db}
+        return
+
+    sessions = {shard_id: shard_router.async_session(shard_id) for shard_id in shard_ids}
+    try:
+        yield {None: db, **sessions} if plant_id is None else sessions
+    finally:
+        for session in sessions.values():
+            await session.close()
+
+
+@asynccontextmanager
+async def async_submission_session(db: AsyncSession, plant_id: Optional[int], create: bool = False):
+    """
+    Yield the session holding a single plant's submissions. With create=True
+    the plant's shard is created if it doesn't exist yet, for writes.
+    """
+    shard_ids = _shard_ids(plant_id, create=create) if plant_id is not None else None
+    if shard_ids is None:
+        yield db
+        return
+
+    async with shard_router.async_session(shard_ids[0]) as session:
+        yield session
+
+
+async def count_across(sessions: Dict[Optional[int], AsyncSession], query, table: str, mode: CountMode):
+    """
+    Count a query over every session with count_total() and return the sum
+    along with the least exact mode that went into it
+    """
+    totals = [
+        await count_total(session, query, table, plant_id, mode)
+        for plant_id, session in sessions.items()
+    ]
+    return sum(total for total, _ in totals), least_exact_mode(total_mode for _, total_mode in totals)
+
+
+def _allocate_ids(shard_db: Session, count: int) -> int:
+    """Reserve `count` ids from a shard's submission range and return the first"""
+    last_id = shard_db.execute(
+        text("SELECT seq FROM sqlite_sequence WHERE name = :name"), {"name": Submission.__tablename__}
+    ).scalar()
+    shard_db.execute(
+        text("UPDATE sqlite_sequence SET seq = :seq WHERE name = :name"),
+        {"name": Submission.__tablename__, "seq": last_id + count},
+    )
+    return last_id + 1
+
+
+def _move_rows(db: Session, shard_db: Session, table, plant_id: int, batch_size: int) -> int:
+    """Move one table's rows for a plant from the main database into its shard"""
+    moves = shard_router._metadata.tables[SHARD_MOVES_TABLE]
+
+    moved = 0
+    while True:
+        batch = db.execute(
+            select(table).where(table.c.plant_id == plant_id).order_by(table.c.id).limit(batch_size)
+        ).mappings().all()
+        if not batch:
+            break
+
+        # Rows copied by a run that stopped before deleting them are only deleted now
+        source_ids = [row["id"] for row in batch]
+        copied = set(shard_db.execute(
+            select(moves.c.source_id)
+            .where(moves.c.source_table == table.name, moves.c.source_id.in_(source_ids))
+        ).scalars())
+        pending = [row for row in batch if row["id"] not in copied]
+        if pending:
+            first_id = _allocate_ids(shard_db, len(pending))
+            new_ids = range(first_id, first_id + len(pending))
+            shard_db.execute(insert(table), [{**row, "id": new_id} for row, new_id in zip(pending, new_ids)])
+            shard_db.execute(insert(moves), [
+                {"source_table": table.name, "source_id": row["id"], "id": new_id}
+                for row, new_id in zip(pending, new_ids)
+            ])
+        shard_db.commit()
+
+        db.execute(delete(table).where(table.c.id.in_(source_ids)))
+        db.commit()
+        moved += len(pending)
+    return moved
+
+
+def split(db: Session, batch_size: int = 1000) -> Dict[int, int]:
+    """
+    Move submissions, archived ones included, from the main database into
+    per-plant shards and return {plant_id: rows moved}. Moved rows get new ids
+    from their shard's range. The copy is journaled in the shard and committed
+    before the originals are deleted, so re-running an interrupted split picks
+    up where it stopped without copying anything twice.
+    """
+    tables = [Submission.__table__, ArchivedSubmission.__table__]
+    plant_ids = set()
+    for table in tables:
+        plant_ids.update(db.execute(
+            select(table.c.plant_id).where(table.c.plant_id.isnot(None)).distinct()
+        ).scalars())
+
+    moved = {}
+    for plant_id in sorted(plant_ids):
+        with shard_router.session(plant_id) as shard_db:
+            moved[plant_id] = sum(_move_rows(db, shard_db, table, plant_id, batch_size) for table in tables)
+            rebuild_daily_counts(shard_db)
+
+    rebuild_daily_counts(db)
+    count_cache.clear()
+    return moved
+
+if __name__ == "__main__":
+    from .database import SessionLocal
+
+    if sys.argv[1:] != ["split"]:
+        print("Usage: python -m app.shards split")
+        sys.exit(1)
+
+    db = SessionLocal()
+    try:
+        for plant_id, rows in split(db).items():
+            print(f"Plant {plant_id}: moved {rows} submissions to {shard_router.path(plant_id)}")
+    finally:
+        db.close()
\ No newline at end of file
@@ -0,0 +1,131 @@
+"""
+Pre-aggregated submission statistics.
+
+`submission_daily_counts` holds one row per (plant id, day, admin) with the
+number of submissions created, archived ones included. It is incremented in
+the same transaction as every insert, so dashboards read a handful of rollup
+rows instead of scanning submissions. Archiving a submission leaves its count
+in place, and a shard split rebuilds the rollup on both sides of the move.
+Rebuild it from scratch with:
+
+    python -m app.stats rebuild
+"""
+from collections import Counter
+from datetime import date
+from typing import Optional
+import sys
+
+from sqlalchemy import delete, func, insert, select, union_all, update
+from sqlalchemy.orm import Session
+
+from .models import ArchivedSubmission, Submission, SubmissionDailyCount
+
+
+def _upsert_statement(dialect: str):
+    """Return the dialect's INSERT construct if it supports ON CONFLICT, else None"""
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        return dialect_insert
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        return dialect_insert
+    return None
+
+
+def record_submissions(db: Session, submissions) -> None:
+    """
+    Increment the daily counts for newly inserted submissions.
+
+    Must be called after the submissions are flushed and before the caller
+    commits, so the rollup is updated in the same transaction.
+    """
+    counts = Counter(
+        (submission.plant_id or 0, submission.created_at.date(), submission.admin_id or 0)
+        for submission in submissions
+    )
+    if not counts:
+        return
+
+    table = SubmissionDailyCount.__table__
+    dialect_insert = _upsert_statement(db.get_bind().dialect.name)
+
+    for (plant_id, day, admin_id), count in counts.items():
+        if dialect_insert is not None:
+            statement = dialect_insert(table).values(plant_id=plant_id, day=day, admin_id=admin_id, count=count)
+            db.execute(statement.on_conflict_do_update(
+                index_elements=[table.c.plant_id, table.c.day, table.c.admin_id],
+                set_={"count": table.c.count + statement.excluded.count},
+            ))
+            continue
+
+        result = db.execute(
+            update(table)
+            .where(table.c.plant_id == plant_id, table.c.day == day, table.c.admin_id == admin_id)
+            .values(count=table.c.count + count)
+        )
+        if result.rowcount == 0:
+            db.execute(insert(table).values(plant_id=plant_id, day=day, admin_id=admin_id, count=count))
+
+
+def rebuild_daily_counts(db: Session) -> int:
+    """
+    Recompute the rollup table from the submissions and archive tables and
+    return the number of rollup rows
+    """
+    table = SubmissionDailyCount.__table__
+    stored = union_all(*[
+        select(model.plant_id, model.created_at, model.admin_id).where(model.created_at.isnot(None))
+        for model in (Submission, ArchivedSubmission)
+    ]).subquery()
+    day = func.date(stored.c.created_at)
+    plant_id = func.coalesce(stored.c.plant_id, 0)
+    admin_id = func.coalesce(stored.c.admin_id, 0)
+
+    db.execute(delete(table))
+    db.execute(insert(table).from_select(
+        ["plant_id", "day", "admin_id", "count"],
+        select(plant_id, day, admin_id, func.count())
+        .select_from(stored)
+        .group_by(plant_id, day, admin_id),
+    ))
+    db.commit()
+
+    return db.query(func.count()).select_from(table).scalar()
+
+
+def query_daily_counts(
+    db: Session,
+    plant_id: Optional[int] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    admin_id: Optional[int] = None,
+):
+    """Return rollup rows matching the filters, ordered by day"""
+    query = db.query(SubmissionDailyCount)
+    if plant_id is not None:
+        query = query.filter(SubmissionDailyCount.plant_id == plant_id)
+    if start:
+        query = query.filter(SubmissionDailyCount.day >= start)
+    if end:
+        query = query.filter(SubmissionDailyCount.day <= end)
+    if admin_id is not None:
+        query = query.filter(SubmissionDailyCount.admin_id == admin_id)
+
+    return query.order_by(
+        SubmissionDailyCount.day, SubmissionDailyCount.plant_id, SubmissionDailyCount.admin_id
+    ).all()
+
+
+if __name__ == "__main__":
+    from .database import SessionLocal
+
+    if sys.argv[1:] != ["rebuild"]:
+        print("Usage: python -m app.stats rebuild")
+        sys.exit(1)
+
+    db = SessionLocal()
+    try:
+        rows = rebuild_daily_counts(db)
+        print(f"Rebuilt submission_daily_counts: {rows} rows")
+    finally:
+        db.close()
\ No newline at end of file
@@ -1,5 +1,6 @@
 import os
 import re
+import shutil
 import aiofiles
 from fastapi import UploadFile, HTTPException
 from pathlib import Path
@@ -22,6 +23,17 @@ class FileValidator:
     def validate_grey_card_filename(filename: str) -> bool:
         return bool(re.match(r'^[0-9]+-[A-Za-z]-[0-9]+\.(jpg|jpeg|png)$', filename))
 
+    @staticmethod
+    def filename_error(filename: str, file_type: str):
+        """Return why a filename is invalid for a file type, or None if it is valid"""
+        if file_type == "cin" and not FileValidator.validate_cin_filename(filename):
+            return "Invalid CIN filename format"
+        elif file_type == "pic" and not FileValidator.validate_picture_filename(filename):
+            return "Invalid picture filename format"
+        elif file_type == "grey_card" and not FileValidator.validate_grey_card_filename(filename):
+            return "Invalid grey card filename format"
+        return None
+
 
 class FileStorage:
     def __init__(self):
@@ -54,6 +66,18 @@ class FileStorage:
 
     async def save_file(self, file: UploadFile, plant_name: str, file_type: str) -> str:
         """Save a file to the appropriate location and return the path."""
+        content = await self.validated_content(file, file_type)
+        file_path = self._new_file_path(file.filename, plant_name, file_type)
+        
+        # Save the file
+        async with aiofiles.open(file_path, 'wb') as out_file:
+            await out_file.write(content)
+        
+        # Return the relative path from the base uploads directory
+        return str(file_path.relative_to(self.base_dir))
+
+    async def validated_content(self, file: UploadFile, file_type: str) -> bytes:
+        """Read an upload, raising a 400 if it breaks the size, type or naming rules."""
         # Check file size
         content = await file.read()
         file_size = len(content)
@@ -68,27 +92,44 @@ class FileStorage:
             raise HTTPException(status_code=400, detail="Invalid file type. Only JPEG and PNG are supported.")
         
         # File naming validation based on type
-        if file_type == "cin" and not FileValidator.validate_cin_filename(file.filename):
-            raise HTTPException(status_code=400, detail="Invalid CIN filename format")
-        elif file_type == "pic" and not FileValidator.validate_picture_filename(file.filename):
-            raise HTTPException(status_code=400, detail="Invalid picture filename format")
-        elif file_type == "grey_card" and not FileValidator.validate_grey_card_filename(file.filename):
-            raise HTTPException(status_code=400, detail="Invalid grey card filename format")
+        error = FileValidator.filename_error(file.filename, file_type)
+        if error:
+            raise HTTPException(status_code=400, detail=error)
         
+        return content
+
+    async def same_content(self, file: UploadFile, path: str) -> bool:
+        """Whether an upload holds exactly the bytes of an already saved file"""
+        stored = self.base_dir / path
+        content = await file.read()
+        await file.seek(0)
+        if not stored.is_file() or stored.stat().st_size != len(content):
+            return False
+        async with aiofiles.open(stored, 'rb') as stored_file:
+            return await stored_file.read() == content
+
+    def _new_file_path(self, filename: str, plant_name: str, file_type: str) -> Path:
         # Get storage path
         storage_path = self._get_storage_path(plant_name, file_type)
         
         # Generate a unique filename to avoid collisions
-        file_extension = os.path.splitext(file.filename)[1]
+        file_extension = os.path.splitext(filename)[1]
         unique_filename = f"{uuid.uuid4().hex}{file_extension}"
-        file_path = storage_path / unique_filename
-        
-        # Save the file
-        async with aiofiles.open(file_path, 'wb') as out_file:
-            await out_file.write(content)
-        
-        # Return the relative path from the base uploads directory
+        return storage_path / unique_filename
+
+    def save_stream(self, source, filename: str, plant_name: str, file_type: str) -> str:
+        """
+        Copy an already validated file from a binary file object in chunks,
+        without reading it into memory, and return its path.
+        """
+        file_path = self._new_file_path(filename, plant_name, file_type)
+        with open(file_path, 'wb') as out_file:
+            shutil.copyfileobj(source, out_file)
         return str(file_path.relative_to(self.base_dir))
 
+    def remove(self, path: str):
+        """Delete a saved file, e.g. when the submission it belongs to was not stored"""
+        (self.base_dir / path).unlink(missing_ok=True)
+
 
 file_storage = FileStorage()
\ No newline at end of file
@@ -0,0 +1,121 @@
+"""
+Denormalized read model for submission listings.
+
+`submission_summary` holds one row per submission with only the fields list
+pages show, leaving out the file paths, update times and duplicate keys.
+Triggers on `submissions` keep it in step with every write in the same
+statement, whether it comes from the API, an import, the archive job or a
+shard split, so no code path has to remember to update it. Listings select
+its columns with Core and return the rows as plain dicts, without loading
+Submission entities.
+
+Rebuild it from the submissions table with:
+
+    python -m app.summaries rebuild
+"""
+import sys
+
+from sqlalchemy import event, select, text
+
+from .database import Base
+
+
+SUMMARY_TABLE = "submission_summary"
+
+# Columns of the projection, in the order listings return them
+LIST_COLUMNS = [
+    "id", "first_name", "last_name", "cin", "te_id", "grey_card_number",
+    "date_of_birth", "plant", "plant_id", "admin_id", "created_at",
+]
+
+_columns = ", ".join(LIST_COLUMNS)
+_new_values = ", ".join("new." + name for name in LIST_COLUMNS)
+
+_SQLITE_DDL = [
+    f"CREATE TRIGGER IF NOT EXISTS submission_summary_insert AFTER INSERT ON submissions BEGIN "
+    f"INSERT OR REPLACE INTO {SUMMARY_TABLE} ({_columns}) VALUES ({_new_values}); END",
+    # Only changes to listed fields touch the projection, not file replacements
+    f"CREATE TRIGGER IF NOT EXISTS submission_summary_update AFTER UPDATE OF "
+    f"{', '.join(LIST_COLUMNS[1:])} ON submissions BEGIN "
+    f"INSERT OR REPLACE INTO {SUMMARY_TABLE} ({_columns}) VALUES ({_new_values}); END",
+    f"CREATE TRIGGER IF NOT EXISTS submission_summary_delete AFTER DELETE ON submissions BEGIN "
+    f"DELETE FROM {SUMMARY_TABLE} WHERE id = old.id; END",
+]
+
+_POSTGRES_FUNCTION = (
+    "CREATE OR REPLACE FUNCTION sync_submission_summary() RETURNS trigger AS $$ BEGIN "
+    f"IF TG_OP = 'DELETE' THEN DELETE FROM {SUMMARY_TABLE} WHERE id = OLD.id; RETURN OLD; END IF; "
+    f"INSERT INTO {SUMMARY_TABLE} ({_columns}) VALUES ({_new_values.replace('new.', 'NEW.')}) "
+    f"ON CONFLICT (id) DO UPDATE SET {', '.join(f'{name} = EXCLUDED.{name}' for name in LIST_COLUMNS[1:])}; "
+    "RETURN NEW; END $$ LANGUAGE plpgsql"
+)
+
+_POSTGRES_TRIGGER = (
+    "CREATE TRIGGER submission_summary_sync AFTER INSERT OR UPDATE OR DELETE ON submissions "
+    "FOR EACH ROW EXECUTE FUNCTION sync_submission_summary()"
+)
+
+
+def summary_select(table):
+    """Select the list-view columns of the summary table (or the archive, which has them too)"""
+    return select(*[table.c[name] for name in LIST_COLUMNS])
+
+
+def rebuild_submission_summary(connection) -> None:
+    """Refill the projection from the submissions table"""
+    connection.execute(text(f"DELETE FROM {SUMMARY_TABLE}"))
+    connection.execute(text(f"INSERT INTO {SUMMARY_TABLE} ({_columns}) SELECT {_columns} FROM submissions"))
+
+
+def ensure_submission_summary(connection) -> bool:
+    """
+    Create the triggers syncing the projection if they are missing, filling
+    it from the existing submissions. Returns True if they were created.
+    """
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        exists = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'submission_summary_insert'")
+        ).scalar()
+        for statement in _SQLITE_DDL:
+            connection.execute(text(statement))
+    elif dialect == "postgresql":
+        exists = connection.execute(
+            text("SELECT 1 FROM pg_trigger WHERE tgname = 'submission_summary_sync'")
+        ).scalar()
+        connection.execute(text(_POSTGRES_FUNCTION))
+        if not exists:
+            connection.execute(text(_POSTGRES_TRIGGER))
+    else:
+        return False
+
+    if not exists:
+        rebuild_submission_summary(connection)
+    return not exists
+
+
+def _create_summary_sync(target, connection, tables=None, **kw):
+    # Both tables must exist, so this runs once the whole schema is created
+    if tables is None or any(table.name in (SUMMARY_TABLE, "submissions") for table in tables):
+        ensure_submission_summary(connection)
+
+
+event.listen(Base.metadata, "after_create", _create_summary_sync)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["rebuild"]:
+        print("Usage: python -m app.summaries rebuild")
+        sys.exit(1)
+
+    from .database import engine
+    from .shards import shard_router
+
+    with engine.begin() as connection:
+        ensure_submission_summary(connection)
+        rebuild_submission_summary(connection)
+    for plant_id in shard_router.plant_ids():
+        with shard_router.engine(plant_id).begin() as connection:
+            ensure_submission_summary(connection)
+            rebuild_submission_summary(connection)
+    print("Submission summary rebuilt")
\ No newline at end of file
@@ -0,0 +1,124 @@
+"""
+Single-writer group-commit queue.
+
+On SQLite every commit takes the database write lock, so concurrent requests
+committing one row each end up queueing on the lock (or timing out). When
+GROUP_COMMIT_ENABLED is set, writes are instead handed to one writer task
+that runs everything queued within GROUP_COMMIT_INTERVAL_MS in a single
+transaction and resolves each caller's future with its write's return value
+(typically the new row id).
+
+Single submission creates and upserts on the main database go through it.
+Batches and imports already write many rows per transaction, and shard
+writes go to their own database files, so those commit directly.
+"""
+from loguru import logger
+from typing import Any, Awaitable, Callable
+import asyncio
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .config import settings
+from .database import AsyncSessionLocal
+
+
+Write = Callable[[AsyncSession], Awaitable[Any]]
+
+
+class GroupCommitWriter:
+    def __init__(self, session_factory=AsyncSessionLocal, interval_ms: int = None, max_batch: int = None):
+        self.session_factory = session_factory
+        self.interval_ms = settings.GROUP_COMMIT_INTERVAL_MS if interval_ms is None else interval_ms
+        self.max_batch = settings.GROUP_COMMIT_MAX_BATCH if max_batch is None else max_batch
+        self.commits = 0
+        self._queue = None
+        self._task = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self):
+        if self.running:
+            return
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+        logger.info("Group-commit writer started")
+
+    async def stop(self):
+        """Commit everything already queued, then stop the writer task"""
+        if not self.running:
+            return
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+
+        # Writes submitted while stopping landed behind the stop marker; fail
+        # them rather than leave their callers waiting forever
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not None and not item[1].done():
+                item[1].set_exception(RuntimeError("Group-commit writer stopped"))
+
+    async def submit(self, write: Write) -> Any:
+        """
+        Queue a write and wait for the batch it lands in to commit.
+
+        `write` receives the writer's session, must not commit, and its return
+        value is handed back to the caller once the batch has committed.
+        """
+        if not self.running:
+            raise RuntimeError("Group-commit writer is not running")
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((write, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+
+            # Gather whatever else arrives within the interval, up to max_batch
+            deadline = loop.time() + self.interval_ms / 1000
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            await self._commit(batch)
+
+    async def _commit(self, batch):
+        try:
+            async with self.session_factory() as db:
+                results = [await write(db) for write, _ in batch]
+                await db.commit()
+        except Exception as e:
+            if len(batch) > 1:
+                # Retry one by one so a bad write only fails its own caller
+                for item in batch:
+                    await self._commit([item])
+                return
+            _, future = batch[0]
+            if not future.done():
+                future.set_exception(e)
+            return
+
+        self.commits += 1
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+
+group_writer = GroupCommitWriter()
\ No newline at end of file
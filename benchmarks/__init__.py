@@ -0,0 +1,3 @@
+"""
+Performance benchmarks for TE Project
+"""
\ No newline at end of file
@@ -0,0 +1,163 @@
+"""
+Concurrent submission insert benchmark.
+
+Runs the same burst of concurrent writers (each inserting and committing one
+submission at a time, like create_submission) against a scratch SQLite
+database twice: once with library defaults and once with the pool and pragma
+settings from app/database.py. Optional readers page through submissions
+while the writers run, the way dashboards do during an upload burst.
+
+Usage:
+    python -m benchmarks.inserts --writers 8 --inserts 200 --readers 2 --output benchmarks/results/inserts.json
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+import argparse
+import json
+import os
+import platform
+import statistics
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine, event, insert, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import Base, get_engine_options, set_sqlite_pragmas
+from app.models import Plant, Submission
+
+
+PROFILES = ["defaults", "tuned"]
+
+
+def _create_engine(database_url: str, profile: str):
+    if profile == "defaults":
+        return create_engine(database_url, connect_args={"check_same_thread": False})
+
+    engine = create_engine(database_url, **get_engine_options(database_url))
+    event.listen(engine, "connect", set_sqlite_pragmas)
+    return engine
+
+
+def _writer(engine, writer: int, inserts: int):
+    latencies, errors = [], 0
+    for index in range(inserts):
+        start = time.perf_counter()
+        try:
+            with Session(engine) as db:
+                db.add(Submission(
+                    first_name=f"First{index}",
+                    last_name=f"Last{index}",
+                    cin=f"AB{writer:02d}{index:05d}",
+                    te_id=f"TE{writer:02d}{index:05d}",
+                    date_of_birth=datetime(1990, 1, 1),
+                    grey_card_number=f"{index}-A-{writer}",
+                    plant=f"Plant {writer % 3 + 1}",
+                    plant_id=writer % 3 + 1,
+                    cin_file_path="bench/cin.jpg",
+                    picture_file_path="bench/pic.jpg",
+                    grey_card_file_path="bench/grey_card.jpg",
+                    admin_id=1,
+                ))
+                db.commit()
+        except OperationalError:
+            # "database is locked" once the busy timeout runs out
+            errors += 1
+            continue
+        latencies.append(time.perf_counter() - start)
+    return latencies, errors
+
+
+def _reader(engine, stop: threading.Event):
+    pages = 0
+    while not stop.is_set():
+        with Session(engine) as db:
+            db.execute(
+                select(Submission).where(Submission.plant_id == 1).order_by(Submission.id.desc()).limit(100)
+            ).all()
+        pages += 1
+    return pages
+
+
+def run_profile(profile: str, writers: int, inserts: int, readers: int):
+    """Run one insert burst and return throughput, latency and error counts"""
+    with tempfile.TemporaryDirectory() as scratch:
+        database_url = f"sqlite:///{Path(scratch) / 'benchmark.db'}"
+        engine = _create_engine(database_url, profile)
+        Base.metadata.create_all(bind=engine)
+        with engine.begin() as connection:
+            connection.execute(insert(Plant), [{"id": number, "name": f"Plant {number}"} for number in range(1, 4)])
+
+        stop = threading.Event()
+        with ThreadPoolExecutor(max_workers=writers + readers) as executor:
+            reader_futures = [executor.submit(_reader, engine, stop) for _ in range(readers)]
+            start = time.perf_counter()
+            writer_futures = [executor.submit(_writer, engine, writer, inserts) for writer in range(writers)]
+            results = [future.result() for future in writer_futures]
+            seconds = time.perf_counter() - start
+            stop.set()
+            pages = sum(future.result() for future in reader_futures)
+
+        engine.dispose()
+
+    latencies = sorted(latency for writer_latencies, _ in results for latency in writer_latencies)
+    errors = sum(writer_errors for _, writer_errors in results)
+    return {
+        "profile": profile,
+        "writers": writers,
+        "inserts": writers * inserts,
+        "readers": readers,
+        "seconds": round(seconds, 3),
+        "inserts_per_second": round(len(latencies) / seconds, 1) if seconds else None,
+        "errors": errors,
+        "p50_ms": round(statistics.median(latencies) * 1000, 2) if latencies else None,
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 2) if latencies else None,
+        "reader_pages": pages,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark concurrent submission inserts on SQLite")
+    parser.add_argument("--writers", type=int, default=8, help="Concurrent writer threads")
+    parser.add_argument("--inserts", type=int, default=200, help="Inserts per writer")
+    parser.add_argument("--readers", type=int, default=2, help="Concurrent reader threads")
+    parser.add_argument("--output", default="benchmarks/results/inserts.json", help="Where to write the JSON results")
+    args = parser.parse_args(argv)
+
+    results = []
+    for profile in PROFILES:
+        result = run_profile(profile, args.writers, args.inserts, args.readers)
+        print(
+            f"{profile}: {result['inserts_per_second']} inserts/s, {result['errors']} errors, "
+            f"p50 {result['p50_ms']} ms, p95 {result['p95_ms']} ms, {result['reader_pages']} reader pages"
+        )
+        results.append(result)
+
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({
+        "benchmark": "inserts",
+        "generated_at": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "settings": {
+            "journal_mode": settings.SQLITE_JOURNAL_MODE,
+            "synchronous": settings.SQLITE_SYNCHRONOUS,
+            "mmap_size": settings.SQLITE_MMAP_SIZE,
+            "cache_size": settings.SQLITE_CACHE_SIZE,
+            "busy_timeout_ms": settings.SQLITE_BUSY_TIMEOUT_MS,
+            "pool_size": settings.DB_POOL_SIZE,
+            "max_overflow": settings.DB_MAX_OVERFLOW,
+        },
+        "results": results,
+    }, indent=2))
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,193 @@
+"""
+Report generation benchmark.
+
+Seeds synthetic submissions into a scratch SQLite database at several scales
+and measures wall time, peak RSS and output size for every report format and
+output mode. Each case runs in a fresh process so peak RSS is not polluted by
+earlier cases.
+
+Usage:
+    python -m benchmarks.reports --scales 10000,100000,1000000 --output benchmarks/results/reports.json
+"""
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import sessionmaker
+
+from app.config import settings
+from app.database import Base
+from app.models import Plant, Submission, User, RoleType
+from app.reports import REPORT_FORMATS, report_generator
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+# memory: whole report held in memory, spooled: default spool-to-disk path,
+# by_plant: one workbook per plant rendered in worker processes and zipped
+OUTPUT_MODES = ["memory", "spooled", "by_plant"]
+
+SEED_BATCH_SIZE = 10000
+
+
+def seed(database_url: str, rows: int, plants: int):
+    """Create the schema and insert `rows` synthetic submissions spread over `plants` plants"""
+    engine = create_engine(database_url)
+    Base.metadata.create_all(bind=engine)
+
+    with engine.begin() as connection:
+        connection.execute(insert(Plant), [{"name": f"Plant {number}"} for number in range(1, plants + 1)])
+        plant_ids = dict(connection.execute(select(Plant.name, Plant.id)).all())
+
+        admin_id = connection.execute(insert(User).values(
+            username="benchmark",
+            email="benchmark@example.com",
+            full_name="Benchmark Admin",
+            hashed_password="",
+            te_id="BENCH1",
+            role=RoleType.SUPER_ADMIN,
+            plant="Plant 1",
+            plant_id=plant_ids["Plant 1"],
+        )).inserted_primary_key[0]
+
+        birth = datetime(1990, 1, 1)
+        for start in range(0, rows, SEED_BATCH_SIZE):
+            batch = []
+            for index in range(start, min(start + SEED_BATCH_SIZE, rows)):
+                plant = f"Plant {index % plants + 1}"
+                batch.append({
+                    "first_name": f"First{index}",
+                    "last_name": f"Last{index}",
+                    "cin": f"AB{index:06d}",
+                    "te_id": f"TE{index:06d}",
+                    "date_of_birth": birth + timedelta(days=index % 10000),
+                    "grey_card_number": f"{index}-A-{index % 1000}",
+                    "plant": plant,
+                    "plant_id": plant_ids[plant],
+                    "cin_file_path": f"{plant}/cin/1/{index}.jpg",
+                    "picture_file_path": f"{plant}/pic/1/{index}.jpg",
+                    "grey_card_file_path": f"{plant}/grey_card/1/{index}.jpg",
+                    "admin_id": admin_id,
+                })
+            connection.execute(insert(Submission), batch)
+
+    engine.dispose()
+
+
+def _peak_rss_mb():
+    """Peak resident set size of this process and its children, in MB"""
+    if resource is None:
+        return None
+    peak = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+    # ru_maxrss is reported in bytes on macOS and in kilobytes elsewhere
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(peak / divisor, 1)
+
+
+def run_case(database_url: str, report_format: int, mode: str):
+    """Generate one report and return its timing, peak RSS and output size"""
+    if mode == "memory":
+        settings.REPORT_SPOOL_THRESHOLD = sys.maxsize
+
+    engine = create_engine(database_url)
+    db = sessionmaker(bind=engine)()
+    try:
+        start = time.perf_counter()
+        if mode == "by_plant":
+            output, _ = report_generator.generate_by_plant(db, report_format)
+        else:
+            output, _ = report_generator.generate(db, report_format)
+        seconds = time.perf_counter() - start
+
+        output.seek(0, os.SEEK_END)
+        output_bytes = output.tell()
+        output.close()
+    finally:
+        db.close()
+        engine.dispose()
+
+    return {
+        "format": report_format,
+        "mode": mode,
+        "seconds": round(seconds, 3),
+        "peak_rss_mb": _peak_rss_mb(),
+        "output_bytes": output_bytes,
+    }
+
+
+def run(scales, formats, modes, plants: int):
+    results = []
+    context = multiprocessing.get_context("spawn")
+
+    for rows in scales:
+        with tempfile.TemporaryDirectory() as scratch:
+            database_url = f"sqlite:///{Path(scratch) / 'benchmark.db'}"
+            print(f"Seeding {rows} submissions over {plants} plants...")
+            seed(database_url, rows, plants)
+
+            for report_format in formats:
+                for mode in modes:
+                    # A fresh process per case keeps peak RSS meaningful
+                    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                        result = executor.submit(run_case, database_url, report_format, mode).result()
+                    result.update({"rows": rows, "plants": plants})
+                    print(
+                        f"  rows={rows} format={report_format} mode={mode}: "
+                        f"{result['seconds']}s, {result['peak_rss_mb']} MB peak, {result['output_bytes']} bytes"
+                    )
+                    results.append(result)
+
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark report generation")
+    parser.add_argument("--scales", default="10000,100000,1000000",
+                        help="Comma-separated submission counts to benchmark")
+    parser.add_argument("--formats", default=",".join(str(f) for f in REPORT_FORMATS),
+                        help="Comma-separated report formats")
+    parser.add_argument("--modes", default=",".join(OUTPUT_MODES),
+                        help=f"Comma-separated output modes ({', '.join(OUTPUT_MODES)})")
+    parser.add_argument("--plants", type=int, default=10, help="Number of plants to spread rows over")
+    parser.add_argument("--output", default="benchmarks/results/reports.json", help="Where to write the JSON results")
+    args = parser.parse_args(argv)
+
+    scales = [int(scale) for scale in args.scales.split(",")]
+    formats = [int(report_format) for report_format in args.formats.split(",")]
+    modes = args.modes.split(",")
+    for mode in modes:
+        if mode not in OUTPUT_MODES:
+            parser.error(f"Unknown output mode: {mode}")
+
+    results = run(scales, formats, modes, args.plants)
+
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({
+        "benchmark": "reports",
+        "generated_at": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "results": results,
+    }, indent=2))
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,160 @@
+"""
+List response serialization benchmark.
+
+Renders the same page of submissions the two ways GET /submissions/ has
+done it, against a scratch SQLite database:
+
+- jsonable_encoder: full Submission entities loaded through the ORM, walked
+  by FastAPI's jsonable_encoder and rendered by the stdlib JSONResponse
+- typed_orjson: list-view rows selected with Core from submission_summary,
+  validated by the cached SubmissionListResponse TypeAdapter and rendered
+  with orjson (see app/responses.py)
+
+Each case is timed for serialization alone and for fetching plus
+serialization, as the median over many iterations.
+
+Usage:
+    python -m benchmarks.serialization --rows 100 --iterations 200 --output benchmarks/results/serialization.json
+"""
+from datetime import datetime
+from pathlib import Path
+import argparse
+import json
+import os
+import platform
+import statistics
+import tempfile
+import time
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+
+from app.database import Base
+from app.models import Plant, Submission, SubmissionSummary
+from app.responses import orjson, typed_response
+from app.schemas import SubmissionListResponse
+from app.summaries import summary_select
+
+
+CASES = ["jsonable_encoder", "typed_orjson"]
+
+
+def seed(database_url: str, rows: int):
+    """Create a scratch database holding `rows` submissions"""
+    engine = create_engine(database_url)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        connection.execute(insert(Plant), [{"id": 1, "name": "Plant 1"}])
+        connection.execute(insert(Submission), [
+            {
+                "first_name": f"First{index}",
+                "last_name": f"Last{index}",
+                "cin": f"AB{index:06d}",
+                "te_id": f"TE{index:06d}",
+                "date_of_birth": datetime(1990, 1, 1),
+                "grey_card_number": f"{index}-A-1",
+                "plant": "Plant 1",
+                "plant_id": 1,
+                "cin_file_path": "bench/cin.jpg",
+                "picture_file_path": "bench/pic.jpg",
+                "grey_card_file_path": "bench/grey_card.jpg",
+                "admin_id": 1,
+                "created_at": datetime(2024, 1, 1),
+            }
+            for index in range(rows)
+        ])
+    return engine
+
+
+def _page(submissions, rows: int):
+    return {
+        "status": "success",
+        "total": rows,
+        "total_mode": "exact",
+        "skip": 0,
+        "limit": rows,
+        "next_cursor": None,
+        "submissions": submissions,
+    }
+
+
+def _fetch(db: Session, case: str, rows: int):
+    if case == "jsonable_encoder":
+        return db.execute(select(Submission).order_by(Submission.id).limit(rows)).scalars().all()
+    table = SubmissionSummary.__table__
+    return db.execute(summary_select(table).order_by(table.c.id).limit(rows)).all()
+
+
+def _serialize(case: str, submissions, rows: int) -> bytes:
+    if case == "jsonable_encoder":
+        return JSONResponse(jsonable_encoder(_page(submissions, rows))).body
+    return typed_response(SubmissionListResponse, _page(submissions, rows)).body
+
+
+def _median_ms(run, iterations: int) -> float:
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+    return round(statistics.median(timings) * 1000, 3)
+
+
+def run_case(engine, case: str, rows: int, iterations: int):
+    """Time one way of rendering a page of `rows` submissions"""
+    with Session(engine) as db:
+        submissions = _fetch(db, case, rows)
+        body = _serialize(case, submissions, rows)
+        serialize_ms = _median_ms(lambda: _serialize(case, submissions, rows), iterations)
+
+    def fetch_and_serialize():
+        with Session(engine) as db:
+            _serialize(case, _fetch(db, case, rows), rows)
+
+    return {
+        "case": case,
+        "rows": rows,
+        "iterations": iterations,
+        "serialize_ms": serialize_ms,
+        "fetch_and_serialize_ms": _median_ms(fetch_and_serialize, iterations),
+        "response_bytes": len(body),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark list response serialization")
+    parser.add_argument("--rows", type=int, default=100, help="Submissions on the page")
+    parser.add_argument("--iterations", type=int, default=200, help="Timed runs per case")
+    parser.add_argument("--output", default="benchmarks/results/serialization.json", help="Where to write the JSON results")
+    args = parser.parse_args(argv)
+
+    results = []
+    with tempfile.TemporaryDirectory() as scratch:
+        engine = seed(f"sqlite:///{Path(scratch) / 'benchmark.db'}", args.rows)
+        for case in CASES:
+            result = run_case(engine, case, args.rows, args.iterations)
+            print(
+                f"{case}: {result['serialize_ms']} ms serializing, "
+                f"{result['fetch_and_serialize_ms']} ms with the fetch, {result['response_bytes']} bytes"
+            )
+            results.append(result)
+        engine.dispose()
+
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({
+        "benchmark": "serialization",
+        "generated_at": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "orjson": orjson.__version__ if orjson is not None else None,
+        "results": results,
+    }, indent=2))
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
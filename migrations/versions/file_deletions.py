@@ -0,0 +1,33 @@
+"""Add file deletion queue table
+
+Revision ID: b4c5d6e7f809
+Revises: a3b4c5d6e7f8
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b4c5d6e7f809'
+down_revision = 'a3b4c5d6e7f8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('file_deletions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('path', sa.String(), nullable=False),
+        sa.Column('queued_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_file_deletions_id'), 'file_deletions', ['id'], unique=False)
+    op.create_index(op.f('ix_file_deletions_queued_at'), 'file_deletions', ['queued_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_file_deletions_queued_at'), table_name='file_deletions')
+    op.drop_index(op.f('ix_file_deletions_id'), table_name='file_deletions')
+    op.drop_table('file_deletions')
\ No newline at end of file
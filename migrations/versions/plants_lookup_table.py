@@ -0,0 +1,91 @@
+"""Add plants lookup table and plant_id foreign keys
+
+Revision ID: 5e6f708192a3
+Revises: 4d5e6f708192
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e6f708192a3'
+down_revision = '4d5e6f708192'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Create plants table
+    op.create_table('plants',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('name')
+    )
+
+    # One plant per distinct name, ignoring case and surrounding whitespace
+    op.execute(
+        "INSERT INTO plants (name, created_at) "
+        "SELECT MIN(TRIM(plant)), CURRENT_TIMESTAMP FROM ("
+        "SELECT plant FROM users WHERE TRIM(plant) <> '' "
+        "UNION ALL "
+        "SELECT plant FROM submissions WHERE TRIM(plant) <> ''"
+        ") AS names GROUP BY LOWER(TRIM(plant))"
+    )
+
+    # The text indexes are replaced by plant_id ones below
+    op.drop_index('ix_submissions_plant_report', table_name='submissions')
+    op.drop_index('ix_submissions_plant_created_at', table_name='submissions')
+    op.drop_index('ix_submissions_plant_id', table_name='submissions')
+    op.drop_index('ix_submissions_plant', table_name='submissions')
+
+    for table in ('users', 'submissions'):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.add_column(sa.Column('plant_id', sa.Integer(), nullable=True))
+            batch_op.create_foreign_key(f'fk_{table}_plant_id_plants', 'plants', ['plant_id'], ['id'])
+
+        # Backfill plant_id and rewrite the name to its canonical spelling
+        op.execute(
+            f"UPDATE {table} SET plant_id = "
+            f"(SELECT id FROM plants WHERE LOWER(plants.name) = LOWER(TRIM({table}.plant)))"
+        )
+        op.execute(
+            f"UPDATE {table} SET plant = (SELECT name FROM plants WHERE plants.id = {table}.plant_id) "
+            f"WHERE plant_id IS NOT NULL"
+        )
+
+    op.create_index('ix_users_plant_id', 'users', ['plant_id'], unique=False)
+    op.create_index('ix_submissions_plant_id', 'submissions', ['plant_id', 'id'], unique=False)
+    op.create_index('ix_submissions_plant_created_at', 'submissions', ['plant_id', 'created_at', 'id'], unique=False)
+    op.create_index(
+        'ix_submissions_plant_report',
+        'submissions',
+        ['plant_id', 'last_name', 'first_name', 'te_id', 'cin', 'grey_card_number', 'date_of_birth', 'updated_at'],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_submissions_plant_report', table_name='submissions')
+    op.drop_index('ix_submissions_plant_created_at', table_name='submissions')
+    op.drop_index('ix_submissions_plant_id', table_name='submissions')
+    op.drop_index('ix_users_plant_id', table_name='users')
+
+    for table in ('users', 'submissions'):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_constraint(f'fk_{table}_plant_id_plants', type_='foreignkey')
+            batch_op.drop_column('plant_id')
+
+    op.create_index(op.f('ix_submissions_plant'), 'submissions', ['plant'], unique=False)
+    op.create_index('ix_submissions_plant_id', 'submissions', ['plant', 'id'], unique=False)
+    op.create_index('ix_submissions_plant_created_at', 'submissions', ['plant', 'created_at', 'id'], unique=False)
+    op.create_index(
+        'ix_submissions_plant_report',
+        'submissions',
+        ['plant', 'last_name', 'first_name', 'te_id', 'cin', 'grey_card_number', 'date_of_birth', 'updated_at'],
+        unique=False
+    )
+    op.drop_table('plants')
\ No newline at end of file
@@ -0,0 +1,33 @@
+"""Add composite and covering indexes for submission listings and reports
+
+Revision ID: 4d5e6f708192
+Revises: 3c4d5e6f7081
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4d5e6f708192'
+down_revision = '3c4d5e6f7081'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Serves "plant = ? ORDER BY created_at, id LIMIT n" without a sort
+    op.create_index('ix_submissions_plant_created_at', 'submissions', ['plant', 'created_at', 'id'], unique=False)
+    # Covers every report column plus the report cache watermark
+    op.create_index(
+        'ix_submissions_plant_report',
+        'submissions',
+        ['plant', 'last_name', 'first_name', 'te_id', 'cin', 'grey_card_number', 'date_of_birth', 'updated_at'],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_submissions_plant_report', table_name='submissions')
+    op.drop_index('ix_submissions_plant_created_at', table_name='submissions')
\ No newline at end of file
@@ -0,0 +1,39 @@
+"""Add submission daily counts rollup
+
+Revision ID: 2b3c4d5e6f70
+Revises: 1a2b3c4d5e6f
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2b3c4d5e6f70'
+down_revision = '1a2b3c4d5e6f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Create rollup table
+    op.create_table('submission_daily_counts',
+        sa.Column('plant', sa.String(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('admin_id', sa.Integer(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('plant', 'day', 'admin_id')
+    )
+
+    # Backfill from existing submissions
+    op.execute(
+        "INSERT INTO submission_daily_counts (plant, day, admin_id, count) "
+        "SELECT COALESCE(plant, ''), DATE(created_at), COALESCE(admin_id, 0), COUNT(id) "
+        "FROM submissions WHERE created_at IS NOT NULL "
+        "GROUP BY COALESCE(plant, ''), DATE(created_at), COALESCE(admin_id, 0)"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('submission_daily_counts')
\ No newline at end of file
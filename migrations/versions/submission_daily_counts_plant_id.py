@@ -0,0 +1,55 @@
+"""Key the submission daily counts by plant id
+
+Revision ID: 091a2b3c4d5e
+Revises: f8091a2b3c4d
+Create Date: 2026-10-20 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '091a2b3c4d5e'
+down_revision = 'f8091a2b3c4d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # The primary key changes, so the rollup is recreated and backfilled,
+    # archived submissions included
+    op.drop_table('submission_daily_counts')
+    op.create_table('submission_daily_counts',
+        sa.Column('plant_id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('admin_id', sa.Integer(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('plant_id', 'day', 'admin_id')
+    )
+    op.execute(
+        "INSERT INTO submission_daily_counts (plant_id, day, admin_id, count) "
+        "SELECT COALESCE(plant_id, 0), DATE(created_at), COALESCE(admin_id, 0), COUNT(*) FROM ("
+        "SELECT plant_id, created_at, admin_id FROM submissions WHERE created_at IS NOT NULL "
+        "UNION ALL "
+        "SELECT plant_id, created_at, admin_id FROM submissions_archive WHERE created_at IS NOT NULL"
+        ") AS stored "
+        "GROUP BY COALESCE(plant_id, 0), DATE(created_at), COALESCE(admin_id, 0)"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('submission_daily_counts')
+    op.create_table('submission_daily_counts',
+        sa.Column('plant', sa.String(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('admin_id', sa.Integer(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('plant', 'day', 'admin_id')
+    )
+    op.execute(
+        "INSERT INTO submission_daily_counts (plant, day, admin_id, count) "
+        "SELECT COALESCE(plant, ''), DATE(created_at), COALESCE(admin_id, 0), COUNT(id) "
+        "FROM submissions WHERE created_at IS NOT NULL "
+        "GROUP BY COALESCE(plant, ''), DATE(created_at), COALESCE(admin_id, 0)"
+    )
\ No newline at end of file
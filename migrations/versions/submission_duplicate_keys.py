@@ -0,0 +1,62 @@
+"""Add normalized identifier keys for duplicate detection
+
+Revision ID: a3b4c5d6e7f8
+Revises: 92a3b4c5d6e7
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3b4c5d6e7f8'
+down_revision = '92a3b4c5d6e7'
+branch_labels = None
+depends_on = None
+
+
+KEY_COLUMNS = {'cin_key': 'cin', 'te_id_key': 'te_id', 'grey_card_key': 'grey_card_number'}
+
+
+def _backfill(table: str, batch_size: int = 1000) -> None:
+    # Normalized in Python so existing rows get exactly the keys the app computes
+    from app.models import normalize_identifier
+
+    connection = op.get_bind()
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            sa.text(f"SELECT id, cin, te_id, grey_card_number FROM {table} WHERE id > :last_id ORDER BY id LIMIT :limit"),
+            {"last_id": last_id, "limit": batch_size}
+        ).mappings().all()
+        if not rows:
+            break
+        connection.execute(
+            sa.text(f"UPDATE {table} SET cin_key = :cin_key, te_id_key = :te_id_key, grey_card_key = :grey_card_key WHERE id = :id"),
+            [
+                {"id": row["id"], **{key: normalize_identifier(row[column]) for key, column in KEY_COLUMNS.items()}}
+                for row in rows
+            ]
+        )
+        last_id = rows[-1]["id"]
+
+
+def upgrade() -> None:
+    for table in ('submissions', 'submissions_archive'):
+        for key in KEY_COLUMNS:
+            op.add_column(table, sa.Column(key, sa.String(), nullable=True))
+        _backfill(table)
+
+    for key in KEY_COLUMNS:
+        op.create_index(f'ix_submissions_{key}', 'submissions', [key], unique=False)
+
+
+def downgrade() -> None:
+    for key in KEY_COLUMNS:
+        op.drop_index(f'ix_submissions_{key}', table_name='submissions')
+    for table in ('submissions_archive', 'submissions'):
+        for key in KEY_COLUMNS:
+            # A plain DROP COLUMN (SQLite 3.35+) instead of a batch table copy,
+            # which would lose the search index triggers on submissions
+            op.execute(f'ALTER TABLE {table} DROP COLUMN {key}')
\ No newline at end of file
@@ -0,0 +1,35 @@
+"""Add indexes for submission listing filters
+
+Revision ID: 8192a3b4c5d6
+Revises: 708192a3b4c5
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8192a3b4c5d6'
+down_revision = '708192a3b4c5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Date ranges across all plants
+    op.create_index('ix_submissions_created_at', 'submissions', ['created_at', 'id'], unique=False)
+    op.create_index('ix_submissions_date_of_birth', 'submissions', ['date_of_birth', 'id'], unique=False)
+    # Date of birth ranges within a plant
+    op.create_index(
+        'ix_submissions_plant_date_of_birth', 'submissions', ['plant_id', 'date_of_birth', 'id'], unique=False
+    )
+    # Submissions by admin
+    op.create_index('ix_submissions_admin_id', 'submissions', ['admin_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_submissions_admin_id', table_name='submissions')
+    op.drop_index('ix_submissions_plant_date_of_birth', table_name='submissions')
+    op.drop_index('ix_submissions_date_of_birth', table_name='submissions')
+    op.drop_index('ix_submissions_created_at', table_name='submissions')
\ No newline at end of file
@@ -0,0 +1,52 @@
+"""Stop reusing submission ids after archiving
+
+Revision ID: d6e7f8091a2b
+Revises: c5d6e7f8091a
+Create Date: 2026-10-20 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd6e7f8091a2b'
+down_revision = 'c5d6e7f8091a'
+branch_labels = None
+depends_on = None
+
+
+def _recreate_submissions(autoincrement: bool) -> None:
+    from app.search import ensure_search_index
+    from app.summaries import ensure_submission_summary
+
+    connection = op.get_bind()
+    with op.batch_alter_table('submissions', recreate='always', table_kwargs={'sqlite_autoincrement': autoincrement}):
+        pass
+    # Recreating the table dropped its search and summary triggers
+    ensure_search_index(connection)
+    ensure_submission_summary(connection)
+
+
+def upgrade() -> None:
+    # Postgres sequences never hand out an id twice; only SQLite needs AUTOINCREMENT
+    if op.get_bind().dialect.name != "sqlite":
+        return
+
+    _recreate_submissions(True)
+    # Ids already moved to the archive stay taken
+    connection = op.get_bind()
+    archived = connection.execute(sa.text("SELECT max(id) FROM submissions_archive")).scalar()
+    seq = connection.execute(sa.text("SELECT seq FROM sqlite_sequence WHERE name = 'submissions'")).scalar()
+    if archived is None or (seq is not None and seq >= archived):
+        return
+    if seq is None:
+        op.execute(f"INSERT INTO sqlite_sequence (name, seq) VALUES ('submissions', {archived})")
+    else:
+        op.execute(f"UPDATE sqlite_sequence SET seq = {archived} WHERE name = 'submissions'")
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "sqlite":
+        return
+
+    _recreate_submissions(False)
\ No newline at end of file
@@ -0,0 +1,43 @@
+"""Enforce unique submission identity keys
+
+Revision ID: e7f8091a2b3c
+Revises: d6e7f8091a2b
+Create Date: 2026-10-20 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7f8091a2b3c'
+down_revision = 'd6e7f8091a2b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('submission_identity_keys',
+        sa.Column('field', sa.String(), nullable=False),
+        sa.Column('key', sa.String(), nullable=False),
+        sa.Column('submission_id', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('field', 'key')
+    )
+    op.create_index(op.f('ix_submission_identity_keys_submission_id'), 'submission_identity_keys', ['submission_id'], unique=False)
+
+    from app.duplicates import ensure_identity_keys
+
+    # Sync triggers on submissions; existing keys are claimed by their earliest submission
+    ensure_identity_keys(op.get_bind())
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == "sqlite":
+        for trigger in ("submission_identity_insert", "submission_identity_update", "submission_identity_delete"):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    elif dialect == "postgresql":
+        op.execute("DROP TRIGGER IF EXISTS submission_identity_sync ON submissions")
+        op.execute("DROP FUNCTION IF EXISTS sync_submission_identity_keys()")
+    op.drop_index(op.f('ix_submission_identity_keys_submission_id'), table_name='submission_identity_keys')
+    op.drop_table('submission_identity_keys')
\ No newline at end of file
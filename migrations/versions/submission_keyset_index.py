@@ -0,0 +1,25 @@
+"""Add composite index for keyset pagination of submissions
+
+Revision ID: 3c4d5e6f7081
+Revises: 2b3c4d5e6f70
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c4d5e6f7081'
+down_revision = '2b3c4d5e6f70'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Serves "plant = ? AND id > ? ORDER BY id LIMIT n" without a sort
+    op.create_index('ix_submissions_plant_id', 'submissions', ['plant', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_submissions_plant_id', table_name='submissions')
\ No newline at end of file
@@ -0,0 +1,57 @@
+"""Add submission summary projection for listings
+
+Revision ID: c5d6e7f8091a
+Revises: b4c5d6e7f809
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5d6e7f8091a'
+down_revision = 'b4c5d6e7f809'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('submission_summary',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('first_name', sa.String(), nullable=True),
+        sa.Column('last_name', sa.String(), nullable=True),
+        sa.Column('cin', sa.String(), nullable=True),
+        sa.Column('te_id', sa.String(), nullable=True),
+        sa.Column('date_of_birth', sa.DateTime(), nullable=True),
+        sa.Column('grey_card_number', sa.String(), nullable=True),
+        sa.Column('plant', sa.String(), nullable=True),
+        sa.Column('plant_id', sa.Integer(), nullable=True),
+        sa.Column('admin_id', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_submission_summary_plant_id', 'submission_summary', ['plant_id', 'id'], unique=False)
+    op.create_index('ix_submission_summary_plant_created_at', 'submission_summary', ['plant_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_submission_summary_created_at', 'submission_summary', ['created_at', 'id'], unique=False)
+    op.create_index('ix_submission_summary_date_of_birth', 'submission_summary', ['date_of_birth', 'id'], unique=False)
+    op.create_index('ix_submission_summary_plant_date_of_birth', 'submission_summary', ['plant_id', 'date_of_birth', 'id'], unique=False)
+    op.create_index('ix_submission_summary_admin_id', 'submission_summary', ['admin_id', 'id'], unique=False)
+    op.create_index(op.f('ix_submission_summary_te_id'), 'submission_summary', ['te_id'], unique=False)
+    op.create_index(op.f('ix_submission_summary_grey_card_number'), 'submission_summary', ['grey_card_number'], unique=False)
+
+    from app.summaries import ensure_submission_summary
+
+    # Sync triggers on submissions; existing submissions are copied in as part of the creation
+    ensure_submission_summary(op.get_bind())
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == "sqlite":
+        for trigger in ("submission_summary_insert", "submission_summary_update", "submission_summary_delete"):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    elif dialect == "postgresql":
+        op.execute("DROP TRIGGER IF EXISTS submission_summary_sync ON submissions")
+        op.execute("DROP FUNCTION IF EXISTS sync_submission_summary()")
+    op.drop_table('submission_summary')
\ No newline at end of file
@@ -0,0 +1,35 @@
+"""Drop submission indexes no query uses
+
+Revision ID: f8091a2b3c4d
+Revises: e7f8091a2b3c
+Create Date: 2026-10-20 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f8091a2b3c4d'
+down_revision = 'e7f8091a2b3c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Listings and their filters read submission_summary, which has the same indexes
+    op.drop_index('ix_submissions_admin_id', table_name='submissions')
+    op.drop_index('ix_submissions_plant_date_of_birth', table_name='submissions')
+    op.drop_index('ix_submissions_date_of_birth', table_name='submissions')
+    op.drop_index('ix_submissions_plant_created_at', table_name='submissions')
+
+
+def downgrade() -> None:
+    op.create_index(
+        'ix_submissions_plant_created_at', 'submissions', ['plant_id', 'created_at', 'id'], unique=False
+    )
+    op.create_index('ix_submissions_date_of_birth', 'submissions', ['date_of_birth', 'id'], unique=False)
+    op.create_index(
+        'ix_submissions_plant_date_of_birth', 'submissions', ['plant_id', 'date_of_birth', 'id'], unique=False
+    )
+    op.create_index('ix_submissions_admin_id', 'submissions', ['admin_id', 'id'], unique=False)
\ No newline at end of file
@@ -0,0 +1,47 @@
+"""Add submissions archive table
+
+Revision ID: 6f708192a3b4
+Revises: 5e6f708192a3
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6f708192a3b4'
+down_revision = '5e6f708192a3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Create archive table, same columns as submissions
+    op.create_table('submissions_archive',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('first_name', sa.String(), nullable=True),
+        sa.Column('last_name', sa.String(), nullable=True),
+        sa.Column('cin', sa.String(), nullable=True),
+        sa.Column('te_id', sa.String(), nullable=True),
+        sa.Column('date_of_birth', sa.DateTime(), nullable=True),
+        sa.Column('grey_card_number', sa.String(), nullable=True),
+        sa.Column('plant', sa.String(), nullable=True),
+        sa.Column('plant_id', sa.Integer(), nullable=True),
+        sa.Column('cin_file_path', sa.String(), nullable=True),
+        sa.Column('picture_file_path', sa.String(), nullable=True),
+        sa.Column('grey_card_file_path', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('admin_id', sa.Integer(), nullable=True),
+        sa.Column('archived_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['admin_id'], ['users.id'], ),
+        sa.ForeignKeyConstraint(['plant_id'], ['plants.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_submissions_archive_plant_id', 'submissions_archive', ['plant_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_submissions_archive_plant_id', table_name='submissions_archive')
+    op.drop_table('submissions_archive')
\ No newline at end of file
@@ -0,0 +1,34 @@
+"""Add submissions full-text search index
+
+Revision ID: 708192a3b4c5
+Revises: 6f708192a3b4
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '708192a3b4c5'
+down_revision = '6f708192a3b4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    from app.search import ensure_search_index
+
+    # FTS5 table and sync triggers on SQLite, trigram index on Postgres;
+    # existing submissions are indexed as part of the creation
+    ensure_search_index(op.get_bind())
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == "sqlite":
+        for trigger in ("submissions_fts_insert", "submissions_fts_delete", "submissions_fts_update"):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS submissions_fts")
+    elif dialect == "postgresql":
+        op.execute("DROP INDEX IF EXISTS ix_submissions_search")
+        op.execute("DROP FUNCTION IF EXISTS submission_search_text(text, text, text, text, text)")
\ No newline at end of file
@@ -0,0 +1,80 @@
+import asyncio
+import pytest
+from datetime import date, datetime, timedelta
+from sqlalchemy import select
+from app.archive import archive_requested, archive_submissions
+from app.config import settings
+from app.models import ArchivedSubmission, Submission
+from app.pagination import fetch_merged_page
+from app.reports import _query_rows
+from .conftest import TestingAsyncSessionLocal
+
+
+def test_archive_moves_old_submissions_in_batches(db_session, regular_admin_user, make_submission):
+    """Test that only submissions older than the cutoff move, keeping their ids"""
+    old_ids = [make_submission(admin_id=regular_admin_user.id, created_at=datetime(2015, 1, 1)).id for _ in range(5)]
+    new_ids = [make_submission(admin_id=regular_admin_user.id, created_at=datetime.now()).id]
+    
+    assert archive_submissions(db_session, batch_size=2) == 5
+    
+    assert [submission.id for submission in db_session.query(Submission)] == new_ids
+    archived = db_session.query(ArchivedSubmission).order_by(ArchivedSubmission.id).all()
+    assert [submission.id for submission in archived] == old_ids
+    assert archived[0].te_id == "T1" and archived[0].plant_id == regular_admin_user.plant_id
+    assert archived[0].archived_at is not None
+    
+    # Nothing left to move
+    assert archive_submissions(db_session) == 0
+
+
+def test_archived_ids_are_not_reused(db_session, regular_admin_user, make_submission):
+    """Test that new submissions get fresh ids once every hot row is archived"""
+    old_ids = [make_submission(admin_id=regular_admin_user.id, created_at=datetime(2015, 1, 1)).id for _ in range(2)]
+    archive_submissions(db_session)
+    
+    new_id = make_submission(admin_id=regular_admin_user.id, created_at=datetime.now()).id
+    
+    assert new_id > max(old_ids)
+
+
+def test_archive_requested():
+    """Test that only date ranges reaching back past the cutoff read the archive"""
+    today = date.today()
+    old = today - timedelta(days=settings.ARCHIVE_AFTER_DAYS + 1)
+    
+    assert not archive_requested(None, None)
+    assert not archive_requested(today - timedelta(days=7), None)
+    assert archive_requested(old, today)
+    assert archive_requested(None, today)
+
+
+def test_listing_and_reports_merge_archive(db_session, regular_admin_user, make_submission):
+    """Test that archived rows are merged back in id order when asked for"""
+    old_ids = [make_submission(admin_id=regular_admin_user.id, created_at=datetime(2015, 1, 1)).id for _ in range(2)]
+    new_ids = [make_submission(admin_id=regular_admin_user.id, created_at=datetime.now()).id for _ in range(2)]
+    archive_submissions(db_session)
+    
+    async def list_ids():
+        async with TestingAsyncSessionLocal() as db:
+            sources = [
+                (db, select(Submission), Submission.id),
+                (db, select(ArchivedSubmission), ArchivedSubmission.id),
+            ]
+            return [row.id for row in await fetch_merged_page(sources, 0, 10)]
+    
+    assert asyncio.run(list_ids()) == old_ids + new_ids
+    assert len(_query_rows(db_session, 1)) == 2
+    assert len(_query_rows(db_session, 1, include_archived=True)) == 4
+
+
+def test_archived_submission_detail(client, db_session, regular_admin_user, regular_admin_token, make_submission):
+    """Test that a submission still reads by id, with all its fields, once archived"""
+    submission_id = make_submission(admin_id=regular_admin_user.id, created_at=datetime(2015, 1, 1)).id
+    archive_submissions(db_session)
+    
+    response = client.get(f"/submissions/{submission_id}", headers={"Authorization": f"Bearer {regular_admin_token}"})
+    
+    assert response.status_code == 200
+    submission = response.json()["submission"]
+    assert submission["id"] == submission_id
+    assert submission["picture_file_path"] == "test/path/pic.jpg"
\ No newline at end of file
@@ -0,0 +1,156 @@
+import asyncio
+import io
+import json
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.models import Plant, Submission, SubmissionDailyCount
+from app.shards import shard_router
+from app.security import create_access_token
+
+
+def batch_item(cin, grey_card_number, te_id, plant="Plant A"):
+    return {
+        "first_name": "John",
+        "last_name": "Doe",
+        "cin": cin,
+        "te_id": te_id,
+        "date_of_birth": "1990-01-01T00:00:00",
+        "grey_card_number": grey_card_number,
+        "plant": plant,
+        "cin_file": f"{cin}.jpg",
+        "picture_file": f"{cin}_i.jpg",
+        "grey_card_file": f"{grey_card_number}.jpg",
+    }
+
+
+def batch_files(*items):
+    return [
+        ("files", (item[field], io.BytesIO(b"image content"), "image/jpeg"))
+        for item in items
+        for field in ("cin_file", "picture_file", "grey_card_file")
+    ]
+
+
+def post_batch(client, user, items, files):
+    access_token = create_access_token(data={"sub": user.username})
+    return client.post(
+        "/submissions/batch",
+        headers={"Authorization": f"Bearer {access_token}"},
+        data={"submissions": json.dumps(items)},
+        files=files
+    )
+
+
+def test_create_submission_batch(client, regular_admin_user, db_session, uploads):
+    """Test that every submission of a batch is stored in one go with its files"""
+    items = [batch_item("AB123456", "123-A-456", "TE001"), batch_item("CD654321", "789-B-12", "TE002")]
+    
+    response = post_batch(client, regular_admin_user, items, batch_files(*items))
+    
+    assert response.status_code == 201
+    results = response.json()["results"]
+    assert [result["index"] for result in results] == [0, 1]
+    assert all(result["status"] == "created" for result in results)
+    
+    submissions = db_session.query(Submission).order_by(Submission.id).all()
+    assert [submission.te_id for submission in submissions] == ["TE001", "TE002"]
+    assert all(submission.admin_id == regular_admin_user.id for submission in submissions)
+    assert (uploads / submissions[1].grey_card_file_path).read_bytes() == b"image content"
+    assert db_session.query(SubmissionDailyCount).one().count == 2
+
+
+def test_invalid_batch_stores_nothing(client, regular_admin_user, db_session, uploads):
+    """Test that one invalid item rejects the whole batch with per-item errors"""
+    items = [
+        batch_item("AB123456", "123-A-456", "TE001"),
+        batch_item("CD654321", "bad grey card", "TE002"),
+        batch_item("EF111111", "111-C-11", "TE003", plant="Plant Z"),
+    ]
+    files = batch_files(items[0], items[2])
+    
+    response = post_batch(client, regular_admin_user, items, files)
+    
+    assert response.status_code == 422
+    results = response.json()["detail"]["results"]
+    assert [result["status"] for result in results] == ["valid", "invalid", "invalid"]
+    assert "grey_card_number: Value error, Invalid Grey Card format" in results[1]["errors"]
+    assert "cin_file: no uploaded file named CD654321.jpg" in results[1]["errors"]
+    assert results[2]["errors"] == ["Unknown plant: Plant Z"]
+    assert db_session.query(Submission).count() == 0
+    assert not any(uploads.iterdir())
+
+
+def test_batch_file_references_must_be_names(client, regular_admin_user, db_session, uploads):
+    """Test that a file field holding a list or an object is an item error, not a server error"""
+    items = [batch_item("AB123456", "123-A-456", "TE001"), batch_item("CD654321", "789-B-12", "TE002")]
+    files = batch_files(*items)
+    items[1]["cin_file"] = ["CD654321.jpg"]
+    items[1]["picture_file"] = {"name": "CD654321_i.jpg"}
+    
+    response = post_batch(client, regular_admin_user, items, files)
+    
+    assert response.status_code == 422
+    results = response.json()["detail"]["results"]
+    assert results[0]["status"] == "valid"
+    assert results[1]["errors"] == [
+        "cin_file: must be the name of an uploaded file",
+        "picture_file: must be the name of an uploaded file",
+    ]
+    assert db_session.query(Submission).count() == 0
+
+
+@pytest.mark.parametrize("submissions", ["not json", "[]", '{"cin": "AB123456"}', "[1, 2]"])
+def test_batch_requires_array_of_items(client, regular_admin_user, submissions):
+    """Test that the submissions field must be a non-empty JSON array of objects"""
+    access_token = create_access_token(data={"sub": regular_admin_user.username})
+    response = client.post(
+        "/submissions/batch",
+        headers={"Authorization": f"Bearer {access_token}"},
+        data={"submissions": submissions},
+        files=[("files", ("AB123456.jpg", io.BytesIO(b"image content"), "image/jpeg"))]
+    )
+    assert response.status_code == 400
+
+
+def test_batch_refuses_duplicates(client, regular_admin_user, db_session, uploads):
+    """Test that items duplicating each other are refused"""
+    items = [batch_item("AB123456", "123-A-456", "TE001"), batch_item("CD654321", "789-B-12", "te 001")]
+    
+    response = post_batch(client, regular_admin_user, items, batch_files(*items))
+    
+    assert response.status_code == 422
+    assert response.json()["detail"]["results"][1]["errors"] == ["Duplicate of item 0 (te_id)"]
+    assert db_session.query(Submission).count() == 0
+
+
+def test_failed_shard_commit_keeps_other_plants(client, regular_admin_user, db_session, uploads, tmp_path, monkeypatch):
+    """Test that in shard mode a failed commit only drops its own plant's items and files"""
+    monkeypatch.setattr(settings, "SHARD_BY_PLANT", True)
+    monkeypatch.setattr(settings, "SHARD_DIR", str(tmp_path / "shards"))
+    plant_b = Plant(name="Plant B")
+    db_session.add(plant_b)
+    db_session.commit()
+    commit = AsyncSession.commit
+    
+    async def failing_commit(session):
+        if session.bind.url.database.endswith(f"plant_{plant_b.id}.db"):
+            raise RuntimeError("disk I/O error")
+        await commit(session)
+    
+    monkeypatch.setattr(AsyncSession, "commit", failing_commit)
+    items = [batch_item("AB123456", "123-A-456", "TE001"), batch_item("CD654321", "789-B-12", "TE002", plant="Plant B")]
+    
+    try:
+        response = post_batch(client, regular_admin_user, items, batch_files(*items))
+    finally:
+        asyncio.run(shard_router.dispose())
+    
+    assert response.status_code == 207
+    results = response.json()["results"]
+    assert [result["status"] for result in results] == ["created", "failed"]
+    assert results[1]["errors"] == ["Could not be stored: disk I/O error"]
+    # Only the created item's files are kept
+    stored = [path for path in uploads.rglob("*") if path.is_file() and "shards" not in path.parts]
+    assert len(stored) == 3
+    assert all("Plant A" in path.parts for path in stored)
\ No newline at end of file
@@ -0,0 +1,43 @@
+import pytest
+from benchmarks.reports import seed, run_case
+from benchmarks.inserts import run_profile
+from benchmarks.serialization import seed as seed_submissions, run_case as run_serialization_case
+
+
+@pytest.mark.parametrize("mode", ["spooled", "by_plant"])
+def test_report_benchmark_case(tmp_path, mode):
+    """Test that a small report benchmark case seeds data and reports its measurements"""
+    database_url = f"sqlite:///{tmp_path / 'benchmark.db'}"
+    seed(database_url, rows=50, plants=3)
+    
+    result = run_case(database_url, 1, mode)
+    
+    assert result["format"] == 1
+    assert result["mode"] == mode
+    assert result["seconds"] >= 0
+    assert result["output_bytes"] > 0
+
+
+@pytest.mark.parametrize("profile", ["defaults", "tuned"])
+def test_insert_benchmark_profile(profile):
+    """Test that a small insert benchmark profile reports its measurements"""
+    result = run_profile(profile, writers=2, inserts=5, readers=1)
+    
+    assert result["profile"] == profile
+    assert result["inserts"] == 10
+    assert result["errors"] == 0
+    assert result["inserts_per_second"] > 0
+
+
+@pytest.mark.parametrize("case", ["jsonable_encoder", "typed_orjson"])
+def test_serialization_benchmark_case(tmp_path, case):
+    """Test that a small serialization benchmark case renders the whole page"""
+    engine = seed_submissions(f"sqlite:///{tmp_path / 'benchmark.db'}", rows=10)
+    
+    result = run_serialization_case(engine, case, rows=10, iterations=2)
+    engine.dispose()
+    
+    assert result["case"] == case
+    assert result["rows"] == 10
+    assert result["serialize_ms"] >= 0
+    assert result["response_bytes"] > 0
@@ -0,0 +1,74 @@
+import asyncio
+import pytest
+from sqlalchemy import select, text
+from app.models import Submission
+from app.counts import CountMode, count_cache, count_total, estimate_count
+from app.plants import get_plant
+from .conftest import TestingAsyncSessionLocal
+
+
+def run_count_total(plant_id, mode):
+    async def count():
+        async with TestingAsyncSessionLocal() as db:
+            query = select(Submission)
+            if plant_id:
+                query = query.where(Submission.plant_id == plant_id)
+            return await count_total(db, query, "submissions", plant_id, mode)
+    return asyncio.run(count())
+
+
+def test_count_cache_invalidation():
+    """Test that invalidating a plant also drops the all-plants count"""
+    count_cache.set("submissions", 1, 3)
+    count_cache.set("submissions", 2, 5)
+    count_cache.set("submissions", None, 8)
+    
+    count_cache.invalidate("submissions", 1)
+    
+    assert count_cache.get("submissions", 1) is None
+    assert count_cache.get("submissions", None) is None
+    assert count_cache.get("submissions", 2) == 5
+
+
+def test_cached_count_mode(db_session, regular_admin_user, make_submission):
+    """Test that cached counts are served until invalidated"""
+    for plant in ["Plant1", "Plant1"]:
+        make_submission(admin_id=regular_admin_user.id, plant=plant)
+    plant_id = get_plant(db_session, "Plant1").id
+    
+    assert run_count_total(plant_id, CountMode.CACHED) == (2, "exact")
+    
+    make_submission(admin_id=regular_admin_user.id, plant="Plant1")
+    assert run_count_total(plant_id, CountMode.CACHED) == (2, "cached")
+    
+    count_cache.invalidate("submissions", plant_id)
+    assert run_count_total(plant_id, CountMode.CACHED) == (3, "exact")
+
+
+def test_estimated_count_falls_back_without_statistics(db_session, regular_admin_user, make_submission):
+    """Test that estimated mode counts exactly until ANALYZE has produced statistics"""
+    for plant in ["Plant1", "Plant2"]:
+        make_submission(admin_id=regular_admin_user.id, plant=plant)
+    db_session.execute(text("DROP TABLE IF EXISTS sqlite_stat1"))
+    db_session.commit()
+    
+    assert estimate_count(db_session, "submissions") is None
+    assert run_count_total(None, CountMode.ESTIMATED) == (2, "exact")
+
+
+def test_estimated_count_from_sqlite_stat1(db_session, regular_admin_user, make_submission):
+    """Test that estimated mode reads row estimates from sqlite_stat1"""
+    for plant in ["Plant1"] * 4 + ["Plant2"] * 2:
+        make_submission(admin_id=regular_admin_user.id, plant=plant)
+    db_session.execute(text("ANALYZE"))
+    db_session.commit()
+    
+    assert estimate_count(db_session, "submissions") == 6
+    assert run_count_total(None, CountMode.ESTIMATED) == (6, "estimated")
+    
+    # Per plant, sqlite_stat1 only has the average, so the count is exact
+    plant_id = get_plant(db_session, "Plant1").id
+    assert estimate_count(db_session, "submissions", plant_id) is None
+    assert run_count_total(plant_id, CountMode.ESTIMATED) == (4, "exact")
+    db_session.execute(text("DROP TABLE sqlite_stat1"))
+    db_session.commit()
\ No newline at end of file
@@ -0,0 +1,151 @@
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from app.config import settings
+import asyncio
+from app.database import (
+    QueryStats, ReplicaRouter, current_query_stats, get_async_database_url, get_engine_options, param_shape,
+    set_sqlite_pragmas
+)
+from loguru import logger
+
+
+@pytest.mark.parametrize("database_url,expected", [
+    ("sqlite:///./te_project.db", "sqlite+aiosqlite:///./te_project.db"),
+    ("postgresql://user:secret@db/te", "postgresql+asyncpg://user:secret@db/te"),
+    ("postgresql+psycopg2://user:secret@db/te", "postgresql+asyncpg://user:secret@db/te"),
+    ("sqlite+aiosqlite:///./te_project.db", "sqlite+aiosqlite:///./te_project.db"),
+])
+def test_get_async_database_url(database_url, expected):
+    """Test that sync database URLs are mapped onto their async drivers"""
+    assert get_async_database_url(database_url) == expected
+
+
+def test_engine_options_for_file_databases():
+    """Test that pool settings are applied to file-backed databases"""
+    options = get_engine_options("sqlite:///./te_project.db")
+    assert options["pool_size"] == settings.DB_POOL_SIZE
+    assert options["max_overflow"] == settings.DB_MAX_OVERFLOW
+    assert options["pool_pre_ping"] == settings.DB_POOL_PRE_PING
+    assert options["connect_args"] == {"check_same_thread": False}
+    
+    async_options = get_engine_options("sqlite+aiosqlite:///./te_project.db", is_async=True)
+    assert async_options["poolclass"] is AsyncAdaptedQueuePool
+    assert "connect_args" not in async_options
+
+
+def test_engine_options_for_memory_databases():
+    """Test that in-memory SQLite keeps its single-connection pool"""
+    options = get_engine_options("sqlite:///:memory:")
+    assert "pool_size" not in options
+    create_engine("sqlite:///:memory:", **options).dispose()
+
+
+def test_sqlite_pragmas_applied_on_connect(tmp_path, monkeypatch):
+    """Test that configured pragmas are set on every new connection"""
+    monkeypatch.setattr(settings, "SQLITE_BUSY_TIMEOUT_MS", 1234)
+    monkeypatch.setattr(settings, "SQLITE_CACHE_SIZE", -2000)
+    
+    engine = create_engine(f"sqlite:///{tmp_path / 'pragmas.db'}")
+    event.listen(engine, "connect", set_sqlite_pragmas)
+    
+    with engine.connect() as connection:
+        assert connection.execute(text("PRAGMA journal_mode")).scalar() == settings.SQLITE_JOURNAL_MODE.lower()
+        assert connection.execute(text("PRAGMA busy_timeout")).scalar() == 1234
+        assert connection.execute(text("PRAGMA cache_size")).scalar() == -2000
+    engine.dispose()
+
+
+def test_replica_router_round_robin(tmp_path):
+    """Test that reads are spread over healthy replicas in turn"""
+    router = ReplicaRouter([f"sqlite:///{tmp_path / 'replica1.db'}", f"sqlite:///{tmp_path / 'replica2.db'}"])
+    
+    chosen = [router.choose("caller") for _ in range(4)]
+    
+    assert chosen == [router.replicas[0], router.replicas[1], router.replicas[0], router.replicas[1]]
+    assert asyncio.run(router.choose_async("caller")) in router.replicas
+
+
+def test_replica_router_skips_unhealthy_replicas(tmp_path, monkeypatch):
+    """Test that failed replicas are skipped until they pass a health check again"""
+    monkeypatch.setattr(settings, "REPLICA_HEALTH_CHECK_SECONDS", 3600)
+    router = ReplicaRouter([f"sqlite:///{tmp_path / 'missing' / 'replica.db'}"])
+    
+    # Every replica is down, so reads fall back to the primary
+    assert router.choose() is None
+    assert not router.replicas[0].healthy
+    
+    # The replica comes back, but is only used once its next check is due
+    (tmp_path / "missing").mkdir()
+    assert router.choose() is None
+    monkeypatch.setattr(settings, "REPLICA_HEALTH_CHECK_SECONDS", 0)
+    assert router.choose() is router.replicas[0]
+
+
+def test_replica_router_read_your_writes(tmp_path, monkeypatch):
+    """Test that a caller reads from the primary for a while after writing"""
+    router = ReplicaRouter([f"sqlite:///{tmp_path / 'replica.db'}"])
+    router.mark_write("writer")
+    
+    assert router.choose("writer") is None
+    assert router.choose("reader") is router.replicas[0]
+    
+    monkeypatch.setattr(settings, "READ_YOUR_WRITES_SECONDS", 0)
+    assert router.choose("writer") is router.replicas[0]
+
+def test_param_shape_hides_values():
+    """Test that bound parameters are logged by type only"""
+    assert param_shape({"cin": "AB123456", "limit": 10}) == {"cin": "str", "limit": "int"}
+    assert param_shape(("AB123456", 10)) == ["str", "int"]
+    assert param_shape([("AB123456",), ("CD654321",)]) == {"rows": 2, "shape": ["str"]}
+
+
+def test_query_stats_recorded_per_request(tmp_path):
+    """Test that queries run inside a request are counted on its stats"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'stats.db'}")
+    stats = QueryStats()
+    token = current_query_stats.set(stats)
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+            connection.execute(text("SELECT :value"), {"value": 2})
+    finally:
+        current_query_stats.reset(token)
+    engine.dispose()
+    
+    assert stats.count == 2
+    assert stats.slowest_statement is not None
+    assert stats.headers()["X-DB-Query-Count"] == "2"
+
+
+def test_slow_queries_logged_with_plan(tmp_path, monkeypatch):
+    """Test that statements over the threshold are logged with their EXPLAIN plan"""
+    monkeypatch.setattr(settings, "SLOW_QUERY_MS", 0)
+    records = []
+    handler = logger.add(records.append, filter=lambda record: record["extra"].get("slow_query", False))
+    
+    engine = create_engine(f"sqlite:///{tmp_path / 'slow.db'}")
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY)"))
+            connection.execute(text("SELECT * FROM items WHERE id = :id"), {"id": 1})
+    finally:
+        logger.remove(handler)
+        engine.dispose()
+    
+    extra = records[-1].record["extra"]
+    assert extra["params"] == ["int"]
+    assert any("items" in line for line in extra["plan"])
+
+
+def test_debug_headers(client, super_admin_token, monkeypatch):
+    """Test that query stats are reported in response headers in debug mode"""
+    monkeypatch.setattr(settings, "DEBUG", True)
+    headers = {"Authorization": f"Bearer {super_admin_token}"}
+    response = client.get("/admin/metrics/db", headers=headers)
+    assert response.status_code == 200
+    assert int(response.headers["X-DB-Query-Count"]) > 0
+    assert response.json()["queries"] > 0
+    
+    monkeypatch.setattr(settings, "DEBUG", False)
+    assert "X-DB-Query-Count" not in client.get("/health").headers
\ No newline at end of file
@@ -0,0 +1,156 @@
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import delete
+from app.config import settings
+from app.deletions import purge_file_deletions, queue_file_deletions
+from app.models import FileDeletion, Plant, Submission
+from .conftest import TestingAsyncSessionLocal, post_submission, submission_data
+
+
+def stored_files(uploads):
+    return [path for path in uploads.rglob("*") if path.is_file()]
+
+
+def test_upsert_creates_then_updates_in_place(api, regular_admin_user, db_session, uploads):
+    """Test that an upsert on a known TE ID updates the row and replaces only the changed files"""
+    created = post_submission(api, regular_admin_user, submission_data(), upsert=True)
+    assert created.status_code == 201
+    submission_id = created.json()["submission"]["id"]
+    old_picture = db_session.get(Submission, submission_id).picture_file_path
+    
+    updated = post_submission(api, regular_admin_user, submission_data(te_id="te-12345", last_name="Smith"), pic=b"new picture", upsert=True)
+    assert updated.status_code == 200
+    assert updated.json()["submission"]["id"] == submission_id
+    assert updated.json()["replaced_files"] == ["pic"]
+    
+    db_session.expire_all()
+    assert db_session.query(Submission).count() == 1
+    submission = db_session.get(Submission, submission_id)
+    assert submission.last_name == "Smith"
+    assert submission.picture_file_path != old_picture
+    assert (uploads / submission.picture_file_path).read_bytes() == b"new picture"
+    
+    # The old picture stays on disk until the queue is purged
+    assert [entry.path for entry in db_session.query(FileDeletion)] == [old_picture]
+    assert len(stored_files(uploads)) == 4
+
+
+def test_upsert_goes_through_group_writer(api, regular_admin_user, db_session, uploads, monkeypatch):
+    """Test that with the group-commit writer running, the update is committed by the writer"""
+    class Writer:
+        running = True
+        writes = 0
+        
+        async def submit(self, write):
+            self.writes += 1
+            async with TestingAsyncSessionLocal() as session:
+                result = await write(session)
+                await session.commit()
+                return result
+    
+    writer = Writer()
+    monkeypatch.setattr("app.routers.submissions.group_writer", writer)
+    post_submission(api, regular_admin_user, submission_data(), upsert=True)
+    
+    response = post_submission(api, regular_admin_user, submission_data(last_name="Smith"), pic=b"new picture", upsert=True)
+    
+    assert response.status_code == 200
+    assert response.json()["submission"]["last_name"] == "Smith"
+    assert writer.writes == 2
+    assert db_session.query(FileDeletion).count() == 1
+
+
+def test_upsert_of_row_removed_meanwhile_is_not_found(api, regular_admin_user, db_session, uploads, monkeypatch):
+    """Test that an update reaching the group-commit writer after its row was archived is a 404"""
+    class Writer:
+        running = True
+        
+        async def submit(self, write):
+            async with TestingAsyncSessionLocal() as session:
+                # Archived between the read and the queued write
+                await session.execute(delete(Submission))
+                return await write(session)
+    
+    post_submission(api, regular_admin_user, submission_data(), upsert=True)
+    monkeypatch.setattr("app.routers.submissions.group_writer", Writer())
+    
+    response = post_submission(api, regular_admin_user, submission_data(last_name="Smith"), pic=b"new picture", upsert=True)
+    
+    assert response.status_code == 404
+    assert len(stored_files(uploads)) == 3
+
+
+def test_upsert_with_unchanged_files_replaces_nothing(api, regular_admin_user, db_session, uploads):
+    """Test that resending the same images keeps the stored files"""
+    post_submission(api, regular_admin_user, submission_data(), upsert=True)
+    response = post_submission(api, regular_admin_user, submission_data(first_name="Johnny"), upsert=True)
+    
+    assert response.status_code == 200
+    assert response.json()["replaced_files"] == []
+    assert db_session.query(FileDeletion).count() == 0
+    assert len(stored_files(uploads)) == 3
+
+
+def test_upsert_still_refuses_other_duplicates(api, regular_admin_user, db_session):
+    """Test that an upsert can't take over another employee's CIN"""
+    post_submission(api, regular_admin_user, submission_data(), upsert=True)
+    post_submission(api, regular_admin_user, submission_data(cin="CD654321", te_id="TE54321", grey_card_number="54321-B-09876"), upsert=True)
+    
+    response = post_submission(api, regular_admin_user, submission_data(te_id="TE54321", grey_card_number="54321-B-09876"), upsert=True)
+    assert response.status_code == 409
+    assert db_session.query(Submission).filter(Submission.te_id == "TE54321").one().cin == "CD654321"
+
+
+def test_upsert_refuses_plant_change(api, regular_admin_user, db_session):
+    """Test that an upsert doesn't move an employee to another plant"""
+    db_session.add(Plant(name="Plant B"))
+    db_session.commit()
+    post_submission(api, regular_admin_user, submission_data(), upsert=True)
+    
+    response = post_submission(api, regular_admin_user, submission_data(plant="Plant B"), upsert=True)
+    assert response.status_code == 409
+    assert db_session.query(Submission).one().plant == "Plant A"
+
+
+def test_upsert_refuses_other_plants_submission(api, regular_admin_user, super_admin_user, db_session, uploads):
+    """Test that a regular admin can't overwrite another plant's submission through an upsert"""
+    db_session.add(Plant(name="Plant B"))
+    db_session.commit()
+    post_submission(api, super_admin_user, submission_data(plant="Plant B"), upsert=True)
+    
+    response = post_submission(api, regular_admin_user, submission_data(plant="Plant B", last_name="Smith"), pic=b"new picture", upsert=True)
+    
+    assert response.status_code == 403
+    assert db_session.query(Submission).one().last_name == "Doe"
+    assert len(stored_files(uploads)) == 3
+
+
+def test_create_without_upsert_is_a_duplicate(api, regular_admin_user):
+    """Test that a plain create still refuses a known TE ID"""
+    post_submission(api, regular_admin_user, submission_data(), upsert=True)
+    assert post_submission(api, regular_admin_user, submission_data(), upsert=False).status_code == 409
+
+
+def test_purge_deletes_files_after_delay(db_session, uploads):
+    """Test that queued files are only deleted once their grace period is over"""
+    (uploads / "old.jpg").write_bytes(b"old")
+    now = datetime.now()
+    queue_file_deletions(db_session, ["old.jpg"], now=now)
+    db_session.commit()
+    
+    assert purge_file_deletions(db_session, now=now) == 0
+    assert (uploads / "old.jpg").exists()
+    
+    later = now + timedelta(seconds=settings.FILE_DELETION_DELAY_SECONDS)
+    assert purge_file_deletions(db_session, now=later) == 1
+    assert not (uploads / "old.jpg").exists()
+    assert db_session.query(FileDeletion).count() == 0
+
+
+def test_purge_skips_missing_files(db_session, uploads):
+    """Test that an already missing file is simply dropped from the queue"""
+    queue_file_deletions(db_session, ["missing.jpg"], now=datetime.now() - timedelta(days=1))
+    db_session.commit()
+    
+    assert purge_file_deletions(db_session) == 1
+    assert db_session.query(FileDeletion).count() == 0
\ No newline at end of file
@@ -0,0 +1,174 @@
+import io
+import pytest
+from sqlalchemy import text
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.exc import IntegrityError
+from app.duplicates import (
+    cluster_query, duplicate_query, ensure_identity_keys, find_claimed_keys, find_duplicates_sync, identity_keys
+)
+from app.models import Submission, SubmissionIdentityKey
+from app.security import create_access_token
+
+
+def query_plan(db_session, statement):
+    sql = statement.compile(dialect=sqlite.dialect(), compile_kwargs={"literal_binds": True})
+    return [row[3] for row in db_session.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")]
+
+
+def test_identity_keys_follow_identifiers(db_session, regular_admin_user, make_submission):
+    """Test that normalized keys are set on insert and kept in sync on update"""
+    submission = make_submission(admin_id=regular_admin_user.id, cin="ab 123456", te_id="te-001", grey_card_number="123-a-456")
+    assert (submission.cin_key, submission.te_id_key, submission.grey_card_key) == ("AB123456", "TE001", "123A456")
+    
+    submission.te_id = "TE 002"
+    db_session.commit()
+    assert submission.te_id_key == "TE002"
+
+
+def test_find_duplicates_on_any_identifier(db_session, regular_admin_user, make_submission):
+    """Test that a match on any normalized identifier is reported with the fields that matched"""
+    existing = make_submission(admin_id=regular_admin_user.id, cin="AB123456", te_id="TE001", grey_card_number="123-A-456")
+    
+    assert find_duplicates_sync(db_session, identity_keys("ab123456", "TE999", "999-Z-9")) == [
+        {"submission_id": existing.id, "fields": ["cin"]}
+    ]
+    assert find_duplicates_sync(db_session, identity_keys("CD1", "te 001", "123 A 456")) == [
+        {"submission_id": existing.id, "fields": ["te_id", "grey_card_number"]}
+    ]
+    assert find_duplicates_sync(db_session, identity_keys("CD1", "TE999", "999-Z-9")) == []
+
+
+def test_find_claimed_keys_for_many_rows(db_session, regular_admin_user, make_submission):
+    """Test that a whole sheet's identifiers are matched in chunks and mapped back to their rows"""
+    first = make_submission(admin_id=regular_admin_user.id, cin="AB123456", te_id="TE001", grey_card_number="123-A-456")
+    second = make_submission(admin_id=regular_admin_user.id, cin="CD654321", te_id="TE002", grey_card_number="789-B-12")
+    keys_by_row = {
+        2: identity_keys("ab123456", "TE999", "999-Z-9"),
+        3: identity_keys("CD1", "te 001", "789 B 12"),
+        4: identity_keys("EF1", "TE998", "998-Z-9"),
+    }
+    
+    assert find_claimed_keys(db_session, keys_by_row, chunk_size=1) == {
+        2: [{"submission_id": first.id, "fields": ["cin"]}],
+        3: [
+            {"submission_id": first.id, "fields": ["te_id"]},
+            {"submission_id": second.id, "fields": ["grey_card_number"]},
+        ],
+    }
+
+
+def test_duplicate_lookups_use_indexes(db_session):
+    """Test that the existence check seeks the key indexes and clustering reads an index alone"""
+    check_plan = query_plan(db_session, duplicate_query(identity_keys("AB123456", "TE001", "123-A-456")))
+    for key in ("cin_key", "te_id_key", "grey_card_key"):
+        assert any(f"INDEX ix_submissions_{key}" in detail for detail in check_plan), check_plan
+    assert not any(detail == "SCAN submissions" for detail in check_plan)
+    
+    cluster_plan = query_plan(db_session, cluster_query("cin", 100))
+    assert any("COVERING INDEX ix_submissions_cin_key" in detail for detail in cluster_plan), cluster_plan
+    assert not any("TEMP B-TREE" in detail for detail in cluster_plan)
+
+
+def test_create_submission_refuses_duplicates(router_client, regular_admin_user, db_session, uploads, make_submission):
+    """Test that a duplicate is refused before any file is stored"""
+    existing = make_submission(admin_id=regular_admin_user.id, cin="AB123456", te_id="TE001", grey_card_number="123-A-456")
+    access_token = create_access_token(data={"sub": regular_admin_user.username})
+    
+    response = router_client.post(
+        "/submissions/",
+        headers={"Authorization": f"Bearer {access_token}"},
+        data={
+            "first_name": "John",
+            "last_name": "Doe",
+            "cin": "CD654321",
+            "te_id": "te-001",
+            "date_of_birth": "1990-01-01T00:00:00",
+            "grey_card_number": "789-B-12",
+            "plant": "Plant A"
+        },
+        files={
+            "cin_file": ("CD654321.jpg", io.BytesIO(b"image content"), "image/jpeg"),
+            "picture_file": ("CD654321_i.jpg", io.BytesIO(b"image content"), "image/jpeg"),
+            "grey_card_file": ("789-B-12.jpg", io.BytesIO(b"image content"), "image/jpeg"),
+        }
+    )
+    
+    assert response.status_code == 409
+    assert response.json()["detail"]["duplicates"] == [{"submission_id": existing.id, "fields": ["te_id"]}]
+    assert not any(uploads.iterdir())
+    assert db_session.query(Submission).count() == 1
+
+
+def test_admin_lists_duplicate_clusters(client, super_admin_token, regular_admin_user, db_session, make_submission):
+    """Test that super admins get the clusters of submissions sharing an identifier"""
+    # Duplicates stored before the identity keys were enforced
+    connection = db_session.connection()
+    connection.execute(text("DROP TRIGGER submission_identity_insert"))
+    first = make_submission(admin_id=regular_admin_user.id, cin="AB123456", te_id="TE001", grey_card_number="123-A-456")
+    second = make_submission(admin_id=regular_admin_user.id, cin="ab 123456", te_id="TE002", grey_card_number="789-B-12")
+    make_submission(admin_id=regular_admin_user.id, cin="CD654321", te_id="TE003", grey_card_number="555-C-5")
+    ensure_identity_keys(db_session.connection())
+    db_session.commit()
+    headers = {"Authorization": f"Bearer {super_admin_token}"}
+    
+    response = client.get("/admin/duplicates", params={"field": "cin"}, headers=headers)
+    
+    assert response.status_code == 200
+    assert response.json()["clusters"] == [
+        {"value": "AB123456", "count": 2, "submission_ids": [first.id, second.id]}
+    ]
+    assert client.get("/admin/duplicates", params={"field": "te_id"}, headers=headers).json()["clusters"] == []
+    assert client.get("/admin/duplicates", params={"field": "plant"}, headers=headers).status_code == 400
+
+
+def test_identity_keys_are_unique(db_session, regular_admin_user, make_submission):
+    """Test that the database refuses a second submission claiming a key, and frees keys on update and delete"""
+    submission = make_submission(admin_id=regular_admin_user.id, cin="AB123456", te_id="TE001", grey_card_number="123-A-456")
+    
+    with pytest.raises(IntegrityError):
+        make_submission(admin_id=regular_admin_user.id, cin="CD654321", te_id="te 001", grey_card_number="789-B-12")
+    db_session.rollback()
+    
+    submission.te_id = "TE002"
+    db_session.commit()
+    make_submission(admin_id=regular_admin_user.id, cin="CD654321", te_id="TE001", grey_card_number="789-B-12")
+    db_session.delete(submission)
+    db_session.commit()
+    
+    claimed = {(row.field, row.key) for row in db_session.query(SubmissionIdentityKey)}
+    assert claimed == {("cin", "CD654321"), ("te_id", "TE001"), ("grey_card_number", "789B12")}
+
+
+def test_concurrent_duplicate_is_a_conflict(router_client, regular_admin_user, db_session, uploads, monkeypatch, make_submission):
+    """Test that a duplicate stored after the check passed is answered with 409, and its files removed"""
+    make_submission(admin_id=regular_admin_user.id, cin="AB123456", te_id="TE001", grey_card_number="123-A-456")
+    
+    async def no_duplicates(sessions, keys):
+        return []
+    
+    monkeypatch.setattr("app.routers.submissions.find_duplicates", no_duplicates)
+    access_token = create_access_token(data={"sub": regular_admin_user.username})
+    
+    response = router_client.post(
+        "/submissions/",
+        headers={"Authorization": f"Bearer {access_token}"},
+        data={
+            "first_name": "John",
+            "last_name": "Doe",
+            "cin": "AB123456",
+            "te_id": "TE002",
+            "date_of_birth": "1990-01-01T00:00:00",
+            "grey_card_number": "789-B-12",
+            "plant": "Plant A"
+        },
+        files={
+            "cin_file": ("AB123456.jpg", io.BytesIO(b"image content"), "image/jpeg"),
+            "picture_file": ("AB123456_i.jpg", io.BytesIO(b"image content"), "image/jpeg"),
+            "grey_card_file": ("789-B-12.jpg", io.BytesIO(b"image content"), "image/jpeg"),
+        }
+    )
+    
+    assert response.status_code == 409
+    assert response.json()["detail"] == {"message": "A submission with the same identifiers already exists"}
+    assert not any(path.is_file() for path in uploads.rglob("*"))
+    assert db_session.query(Submission).count() == 1
\ No newline at end of file
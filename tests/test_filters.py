@@ -0,0 +1,98 @@
+import asyncio
+import pytest
+from datetime import date, datetime
+from fastapi import HTTPException
+from sqlalchemy import select
+from app.filters import apply_filters, apply_sort, parse_sort, sort_key
+from app.models import Submission
+from app.pagination import fetch_merged_page
+from .conftest import TestingAsyncSessionLocal
+
+
+@pytest.fixture
+def submissions(db_session, regular_admin_user, super_admin_user):
+    rows = [
+        ("TE1", "111-A-1", datetime(1985, 5, 1), datetime(2024, 1, 10, 9), regular_admin_user.id),
+        ("TE2", "222-A-2", datetime(1990, 6, 15), datetime(2024, 1, 31, 23), regular_admin_user.id),
+        ("TE3", "333-A-3", datetime(1990, 12, 31, 12), datetime(2024, 2, 1), super_admin_user.id),
+        ("TE4", "444-A-4", None, datetime(2024, 3, 5), super_admin_user.id),
+    ]
+    submissions = [
+        Submission(
+            first_name="John",
+            last_name="Doe",
+            cin=f"AB{te_id}",
+            te_id=te_id,
+            grey_card_number=grey_card_number,
+            date_of_birth=date_of_birth,
+            created_at=created_at,
+            plant="Plant A",
+            admin_id=admin_id
+        )
+        for te_id, grey_card_number, date_of_birth, created_at, admin_id in rows
+    ]
+    db_session.add_all(submissions)
+    db_session.commit()
+    return submissions
+
+
+def te_ids(db_session, **filters):
+    query = apply_filters(select(Submission), Submission, **filters).order_by(Submission.id)
+    return [submission.te_id for submission in db_session.scalars(query)]
+
+
+def test_date_ranges_include_whole_days(db_session, submissions):
+    """Test that date ranges cover the full last day"""
+    assert te_ids(db_session, created_from=date(2024, 1, 1), created_to=date(2024, 1, 31)) == ["TE1", "TE2"]
+    assert te_ids(db_session, created_from=date(2024, 2, 1)) == ["TE3", "TE4"]
+    assert te_ids(db_session, dob_from=date(1990, 1, 1), dob_to=date(1990, 12, 31)) == ["TE2", "TE3"]
+
+
+def test_equality_filters(db_session, submissions, super_admin_user):
+    """Test the admin, TE ID and grey card filters and their combination"""
+    assert te_ids(db_session, admin_id=super_admin_user.id) == ["TE3", "TE4"]
+    assert te_ids(db_session, te_id="TE2") == ["TE2"]
+    assert te_ids(db_session, grey_card_number="444-A-4") == ["TE4"]
+    assert te_ids(db_session, admin_id=super_admin_user.id, te_id="TE2") == []
+
+
+def test_invalid_ranges_and_sorts_are_rejected():
+    """Test that inverted ranges and sorts outside the allowlist are refused"""
+    with pytest.raises(HTTPException) as error:
+        apply_filters(select(Submission), Submission, dob_from=date(2000, 1, 1), dob_to=date(1990, 1, 1))
+    assert error.value.status_code == 400
+    
+    assert parse_sort("-created_at") == ("created_at", True)
+    for sort in ("cin", "-last_name", "id; DROP TABLE submissions"):
+        with pytest.raises(HTTPException):
+            parse_sort(sort)
+
+
+def test_merged_sort_matches_database_order(db_session, submissions):
+    """Test that rows merged from several sources keep the requested order, NULLs first"""
+    async def page(field, descending):
+        async with TestingAsyncSessionLocal() as db:
+            query = apply_sort(select(Submission), Submission, field, descending)
+            sources = [
+                (db, query.where(Submission.id % 2 == 0), Submission.id),
+                (db, query.where(Submission.id % 2 == 1), Submission.id),
+            ]
+            rows = await fetch_merged_page(sources, 0, 10, sort_key=sort_key(field), descending=descending)
+            single = (await db.scalars(query.order_by(Submission.id))).all()
+            return [row.te_id for row in rows], [row.te_id for row in single]
+    
+    merged, single = asyncio.run(page("date_of_birth", False))
+    assert merged == single == ["TE4", "TE1", "TE2", "TE3"]
+    merged, single = asyncio.run(page("created_at", True))
+    assert merged == single == ["TE4", "TE3", "TE2", "TE1"]
+
+
+def test_listing_rejects_cursor_with_other_sorts(client, super_admin_token):
+    """Test that cursors are only accepted for the id order"""
+    headers = {"Authorization": f"Bearer {super_admin_token}"}
+    
+    response = client.get("/submissions/", params={"sort": "-created_at", "cursor": "eyJpZCI6MX0"}, headers=headers)
+    assert response.status_code == 400
+    
+    response = client.get("/submissions/", params={"sort": "cin"}, headers=headers)
+    assert response.status_code == 400
\ No newline at end of file
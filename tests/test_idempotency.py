@@ -0,0 +1,122 @@
+import asyncio
+from datetime import datetime, timedelta
+import pytest
+from concurrent.futures import CancelledError
+from app.config import settings
+from app.idempotency import claim_key, request_fingerprint, store_response
+from app.models import IdempotencyKey, Submission
+from .conftest import TestingAsyncSessionLocal, post_submission, submission_data
+
+
+def test_retry_replays_original_response(api, regular_admin_user, db_session, uploads):
+    """Test that a retried key returns the stored response without storing anything again"""
+    first = post_submission(api, regular_admin_user, submission_data(), key="retry-1")
+    replay = post_submission(api, regular_admin_user, submission_data(), key="retry-1")
+    
+    assert first.status_code == replay.status_code == 201
+    assert replay.json() == first.json()
+    assert replay.headers["Idempotent-Replayed"] == "true"
+    assert db_session.query(Submission).count() == 1
+    assert len([path for path in uploads.rglob("*") if path.is_file()]) == 3
+
+
+def test_key_reused_for_different_request(api, regular_admin_user):
+    """Test that a key can't be replayed for a request with other fields"""
+    assert post_submission(api, regular_admin_user, submission_data(), key="reused").status_code == 201
+    
+    response = post_submission(api, regular_admin_user, submission_data(te_id="TE99999"), key="reused")
+    assert response.status_code == 422
+
+
+def test_failed_request_releases_key(api, regular_admin_user, db_session):
+    """Test that a request that failed can be retried with the same key"""
+    failed = post_submission(api, regular_admin_user, submission_data(plant="Plant Z"), key="fix-and-retry")
+    assert failed.status_code == 400
+    assert db_session.query(IdempotencyKey).count() == 0
+    
+    # The error is not replayed either: the request really runs again
+    again = post_submission(api, regular_admin_user, submission_data(plant="Plant Z"), key="fix-and-retry")
+    assert again.status_code == 400
+    
+    assert post_submission(api, regular_admin_user, submission_data(), key="fix-and-retry").status_code == 201
+
+
+def test_concurrent_replay_waits_for_original(test_db):
+    """Test that a replay arriving mid-request waits for the original response"""
+    fingerprint = request_fingerprint({"cin": "AB123456"})
+    
+    async def run():
+        async with TestingAsyncSessionLocal() as original, TestingAsyncSessionLocal() as retry:
+            assert await claim_key(original, 1, "in-flight", fingerprint) is None
+            waiting = asyncio.create_task(claim_key(retry, 1, "in-flight", fingerprint))
+            await asyncio.sleep(0.3)
+            assert not waiting.done()
+            
+            await store_response(original, 1, "in-flight", 201, {"status": "success"})
+            return await asyncio.wait_for(waiting, 5)
+    
+    replay = asyncio.run(run())
+    assert replay.status_code == 201
+    assert replay.body == b'{"status":"success"}'
+
+
+def test_expired_key_is_claimed_again(test_db, monkeypatch):
+    """Test that keys are forgotten after their TTL"""
+    fingerprint = request_fingerprint({"cin": "AB123456"})
+    
+    async def run():
+        async with TestingAsyncSessionLocal() as db:
+            await claim_key(db, 1, "old", fingerprint)
+            await store_response(db, 1, "old", 201, {"status": "success"})
+            monkeypatch.setattr(settings, "IDEMPOTENCY_TTL_SECONDS", -1)
+            return await claim_key(db, 1, "old", fingerprint)
+    
+    assert asyncio.run(run()) is None
+
+
+def test_abandoned_claim_is_taken_over(test_db, monkeypatch):
+    """Test that a claim left in progress by a dead request does not block the key forever"""
+    fingerprint = request_fingerprint({"cin": "AB123456"})
+    monkeypatch.setattr(settings, "IDEMPOTENCY_WAIT_SECONDS", 1)
+    
+    async def run():
+        async with TestingAsyncSessionLocal() as dead, TestingAsyncSessionLocal() as retry:
+            assert await claim_key(dead, 1, "orphan", fingerprint) is None
+            # The dead request never stores a response nor releases its claim
+            await asyncio.sleep(1.1)
+            return await asyncio.wait_for(claim_key(retry, 1, "orphan", fingerprint), 5)
+    
+    assert asyncio.run(run()) is None
+
+
+def test_cancelled_request_releases_key(api, regular_admin_user, db_session, monkeypatch):
+    """Test that a request cancelled mid-flight gives its key up"""
+    async def cancelled(*args, **kwargs):
+        raise asyncio.CancelledError()
+    
+    monkeypatch.setattr("app.routers.submissions._store_submission", cancelled)
+    
+    # The test client hands the cancellation back through its thread portal
+    with pytest.raises(CancelledError):
+        post_submission(api, regular_admin_user, submission_data(), key="cancelled")
+    assert db_session.query(IdempotencyKey).count() == 0
+
+
+def test_abandoned_key_is_taken_over_through_the_endpoint(api, regular_admin_user, db_session, monkeypatch):
+    """Test that a POST retrying a key left in progress by a dead request stores the submission"""
+    monkeypatch.setattr(settings, "IDEMPOTENCY_WAIT_SECONDS", 1)
+    data = submission_data()
+    fingerprint = request_fingerprint({
+        **data, "cin": "AB123456.jpg", "pic": "AB123456_i.jpg", "grey_card": "12345-A-67890.jpg", "upsert": False
+    })
+    db_session.add(IdempotencyKey(
+        admin_id=regular_admin_user.id, key="orphan", fingerprint=fingerprint,
+        created_at=datetime.now() - timedelta(hours=1)
+    ))
+    db_session.commit()
+    
+    response = post_submission(api, regular_admin_user, data, key="orphan")
+    
+    assert response.status_code == 201
+    assert db_session.query(Submission).one().admin_id == regular_admin_user.id
+    assert db_session.query(IdempotencyKey).one().status_code == 201
\ No newline at end of file
@@ -0,0 +1,112 @@
+import io
+import zipfile
+import pytest
+from datetime import datetime
+from openpyxl import Workbook
+from app.imports import ImportFileError, import_submissions
+from app.models import Submission, SubmissionDailyCount
+from app.plants import get_plant
+from app.security import create_access_token
+
+
+HEADER = "first_name,last_name,cin,te_id,date_of_birth,grey_card_number,plant,cin_file,picture_file,grey_card_file"
+
+
+def image_archive(*names):
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as images:
+        for name in names:
+            images.writestr(f"images/{name}", b"image content")
+    archive.seek(0)
+    return archive
+
+
+def test_import_csv_with_row_errors(client, regular_admin_user, db_session, uploads):
+    """Test that valid rows are imported and invalid ones reported by sheet row"""
+    rows = "\n".join([
+        HEADER,
+        "John,Doe,AB123456,TE001,1990-01-01,123-A-456,Plant A,AB123456.jpg,AB123456_i.jpg,123-A-456.jpg",
+        "Bad,Cin,123,TE002,1990-01-01,123-A-456,Plant A,AB123456.jpg,AB123456_i.jpg,123-A-456.jpg",
+        "Jane,Roe,CD654321,TE003,1991-02-03,789-B-12,Plant A,CD654321.jpg,CD654321_i.jpg,789-B-12.jpg",
+        "No,Plant,EF111111,TE004,1990-01-01,555-E-5,Plant Z,AB123456.jpg,AB123456_i.jpg,123-A-456.jpg",
+    ]).encode()
+    images = image_archive("AB123456.jpg", "AB123456_i.jpg", "123-A-456.jpg", "CD654321.jpg", "CD654321_i.jpg")
+    access_token = create_access_token(data={"sub": regular_admin_user.username})
+    
+    response = client.post(
+        "/submissions/import",
+        headers={"Authorization": f"Bearer {access_token}"},
+        files={
+            "rows_file": ("employees.csv", io.BytesIO(rows), "text/csv"),
+            "images_file": ("images.zip", images, "application/zip"),
+        }
+    )
+    
+    assert response.status_code == 200
+    report = response.json()
+    assert (report["rows"], report["imported"], report["failed"]) == (4, 1, 3)
+    assert [error["row"] for error in report["errors"]] == [3, 4, 5]
+    assert report["errors"][0]["errors"] == ["cin: Value error, Invalid CIN format"]
+    assert "grey_card_file: 789-B-12.jpg is not in the image archive" in report["errors"][1]["errors"]
+    assert report["errors"][2]["errors"] == ["Unknown plant: Plant Z"]
+    
+    submission = db_session.get(Submission, report["submission_ids"][0])
+    assert submission.te_id == "TE001"
+    assert submission.plant_id == regular_admin_user.plant_id
+    assert submission.admin_id == regular_admin_user.id
+    assert (uploads / submission.picture_file_path).read_bytes() == b"image content"
+
+
+def test_import_xlsx_in_batches(db_session, regular_admin_user, uploads):
+    """Test that XLSX sheets are imported in batches along with the daily counts"""
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(HEADER.split(","))
+    for index in range(5):
+        sheet.append([
+            "John", f"Doe {index}", f"AB{index}", 1000 + index, datetime(1990, 1, 1), f"{index}-A-456", "plant a",
+            f"AB{index}.jpg", f"AB{index}_i.jpg", "123-A-456.jpg"
+        ])
+    sheet.append([None] * 10)
+    rows = io.BytesIO()
+    workbook.save(rows)
+    rows.seek(0)
+    images = image_archive(*[f"AB{index}.jpg" for index in range(5)], *[f"AB{index}_i.jpg" for index in range(5)], "123-A-456.jpg")
+    
+    report = import_submissions(db_session, rows, "employees.xlsx", images, regular_admin_user.id, batch_size=2)
+    
+    assert (report["rows"], report["imported"], report["failed"]) == (5, 5, 0)
+    submissions = db_session.query(Submission).order_by(Submission.id).all()
+    assert [submission.te_id for submission in submissions] == ["1000", "1001", "1002", "1003", "1004"]
+    assert {submission.plant for submission in submissions} == {"Plant A"}
+    assert db_session.query(SubmissionDailyCount).one().count == 5
+
+
+def test_import_dry_run_writes_nothing(db_session, regular_admin_user, uploads):
+    """Test that a dry run only validates"""
+    rows = io.BytesIO("\n".join([
+        HEADER,
+        "John,Doe,AB123456,TE001,1990-01-01,123-A-456,Plant A,AB123456.jpg,AB123456_i.jpg,123-A-456.jpg",
+    ]).encode())
+    images = image_archive("AB123456.jpg", "AB123456_i.jpg", "123-A-456.jpg")
+    
+    report = import_submissions(db_session, rows, "employees.csv", images, regular_admin_user.id, dry_run=True)
+    
+    assert (report["valid"], report["imported"]) == (1, 0)
+    assert db_session.query(Submission).count() == 0
+    assert not any(uploads.iterdir())
+
+
+def test_import_rejects_unreadable_files(db_session, regular_admin_user):
+    """Test that sheets without the required columns and non-ZIP archives are refused"""
+    with pytest.raises(ImportFileError, match="Missing columns: cin_file"):
+        import_submissions(
+            db_session, io.BytesIO(HEADER.replace("cin_file,", "").encode()), "employees.csv",
+            image_archive(), regular_admin_user.id
+        )
+    with pytest.raises(ImportFileError, match="ZIP"):
+        import_submissions(
+            db_session, io.BytesIO(HEADER.encode()), "employees.csv", io.BytesIO(b"not a zip"), regular_admin_user.id
+        )
+    with pytest.raises(ImportFileError):
+        import_submissions(db_session, io.BytesIO(b""), "employees.pdf", image_archive(), regular_admin_user.id)
\ No newline at end of file
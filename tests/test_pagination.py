@@ -0,0 +1,55 @@
+import pytest
+from datetime import datetime
+from fastapi import HTTPException
+from sqlalchemy import select
+from app.models import Submission
+from app.pagination import encode_cursor, decode_cursor, paginate, page_with_cursor
+
+
+def test_cursor_round_trip():
+    """Test that continuation tokens are opaque and decode back to the id"""
+    cursor = encode_cursor(42)
+    assert "42" not in cursor
+    assert decode_cursor(cursor) == 42
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", encode_cursor(1)[:-2], "eyJpZCI6ICJ4In0"])
+def test_invalid_cursor(cursor):
+    """Test that malformed cursors are rejected with a 400"""
+    with pytest.raises(HTTPException) as exc_info:
+        decode_cursor(cursor)
+    assert exc_info.value.status_code == 400
+
+
+def test_keyset_pages_match_offset_pages(db_session, regular_admin_user):
+    """Test that walking pages by cursor returns the same rows as offset pagination"""
+    for index in range(7):
+        db_session.add(Submission(
+            first_name="John",
+            last_name=f"Doe {index}",
+            cin=f"AB{index}",
+            te_id=f"T{index}",
+            date_of_birth=datetime(1990, 1, 1),
+            grey_card_number=f"{index}-A-1",
+            plant="Plant1" if index % 3 else "Plant2",
+            cin_file_path="test/path/cin.jpg",
+            picture_file_path="test/path/pic.jpg",
+            grey_card_file_path="test/path/grey.jpg",
+            admin_id=regular_admin_user.id
+        ))
+    db_session.commit()
+    
+    query = select(Submission).where(Submission.plant == "Plant1")
+    offset_ids = [s.id for s in db_session.execute(query.order_by(Submission.id)).scalars()]
+    
+    keyset_ids = []
+    cursor = None
+    while True:
+        rows = db_session.execute(paginate(query, Submission.id, 0, 2, cursor)).scalars().all()
+        page, cursor = page_with_cursor(rows, 2)
+        keyset_ids.extend(s.id for s in page)
+        if cursor is None:
+            break
+    
+    assert len(offset_ids) == 4
+    assert keyset_ids == offset_ids
\ No newline at end of file
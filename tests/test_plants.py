@@ -0,0 +1,58 @@
+import asyncio
+import pytest
+from app.models import Plant
+from app.plants import get_plant, resolve_plant, plant_names
+from .conftest import TestingAsyncSessionLocal
+
+
+def test_plant_assigned_on_flush(db_session, regular_admin_user, make_submission):
+    """Test that users and submissions get a plant_id from their plant name"""
+    submission = make_submission(admin_id=regular_admin_user.id, plant="Plant A")
+    
+    assert regular_admin_user.plant_id is not None
+    assert submission.plant_id == regular_admin_user.plant_id
+    assert db_session.query(Plant).count() == 1
+
+
+def test_plant_names_are_matched_loosely(db_session, regular_admin_user, make_submission):
+    """Test that case and whitespace variants resolve to the existing plant"""
+    submission = make_submission(admin_id=regular_admin_user.id, plant="  plant   a ")
+    
+    assert submission.plant_id == regular_admin_user.plant_id
+    assert submission.plant == "Plant A"
+    assert get_plant(db_session, "PLANT A").id == regular_admin_user.plant_id
+    assert get_plant(db_session, "Plant B") is None
+    assert plant_names(db_session) == {regular_admin_user.plant_id: "Plant A"}
+
+
+def test_changing_plant_name_reassigns_plant(db_session, regular_admin_user):
+    """Test that renaming a row's plant moves it to the matching plant"""
+    old_plant_id = regular_admin_user.plant_id
+    regular_admin_user.plant = "Plant B"
+    db_session.commit()
+    
+    assert regular_admin_user.plant_id != old_plant_id
+    assert regular_admin_user.plant_id == get_plant(db_session, "Plant B").id
+
+
+def test_resolve_plant_async(db_session, regular_admin_user):
+    """Test the async plant lookup used by the routers"""
+    async def resolve(name):
+        async with TestingAsyncSessionLocal() as db:
+            plant = await resolve_plant(db, name)
+            return plant.id if plant else None
+    
+    assert asyncio.run(resolve("plant a")) == regular_admin_user.plant_id
+    assert asyncio.run(resolve("Plant Z")) is None
+    assert asyncio.run(resolve("  ")) is None
+
+
+def test_unknown_plant_filter(client, super_admin_token):
+    """Test that filtering submissions by an unknown plant is rejected"""
+    response = client.get(
+        "/submissions/?plant=Plant%20Z",
+        headers={"Authorization": f"Bearer {super_admin_token}"}
+    )
+    
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Plant not found"
\ No newline at end of file
@@ -0,0 +1,134 @@
+import pytest
+from datetime import date
+from itertools import combinations
+from sqlalchemy import select
+from sqlalchemy.dialects import sqlite
+
+from app.models import User, Submission, SubmissionSummary
+from app.pagination import paginate, encode_cursor
+from app.filters import SORT_FIELDS, apply_filters, apply_sort
+from app.reports import _report_query, _watermark, _watermark_query
+from app.summaries import summary_select
+
+
+def query_plan(db, statement):
+    """Return the EXPLAIN QUERY PLAN details of a statement on SQLite"""
+    if hasattr(statement, "statement"):
+        statement = statement.statement
+    sql = statement.compile(dialect=sqlite.dialect(), compile_kwargs={"literal_binds": True})
+    return [row[3] for row in db.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")]
+
+
+def assert_no_table_scan(plan):
+    for detail in plan:
+        # "SCAN <table>" without an index is a full table scan
+        if detail.startswith("SCAN") and "INDEX" not in detail:
+            pytest.fail(f"Query falls back to a table scan: {plan}")
+    assert not any("TEMP B-TREE" in detail for detail in plan), f"Query sorts in memory: {plan}"
+
+
+def test_submissions_listing_by_plant_uses_index(db_session):
+    """Test that the per-plant listing seeks the plant and reads rows in id order"""
+    query = select(Submission).where(Submission.plant_id == 1)
+    
+    offset_plan = query_plan(db_session, paginate(query, Submission.id, 0, 50))
+    cursor_plan = query_plan(db_session, paginate(query, Submission.id, 0, 50, encode_cursor(100)))
+    
+    for plan in (offset_plan, cursor_plan):
+        assert_no_table_scan(plan)
+        assert any("ix_submissions_plant_id" in detail for detail in plan)
+
+
+def test_submissions_listing_by_date_uses_index(db_session):
+    """Test that per-plant listings ordered by submission date need no sort"""
+    columns = SubmissionSummary.__table__.c
+    query = summary_select(SubmissionSummary.__table__).where(columns.plant_id == 1)
+    query = apply_sort(query, columns, "created_at", False)
+    
+    plan = query_plan(db_session, paginate(query, columns.id, 0, 50))
+    
+    assert_no_table_scan(plan)
+    assert any("ix_submission_summary_plant_created_at" in detail for detail in plan)
+
+
+@pytest.mark.parametrize("report_format", [1, 2])
+def test_plant_report_is_index_only(db_session, report_format):
+    """Test that per-plant reports are answered from the covering index alone"""
+    plan = query_plan(db_session, _report_query(db_session, report_format, 1))
+    
+    assert_no_table_scan(plan)
+    assert any("COVERING INDEX ix_submissions_plant_report" in detail for detail in plan)
+
+
+def test_report_watermark_is_index_only(db_session):
+    """Test that checking whether a cached report is stale never reads the table"""
+    plan = query_plan(db_session, _watermark_query(db_session, 1))
+    
+    assert_no_table_scan(plan)
+    assert any("COVERING INDEX" in detail for detail in plan)
+    assert _watermark(db_session, 1) == (0, None, None)
+
+
+def test_auth_lookups_use_index(db_session):
+    """Test that login, token and user-uniqueness lookups seek unique indexes"""
+    login_plan = query_plan(db_session, select(User).where(User.username == "admin"))
+    unique_plan = query_plan(db_session, select(User).where(
+        (User.username == "admin") | (User.email == "admin@example.com") | (User.te_id == "TE001")
+    ))
+    
+    for plan in (login_plan, unique_plan):
+        assert_no_table_scan(plan)
+    assert any("ix_users_username" in detail for detail in login_plan)
+
+
+LISTING_FILTERS = {
+    "created": {"created_from": date(2024, 1, 1), "created_to": date(2024, 1, 31)},
+    "dob": {"dob_from": date(1990, 1, 1), "dob_to": date(1990, 12, 31)},
+    "admin_id": {"admin_id": 1},
+    "te_id": {"te_id": "TE123456"},
+    "grey_card_number": {"grey_card_number": "123-A-456"},
+}
+
+FILTER_COMBINATIONS = [
+    (plant_scoped, names)
+    for plant_scoped in (False, True)
+    for size in range(len(LISTING_FILTERS) + 1)
+    for names in combinations(LISTING_FILTERS, size)
+    # The unfiltered cross-plant listing is a plain walk in id order
+    if plant_scoped or names
+]
+
+
+@pytest.mark.parametrize("plant_scoped,names", FILTER_COMBINATIONS)
+def test_summary_listing_filters_use_index(db_session, plant_scoped, names):
+    """Test that the listing filters are answered through an index of the summary projection"""
+    columns = SubmissionSummary.__table__.c
+    query = summary_select(SubmissionSummary.__table__)
+    if plant_scoped:
+        query = query.where(columns.plant_id == 1)
+    filters = {key: value for name in names for key, value in LISTING_FILTERS[name].items()}
+    query = apply_filters(query, columns, **filters)
+    
+    plan = query_plan(db_session, paginate(query, columns.id, 0, 50))
+    
+    for detail in plan:
+        if detail.startswith("SCAN") and "INDEX" not in detail:
+            pytest.fail(f"Summary listing filtered by {names} falls back to a table scan: {plan}")
+
+
+@pytest.mark.parametrize("plant_scoped", [False, True])
+@pytest.mark.parametrize("sort", SORT_FIELDS + [f"-{field}" for field in SORT_FIELDS])
+def test_summary_listing_sorts_use_index(db_session, plant_scoped, sort):
+    """Test that every allowed sort order of the summary projection is read from an index"""
+    field, descending = sort.lstrip("-"), sort.startswith("-")
+    columns = SubmissionSummary.__table__.c
+    query = summary_select(SubmissionSummary.__table__)
+    if plant_scoped:
+        query = query.where(columns.plant_id == 1)
+    query = apply_sort(query, columns, field, descending)
+    
+    plan = query_plan(db_session, paginate(query, columns.id, 0, 50))
+    
+    assert not any("TEMP B-TREE" in detail for detail in plan), f"Sort by {sort} happens in memory: {plan}"
+    if plant_scoped:
+        assert_no_table_scan(plan)
\ No newline at end of file
@@ -2,9 +2,13 @@ import pytest
 from datetime import datetime
 from fastapi.testclient import TestClient
 import io
+import zipfile
+from unittest.mock import patch
 from app.security import create_access_token
 from app.models import Submission, User, RoleType
-from app.reports import ReportGenerator
+from app.reports import ReportCache, ReportGenerator, iter_report, report_cache, report_pool, shutdown_report_pool
+from app.plants import get_plant
+from app.config import settings
 from openpyxl import load_workbook
 
 
@@ -120,7 +124,7 @@ def test_generate_report_with_plant_filter(db, sample_submissions):
     """Test generating report with plant filter"""
     # Generate report for Plant1 only
     report_generator = ReportGenerator()
-    output, filename = report_generator.generate_format_1(db, plant="Plant1")
+    output, filename = report_generator.generate_format_1(db, plant_id=get_plant(db, "Plant1").id)
     
     # Load the Excel file from the BytesIO object
     wb = load_workbook(output)
@@ -273,4 +277,193 @@ def test_report_with_plant_filter_api(client, super_admin_user, sample_submissio
     ws = wb.active
     
     # Check data (only Plant1 submissions should be included)
-    assert ws.max_row == 3  # Header + 2 submissions
\ No newline at end of file
+    assert ws.max_row == 3  # Header + 2 submissions
+
+
+def test_generate_by_plant_zip(db_session, regular_admin_user):
+    """Test generating one workbook per plant in parallel worker processes"""
+    for index, plant in enumerate(["Plant1", "Plant1", "Plant2"]):
+        db_session.add(Submission(
+            first_name=f"First{index}",
+            last_name=f"Last{index}",
+            cin=f"AB{index}",
+            te_id=f"T{index}",
+            date_of_birth=datetime(1990, 1, 1),
+            grey_card_number=f"{index}-A-1",
+            plant=plant,
+            cin_file_path="test/path/cin.jpg",
+            picture_file_path="test/path/pic.jpg",
+            grey_card_file_path="test/path/grey.jpg",
+            admin_id=regular_admin_user.id
+        ))
+    db_session.commit()
+    
+    report_generator = ReportGenerator()
+    output, filename = report_generator.generate_by_plant(db_session, 1, max_workers=2)
+    
+    assert filename.startswith("employee_data_format1_by_plant_")
+    assert filename.endswith(".zip")
+    
+    with zipfile.ZipFile(output) as archive:
+        names = sorted(archive.namelist())
+        assert names == [
+            f"employee_data_format1_Plant1_{get_plant(db_session, 'Plant1').id}.xlsx",
+            f"employee_data_format1_Plant2_{get_plant(db_session, 'Plant2').id}.xlsx",
+        ]
+        
+        ws = load_workbook(io.BytesIO(archive.read(names[0]))).active
+        assert ws.cell(row=1, column=5).value == "Date of Birth"
+        assert ws.max_row == 3  # Header + 2 Plant1 submissions
+        
+        ws = load_workbook(io.BytesIO(archive.read(names[1]))).active
+        assert ws.max_row == 2  # Header + 1 Plant2 submission
+        assert ws.cell(row=2, column=1).value == "Last2"
+
+
+def test_generate_by_plant_zip_names_are_unique(db_session, regular_admin_user):
+    """Test that plants whose names sanitize to the same file name get separate workbooks"""
+    for index, plant in enumerate(["Plant/A", "Plant:A"]):
+        db_session.add(Submission(
+            first_name=f"First{index}",
+            last_name=f"Last{index}",
+            cin=f"AB{index}",
+            te_id=f"T{index}",
+            date_of_birth=datetime(1990, 1, 1),
+            grey_card_number=f"{index}-A-1",
+            plant=plant,
+            cin_file_path="test/path/cin.jpg",
+            picture_file_path="test/path/pic.jpg",
+            grey_card_file_path="test/path/grey.jpg",
+            admin_id=regular_admin_user.id
+        ))
+    db_session.commit()
+    
+    output, _ = ReportGenerator.generate_by_plant(db_session, 1, max_workers=1)
+    
+    with zipfile.ZipFile(output) as archive:
+        assert sorted(archive.namelist()) == sorted([
+            f"employee_data_format1_Plant_A_{get_plant(db_session, 'Plant/A').id}.xlsx",
+            f"employee_data_format1_Plant_A_{get_plant(db_session, 'Plant:A').id}.xlsx",
+        ])
+
+
+
+def test_generate_cached_serves_until_data_changes(db_session, regular_admin_user):
+    """Test that cached reports are reused until the plant's submissions change"""
+    def add_submission(te_id):
+        db_session.add(Submission(
+            first_name="Cached",
+            last_name=te_id,
+            cin=f"AB{te_id}",
+            te_id=te_id,
+            date_of_birth=datetime(1990, 1, 1),
+            grey_card_number=f"{te_id}-A-1",
+            plant="Plant1",
+            cin_file_path="test/path/cin.jpg",
+            picture_file_path="test/path/pic.jpg",
+            grey_card_file_path="test/path/grey.jpg",
+            admin_id=regular_admin_user.id
+        ))
+        db_session.commit()
+    
+    add_submission("T1")
+    
+    plant_id = get_plant(db_session, "Plant1").id
+    
+    report_generator = ReportGenerator()
+    with patch("app.reports.ReportGenerator.generate", wraps=ReportGenerator.generate) as generate:
+        first, _ = report_generator.generate_cached(db_session, 1, plant_id)
+        second, _ = report_generator.generate_cached(db_session, 1, plant_id)
+        assert generate.call_count == 1
+        assert first.read() == second.read()
+        assert report_cache.watermark(1, plant_id) is not None
+        
+        # A new submission for the plant makes the cached entry stale
+        add_submission("T2")
+        third, _ = report_generator.generate_cached(db_session, 1, plant_id)
+        assert generate.call_count == 2
+    
+    ws = load_workbook(third).active
+    assert ws.max_row == 3  # Header + 2 submissions
+
+
+
+def test_large_reports_are_spooled_to_disk(db_session, regular_admin_user, monkeypatch):
+    """Test that reports above the spool threshold live on disk, not in memory"""
+    monkeypatch.setattr(settings, "REPORT_SPOOL_THRESHOLD", 1024)
+    db_session.add(Submission(
+        first_name="Spooled",
+        last_name="User",
+        cin="AB123456",
+        te_id="T12345",
+        date_of_birth=datetime(1990, 1, 1),
+        grey_card_number="12345-A-67890",
+        plant="Plant1",
+        cin_file_path="test/path/cin.jpg",
+        picture_file_path="test/path/pic.jpg",
+        grey_card_file_path="test/path/grey.jpg",
+        admin_id=regular_admin_user.id
+    ))
+    db_session.commit()
+    
+    plant_id = get_plant(db_session, "Plant1").id
+    
+    report_generator = ReportGenerator()
+    output, filename = report_generator.generate_cached(db_session, 1, plant_id)
+    assert output._rolled
+    assert load_workbook(output).active.cell(row=2, column=1).value == "User"
+    
+    # The cached copy is kept in a file on disk as well
+    cached, _ = report_generator.generate_cached(db_session, 1, plant_id)
+    assert hasattr(cached, "name") and cached.name.endswith(".report")
+    cached.close()
+
+
+def test_iter_report_streams_chunks_and_closes():
+    """Test that report files are streamed in chunks and closed afterwards"""
+    output = io.BytesIO(b"x" * 10)
+    chunks = list(iter_report(output, chunk_size=4))
+    
+    assert chunks == [b"xxxx", b"xxxx", b"xx"]
+    assert output.closed
+
+
+def test_report_cache_is_shared_between_processes(db_session, regular_admin_user):
+    """Test that a report cached by one process is served to the others"""
+    db_session.add(Submission(
+        first_name="Shared",
+        last_name="User",
+        cin="AB123456",
+        te_id="T12345",
+        date_of_birth=datetime(1990, 1, 1),
+        grey_card_number="12345-A-67890",
+        plant="Plant1",
+        cin_file_path="test/path/cin.jpg",
+        picture_file_path="test/path/pic.jpg",
+        grey_card_file_path="test/path/grey.jpg",
+        admin_id=regular_admin_user.id
+    ))
+    db_session.commit()
+    plant_id = get_plant(db_session, "Plant1").id
+    ReportGenerator.generate_cached(db_session, 1, plant_id)
+    
+    # Another worker has its own ReportCache over the same directory
+    other_worker = ReportCache()
+    watermark = report_cache.watermark(1, plant_id)
+    assert other_worker.watermark(1, plant_id) == watermark
+    
+    cached, filename = other_worker.get(1, plant_id, watermark)
+    with cached:
+        assert load_workbook(cached).active.cell(row=2, column=1).value == "User"
+    assert filename.startswith("employee_data_format1_")
+
+def test_report_pool_is_shared_and_spawned():
+    """Test that every report reuses one pool of spawned worker processes"""
+    pool = report_pool()
+    
+    assert report_pool() is pool
+    assert pool._mp_context.get_start_method() == "spawn"
+    
+    shutdown_report_pool()
+    assert report_pool() is not pool
+    shutdown_report_pool()
\ No newline at end of file
@@ -0,0 +1,121 @@
+import json
+import pytest
+from datetime import datetime
+from fastapi.exceptions import ResponseValidationError
+from app import responses
+from app.models import ArchivedSubmission, RoleType, Submission
+from app.responses import FastJSONResponse, type_adapter, typed_response
+from app.schemas import SubmissionDetailResponse, SubmissionListResponse, UserInfo
+
+
+def page(**submission):
+    return {
+        "status": "success",
+        "total": 1,
+        "total_mode": "exact",
+        "skip": 0,
+        "limit": 100,
+        "submissions": [{
+            "id": 1,
+            "first_name": "John",
+            "last_name": "Doe",
+            "cin": "AB123456",
+            "te_id": "TE12345",
+            "date_of_birth": datetime(1990, 1, 1),
+            "grey_card_number": "12345-A-67890",
+            "plant": "Plant A",
+            "created_at": datetime(2024, 5, 6, 7, 8, 9),
+            **submission
+        }]
+    }
+
+
+def test_type_adapters_are_cached():
+    """Test that each schema's TypeAdapter is only built once"""
+    assert type_adapter(SubmissionListResponse) is type_adapter(SubmissionListResponse)
+
+
+def test_typed_response_renders_validated_content():
+    """Test that content is validated, trimmed to the schema and rendered as JSON"""
+    response = typed_response(SubmissionListResponse, page(cin_file_path="secret/cin.jpg"), status_code=201)
+    
+    assert isinstance(response, FastJSONResponse)
+    assert response.status_code == 201
+    data = json.loads(response.body)
+    assert data["next_cursor"] is None
+    assert data["submissions"][0]["created_at"] == "2024-05-06T07:08:09"
+    assert data["submissions"][0]["date_of_birth"] == "1990-01-01T00:00:00"
+    assert "cin_file_path" not in data["submissions"][0]
+
+
+def test_typed_response_rejects_invalid_content():
+    """Test that content not matching its schema fails like a FastAPI response_model"""
+    with pytest.raises(ResponseValidationError):
+        typed_response(SubmissionListResponse, page(id="not an id"))
+
+
+def test_typed_response_reads_orm_attributes():
+    """Test that ORM objects, archived submissions included, validate by attribute"""
+    archived = ArchivedSubmission(
+        id=7, first_name="John", last_name="Doe", cin="AB123456", te_id="TE12345",
+        date_of_birth=datetime(1990, 1, 1), grey_card_number="12345-A-67890", plant="Plant A",
+        cin_file_path="a.jpg", picture_file_path="b.jpg", grey_card_file_path="c.jpg",
+        created_at=datetime(2015, 1, 1), admin_id=None
+    )
+    
+    response = typed_response(SubmissionDetailResponse, {"status": "success", "submission": archived})
+    
+    submission = json.loads(response.body)["submission"]
+    assert submission["id"] == 7
+    assert submission["admin_id"] is None
+    assert submission["cin_file_path"] == "a.jpg"
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_rendering_with_and_without_orjson(monkeypatch, use_orjson):
+    """Test that the stdlib fallback renders the same JSON as orjson"""
+    if not use_orjson:
+        monkeypatch.setattr(responses, "orjson", None)
+    user = {
+        "id": 1, "username": "admin", "email": "admin@example.com", "full_name": "Admin",
+        "role": RoleType.SUPER_ADMIN, "must_reset_password": False
+    }
+    
+    response = typed_response(UserInfo, user)
+    
+    assert json.loads(response.body) == {**user, "role": "super_admin"}
+
+def test_legacy_rows_are_listed_and_shown(client, db_session, regular_admin_user, regular_admin_token):
+    """Test that stored rows failing the input validators still render"""
+    legacy = Submission(
+        first_name="John", last_name="Doe", cin="12345678", te_id="TE1", date_of_birth=None,
+        grey_card_number="12345", plant="Plant A", cin_file_path="a.jpg", picture_file_path="b.jpg",
+        grey_card_file_path="c.jpg", admin_id=regular_admin_user.id
+    )
+    db_session.add(legacy)
+    db_session.commit()
+    headers = {"Authorization": f"Bearer {regular_admin_token}"}
+    
+    listing = client.get("/submissions/", headers=headers)
+    detail = client.get(f"/submissions/{legacy.id}", headers=headers)
+    
+    assert listing.status_code == 200
+    assert listing.json()["submissions"][0]["cin"] == "12345678"
+    assert detail.status_code == 200
+    assert detail.json()["submission"]["date_of_birth"] is None
+
+def test_legacy_users_are_shown(client, db_session, super_admin_user, super_admin_token):
+    """Test that stored users without a plant or a valid email still render"""
+    super_admin_user.plant = None
+    super_admin_user.email = "superadmin"
+    db_session.commit()
+    headers = {"Authorization": f"Bearer {super_admin_token}"}
+    
+    me = client.get("/auth/me", headers=headers)
+    listing = client.get("/admin/users", headers=headers)
+    detail = client.get(f"/admin/users/{super_admin_user.id}", headers=headers)
+    
+    assert me.status_code == listing.status_code == detail.status_code == 200
+    assert me.json()["user"]["plant"] is None
+    assert listing.json()["users"][0]["email"] == "superadmin"
+    assert detail.json()["user"]["id"] == super_admin_user.id
\ No newline at end of file
@@ -0,0 +1,66 @@
+import pytest
+from app.plants import get_plant
+from app.reports import report_cache
+from app.scheduler import ReportScheduler
+from .conftest import TestingSessionLocal
+
+
+def test_warm_renders_every_plant(db_session, regular_admin_user, make_submission):
+    """Test that a forced run renders both formats for every plant and for all plants"""
+    for _ in range(2):
+        make_submission(admin_id=regular_admin_user.id, plant="Plant1")
+    make_submission(admin_id=regular_admin_user.id, plant="Plant2")
+    
+    scheduler = ReportScheduler(session_factory=TestingSessionLocal)
+    
+    # Plant1, Plant2 and the all-plants report, in both formats
+    assert scheduler.warm(force=True) == 6
+    assert report_cache.watermark(1, get_plant(db_session, "Plant1").id)[0] == 2
+    assert report_cache.watermark(2, None)[0] == 3
+    
+    # Nothing changed, so nothing is due
+    assert scheduler.warm(force=True) == 0
+
+
+def test_warm_threshold(db_session, regular_admin_user, make_submission):
+    """Test that outside the nightly run, only plants past the threshold are re-rendered"""
+    make_submission(admin_id=regular_admin_user.id, plant="Plant1")
+    
+    scheduler = ReportScheduler(session_factory=TestingSessionLocal, threshold=2)
+    scheduler.warm(force=True)
+    
+    make_submission(admin_id=regular_admin_user.id, plant="Plant1")
+    assert scheduler.warm() == 0
+    
+    make_submission(admin_id=regular_admin_user.id, plant="Plant1")
+    # Plant1 and the all-plants report, in both formats
+    assert scheduler.warm() == 4
+    assert report_cache.watermark(1, get_plant(db_session, "Plant1").id)[0] == 3
+
+
+def test_warm_renders_uncached_reports(db_session, regular_admin_user, make_submission):
+    """Test that outside the nightly run, reports that were never cached are rendered"""
+    make_submission(admin_id=regular_admin_user.id, plant="Plant1")
+    
+    scheduler = ReportScheduler(session_factory=TestingSessionLocal, threshold=100)
+    
+    # Plant1 and the all-plants report, in both formats
+    assert scheduler.warm() == 4
+    assert scheduler.warm() == 0
+
+
+def test_scheduler_runs_in_one_process(tmp_path):
+    """Test that a second scheduler sharing the lock file does not start until the first stops"""
+    lock_file = str(tmp_path / "report_scheduler.lock")
+    first = ReportScheduler(session_factory=TestingSessionLocal, interval=3600, lock_file=lock_file)
+    second = ReportScheduler(session_factory=TestingSessionLocal, interval=3600, lock_file=lock_file)
+    
+    try:
+        assert first.start()
+        assert not second.start()
+        
+        first.stop()
+        assert second.start()
+    finally:
+        first.stop()
+        second.stop()
\ No newline at end of file
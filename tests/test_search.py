@@ -0,0 +1,88 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+from app.search import search_statement
+
+
+def search(client, token, q, **params):
+    response = client.get(
+        "/submissions/search",
+        params={"q": q, **params},
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 200
+    return [submission["id"] for submission in response.json()["submissions"]]
+
+
+def test_search_prefix_and_accents(client, super_admin_token, regular_admin_user, db_session, make_submission):
+    """Test that every word matches as a prefix, ignoring case and accents"""
+    jose = make_submission(admin_id=regular_admin_user.id, first_name="José", last_name="Álvarez", te_id="TE10001", cin="AB123401")
+    make_submission(admin_id=regular_admin_user.id, first_name="Maria", last_name="Lopez", te_id="TE20002", cin="AB123402")
+    
+    assert search(client, super_admin_token, "jose alv") == [jose.id]
+    assert search(client, super_admin_token, "ALVAREZ") == [jose.id]
+    assert search(client, super_admin_token, "te100") == [jose.id]
+    assert len(search(client, super_admin_token, "ab1234")) == 2
+    assert search(client, super_admin_token, "jose lopez") == []
+
+
+def test_search_total_counts_every_match(client, super_admin_token, regular_admin_user, db_session, make_submission):
+    """Test that the total reports all matches, not just the returned page"""
+    for index in range(3):
+        make_submission(admin_id=regular_admin_user.id, first_name="Nadia", last_name=f"Karim{index}", te_id=f"TE6000{index}")
+    
+    response = client.get(
+        "/submissions/search",
+        params={"q": "nadia", "limit": 2},
+        headers={"Authorization": f"Bearer {super_admin_token}"}
+    )
+    
+    assert response.status_code == 200
+    assert len(response.json()["submissions"]) == 2
+    assert response.json()["total"] == 3
+
+
+def test_search_index_follows_updates_and_deletes(client, super_admin_token, regular_admin_user, db_session, make_submission):
+    """Test that the index is kept in sync by the triggers"""
+    submission = make_submission(admin_id=regular_admin_user.id, first_name="John", last_name="Smith", te_id="TE30003")
+    
+    submission.last_name = "Brown"
+    db_session.commit()
+    assert search(client, super_admin_token, "smith") == []
+    assert search(client, super_admin_token, "brown") == [submission.id]
+    
+    db_session.delete(submission)
+    db_session.commit()
+    assert search(client, super_admin_token, "brown") == []
+
+
+def test_search_plant_scoping(client, regular_admin_token, super_admin_token, regular_admin_user, db_session, make_submission):
+    """Test that regular admins only find submissions of their own plant"""
+    own = make_submission(admin_id=regular_admin_user.id, first_name="Sara", last_name="Haddad", te_id="TE40004")
+    other = make_submission(admin_id=regular_admin_user.id, first_name="Sara", last_name="Haddad", te_id="TE50005", plant="Plant B")
+    
+    assert search(client, regular_admin_token, "haddad") == [own.id]
+    assert sorted(search(client, super_admin_token, "haddad")) == [own.id, other.id]
+    assert search(client, super_admin_token, "haddad", plant="Plant B") == [other.id]
+
+
+def test_search_uses_fts_index(db_session):
+    """Test that searches are answered by the FTS index rather than a table scan"""
+    statement = search_statement("sqlite", "jose alv", plant_id=1)
+    compiled = statement.compile(db_session.get_bind(), compile_kwargs={"literal_binds": True})
+    plan = " ".join(
+        str(row[-1]) for row in db_session.execute(text(f"EXPLAIN QUERY PLAN {compiled}")).all()
+    )
+    
+    assert "VIRTUAL TABLE INDEX" in plan
+    assert "SEARCH submissions USING INTEGER PRIMARY KEY" in plan
+
+
+def test_postgres_search_matches_word_prefixes():
+    """Test that Postgres folds terms like the indexed document and matches them at word starts"""
+    statement = search_statement("postgresql", "José alv")
+    compiled = str(statement.compile(dialect=postgresql.dialect()))
+    
+    assert compiled.count("~ ('\\m' || submission_search_text(") == 2
+    assert "LIKE" not in compiled
+    assert "unaccent" not in compiled
\ No newline at end of file
@@ -0,0 +1,137 @@
+import asyncio
+import pytest
+import zipfile
+from datetime import datetime, timedelta
+from sqlalchemy import insert, select
+from app.archive import archive_submissions
+from app.config import settings
+from app.counts import CountMode
+from app.models import ArchivedSubmission, Submission
+from app.plants import get_plant
+from app.reports import ReportGenerator, _query_rows, _watermark, plant_watermarks
+from app.pagination import fetch_merged_page
+from app.shards import SHARD_ID_SPAN, count_across, shard_router, split
+from .conftest import TestingAsyncSessionLocal
+
+
+@pytest.fixture
+def shards(tmp_path, monkeypatch):
+    """Enable shard mode with shards in a temporary directory"""
+    monkeypatch.setattr(settings, "SHARD_BY_PLANT", True)
+    monkeypatch.setattr(settings, "SHARD_DIR", str(tmp_path))
+    yield shard_router
+    asyncio.run(shard_router.dispose())
+
+
+@pytest.fixture
+def add_to_shard(shards, make_submission):
+    """Store submissions straight into a plant's shard"""
+    def add(plant_id, count):
+        with shard_router.session(plant_id) as db:
+            return [
+                make_submission(session=db, plant=f"Plant {plant_id}", plant_id=plant_id).id for _ in range(count)
+            ]
+    return add
+
+
+def test_shard_ids_are_allocated_per_plant(shards, add_to_shard):
+    """Test that every shard hands out ids from its own plant's range"""
+    first = add_to_shard(1, 2)
+    second = add_to_shard(2, 1)
+    
+    assert first == [SHARD_ID_SPAN + 1, SHARD_ID_SPAN + 2]
+    assert second == [2 * SHARD_ID_SPAN + 1]
+    assert [shards.plant_for_id(submission_id) for submission_id in first + second] == [1, 1, 2]
+    assert shards.plant_ids() == [1, 2]
+
+
+def test_cross_plant_listing_fans_out(shards, add_to_shard):
+    """Test that pages and counts over several shards match a single ordered listing"""
+    ids = add_to_shard(1, 3) + add_to_shard(2, 3)
+    
+    async def list_pages():
+        sessions = {plant_id: shards.async_session(plant_id) for plant_id in shards.plant_ids()}
+        try:
+            query = select(Submission)
+            total = await count_across(sessions, query, "submissions", CountMode.EXACT)
+            sources = [(session, query, Submission.id) for session in sessions.values()]
+            offset_page = await fetch_merged_page(sources, 2, 2)
+            last_page = await fetch_merged_page(sources, 4, 2)
+            return total, [row.id for row in offset_page], [row.id for row in last_page]
+        finally:
+            for session in sessions.values():
+                await session.close()
+    
+    total, offset_page, last_page = asyncio.run(list_pages())
+    
+    assert total == (6, "exact")
+    # One extra row tells the caller another page follows
+    assert offset_page == ids[2:5]
+    assert last_page == ids[4:6]
+
+
+def test_reports_read_every_shard(db_session, shards, add_to_shard):
+    """Test that report rows and watermarks are merged across shards"""
+    add_to_shard(1, 2)
+    add_to_shard(2, 1)
+    
+    assert len(_query_rows(db_session, 1)) == 3
+    assert len(_query_rows(db_session, 1, 2)) == 1
+    assert _watermark(db_session)[0] == 3
+    assert _watermark(db_session, 1)[0] == 2
+
+
+def test_cross_plant_reads_include_unsplit_submissions(db_session, regular_admin_user, shards, add_to_shard, make_submission):
+    """Test that submissions still in the main database are not lost by the fan-out"""
+    add_to_shard(regular_admin_user.plant_id, 2)
+    make_submission(admin_id=regular_admin_user.id)
+    
+    assert len(_query_rows(db_session, 1)) == 3
+    assert _watermark(db_session)[0] == 3
+    assert plant_watermarks(db_session)[regular_admin_user.plant_id][0] == 3
+
+
+def test_split_moves_submissions_into_shards(db_session, regular_admin_user, shards, make_submission):
+    """Test that split() moves each plant's submissions into its own shard"""
+    te_ids = [make_submission(admin_id=regular_admin_user.id).te_id for _ in range(3)]
+    plant_id = get_plant(db_session, "Plant A").id
+    
+    assert split(db_session, batch_size=2) == {plant_id: 3}
+    assert db_session.query(Submission).count() == 0
+    
+    with shards.session(plant_id) as db:
+        moved = db.query(Submission).order_by(Submission.id).all()
+        assert [submission.te_id for submission in moved] == te_ids
+        assert all(shards.plant_for_id(submission.id) == plant_id for submission in moved)
+    
+    # Reports find the moved rows in the shard
+    output, _ = ReportGenerator.generate_by_plant(db_session, 1, max_workers=1)
+    with zipfile.ZipFile(output) as archive:
+        assert archive.namelist() == [f"employee_data_format1_Plant A_{plant_id}.xlsx"]
+
+
+def test_split_is_idempotent_and_moves_the_archive(db_session, regular_admin_user, shards, add_to_shard, make_submission):
+    """Test that re-running an interrupted split copies nothing twice, and archived rows move too"""
+    plant_id = regular_admin_user.plant_id
+    archived_te_ids = [make_submission(admin_id=regular_admin_user.id).te_id for _ in range(3)]
+    archive_submissions(db_session, cutoff=datetime.now() + timedelta(days=1), batch_size=1)
+    hot_te_id = make_submission(admin_id=regular_admin_user.id).te_id
+    left_behind = dict(db_session.execute(select(Submission.__table__)).mappings().one())
+    
+    assert split(db_session) == {plant_id: 4}
+    # A run that stopped after committing the shard but before deleting the originals
+    db_session.execute(insert(Submission.__table__).values(**left_behind))
+    db_session.commit()
+    assert split(db_session) == {plant_id: 0}
+    
+    assert db_session.query(Submission).count() == 0
+    assert db_session.query(ArchivedSubmission).count() == 0
+    with shards.session(plant_id) as db:
+        assert [submission.te_id for submission in db.query(Submission)] == [hot_te_id]
+        archived = db.query(ArchivedSubmission).order_by(ArchivedSubmission.id).all()
+        assert [submission.te_id for submission in archived] == archived_te_ids
+        assert all(shards.plant_for_id(submission.id) == plant_id for submission in archived)
+    
+    # New submissions keep clear of the ids handed to archived rows
+    (new_id,) = add_to_shard(plant_id, 1)
+    assert new_id > max(submission.id for submission in archived)
\ No newline at end of file
@@ -0,0 +1,84 @@
+import pytest
+from datetime import datetime, date
+from app.archive import archive_submissions
+from app.models import SubmissionDailyCount
+from app.plants import get_plant
+from app.stats import record_submissions, rebuild_daily_counts, query_daily_counts
+
+
+def test_record_submissions_increments_counts(db_session, regular_admin_user, make_submission):
+    """Test that recording submissions upserts the plant x day x admin counts"""
+    first = make_submission(admin_id=regular_admin_user.id, plant="Plant1", created_at=datetime(2024, 3, 4, 9, 0))
+    second = make_submission(admin_id=regular_admin_user.id, plant="Plant1", created_at=datetime(2024, 3, 4, 17, 30))
+    record_submissions(db_session, [first, second])
+    db_session.commit()
+    
+    third = make_submission(admin_id=regular_admin_user.id, plant="Plant1", created_at=datetime(2024, 3, 4, 18, 0))
+    record_submissions(db_session, [third])
+    db_session.commit()
+    
+    rows = query_daily_counts(db_session, plant_id=first.plant_id)
+    assert len(rows) == 1
+    assert rows[0].day == date(2024, 3, 4)
+    assert rows[0].admin_id == regular_admin_user.id
+    assert rows[0].count == 3
+
+
+def test_rebuild_daily_counts(db_session, regular_admin_user, super_admin_user, make_submission):
+    """Test that the backfill recomputes the rollup from submissions"""
+    make_submission(admin_id=regular_admin_user.id, plant="Plant1", created_at=datetime(2024, 3, 4, 9, 0))
+    make_submission(admin_id=regular_admin_user.id, plant="Plant1", created_at=datetime(2024, 3, 5, 9, 0))
+    make_submission(admin_id=super_admin_user.id, plant="Plant1", created_at=datetime(2024, 3, 5, 10, 0))
+    make_submission(admin_id=super_admin_user.id, plant="Plant2", created_at=datetime(2024, 3, 5, 11, 0))
+    
+    assert rebuild_daily_counts(db_session) == 4
+    
+    rows = query_daily_counts(db_session, plant_id=get_plant(db_session, "Plant1").id, start=date(2024, 3, 5))
+    assert [(row.admin_id, row.count) for row in rows] == [
+        (regular_admin_user.id, 1),
+        (super_admin_user.id, 1),
+    ]
+    plant2 = get_plant(db_session, "Plant2")
+    assert db_session.query(SubmissionDailyCount).filter(SubmissionDailyCount.plant_id == plant2.id).one().count == 1
+
+
+def test_stats_endpoint_scoped_to_plant(client, regular_admin_token, regular_admin_user, db_session, make_submission):
+    """Test that regular admins only get statistics for their own plant"""
+    make_submission(admin_id=regular_admin_user.id, plant="Plant A", created_at=datetime(2024, 3, 4, 9, 0))
+    make_submission(admin_id=regular_admin_user.id, plant="Plant A", created_at=datetime(2024, 3, 4, 10, 0))
+    make_submission(admin_id=regular_admin_user.id, plant="Plant B", created_at=datetime(2024, 3, 4, 11, 0))
+    rebuild_daily_counts(db_session)
+    
+    response = client.get(
+        "/submissions/stats?plant=Plant B",
+        headers={"Authorization": f"Bearer {regular_admin_token}"}
+    )
+    
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] == "success"
+    assert data["total"] == 2
+    assert data["stats"] == [
+        {
+            "plant": "Plant A",
+            "plant_id": regular_admin_user.plant_id,
+            "day": "2024-03-04",
+            "admin_id": regular_admin_user.id,
+            "count": 2,
+        }
+    ]
+
+
+def test_archive_keeps_daily_counts(db_session, regular_admin_user, make_submission):
+    """Test that archiving leaves the rollup as a rebuild computes it"""
+    old = make_submission(admin_id=regular_admin_user.id, plant="Plant1", created_at=datetime(2020, 3, 4, 9, 0))
+    recent = make_submission(admin_id=regular_admin_user.id, plant="Plant1", created_at=datetime.now())
+    record_submissions(db_session, [old, recent])
+    db_session.commit()
+    
+    assert archive_submissions(db_session, cutoff=datetime(2021, 1, 1)) == 1
+    
+    recorded = [(row.plant_id, row.day, row.admin_id, row.count) for row in query_daily_counts(db_session)]
+    rebuild_daily_counts(db_session)
+    assert [(row.plant_id, row.day, row.admin_id, row.count) for row in query_daily_counts(db_session)] == recorded
+    assert [row.day for row in query_daily_counts(db_session, end=date(2020, 12, 31))] == [date(2020, 3, 4)]
\ No newline at end of file
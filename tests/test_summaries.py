@@ -0,0 +1,65 @@
+from datetime import datetime
+from sqlalchemy import text
+from app.archive import archive_submissions
+from app.models import SubmissionSummary
+from app.summaries import LIST_COLUMNS, ensure_submission_summary
+
+
+def summary_rows(db_session):
+    return {
+        row.id: row for row in db_session.query(SubmissionSummary).populate_existing().order_by(SubmissionSummary.id)
+    }
+
+
+def test_summary_follows_inserts_updates_and_deletes(db_session, regular_admin_user, make_submission):
+    """Test that the triggers keep the projection in step with the submissions table"""
+    submission = make_submission(admin_id=regular_admin_user.id, te_id="TE1")
+    
+    row = summary_rows(db_session)[submission.id]
+    for name in LIST_COLUMNS:
+        assert getattr(row, name) == getattr(submission, name)
+    
+    submission.last_name = "Smith"
+    submission.picture_file_path = "test/path/new.jpg"
+    db_session.commit()
+    assert summary_rows(db_session)[submission.id].last_name == "Smith"
+    
+    db_session.delete(submission)
+    db_session.commit()
+    assert summary_rows(db_session) == {}
+
+
+def test_archived_submissions_leave_the_summary(db_session, regular_admin_user, make_submission):
+    """Test that the archive job's bulk delete also removes the projected rows"""
+    make_submission(admin_id=regular_admin_user.id, te_id="TE1", created_at=datetime(2015, 1, 1))
+    new = make_submission(admin_id=regular_admin_user.id, te_id="TE2")
+    
+    assert archive_submissions(db_session) == 1
+    assert list(summary_rows(db_session)) == [new.id]
+
+
+def test_ensure_backfills_existing_submissions(db_session, regular_admin_user, make_submission):
+    """Test that creating the triggers on an existing database fills the projection"""
+    submission = make_submission(admin_id=regular_admin_user.id, te_id="TE1")
+    connection = db_session.connection()
+    for trigger in ("submission_summary_insert", "submission_summary_update", "submission_summary_delete"):
+        connection.execute(text(f"DROP TRIGGER {trigger}"))
+    connection.execute(text("DELETE FROM submission_summary"))
+    
+    assert ensure_submission_summary(connection) is True
+    assert ensure_submission_summary(connection) is False
+    db_session.commit()
+    assert list(summary_rows(db_session)) == [submission.id]
+
+
+def test_listing_returns_summary_fields(client, db_session, regular_admin_user, regular_admin_token, make_submission):
+    """Test that list pages are served from the projection, without file paths"""
+    submission = make_submission(admin_id=regular_admin_user.id, te_id="TE1")
+    
+    response = client.get("/submissions/", headers={"Authorization": f"Bearer {regular_admin_token}"})
+    
+    assert response.status_code == 200
+    rows = response.json()["submissions"]
+    assert [row["id"] for row in rows] == [submission.id]
+    assert set(rows[0]) == set(LIST_COLUMNS)
+    assert rows[0]["te_id"] == "TE1"
\ No newline at end of file
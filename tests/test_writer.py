@@ -0,0 +1,93 @@
+import asyncio
+import pytest
+from datetime import datetime
+from app.models import Submission
+from app.writer import GroupCommitWriter
+from .conftest import TestingAsyncSessionLocal
+
+
+def insert_submission(te_id, fail=False):
+    async def write(db):
+        if fail:
+            raise ValueError("Bad write")
+        submission = Submission(
+            first_name="John",
+            last_name="Doe",
+            cin=f"AB{te_id}",
+            te_id=te_id,
+            date_of_birth=datetime(1990, 1, 1),
+            grey_card_number=f"{te_id}-A-1",
+            plant="Plant1",
+            cin_file_path="test/path/cin.jpg",
+            picture_file_path="test/path/pic.jpg",
+            grey_card_file_path="test/path/grey.jpg"
+        )
+        db.add(submission)
+        await db.flush()
+        return submission.id
+    return write
+
+
+def test_concurrent_writes_are_group_committed(db_session):
+    """Test that concurrent writes share commits and each caller gets its row id"""
+    async def run():
+        writer = GroupCommitWriter(TestingAsyncSessionLocal, interval_ms=50, max_batch=100)
+        await writer.start()
+        ids = await asyncio.gather(*(writer.submit(insert_submission(f"T{i}")) for i in range(20)))
+        await writer.stop()
+        return writer, ids
+    
+    writer, ids = asyncio.run(run())
+    
+    assert len(set(ids)) == 20
+    assert writer.commits < 20
+    assert db_session.query(Submission).count() == 20
+    assert {s.id: s.te_id for s in db_session.query(Submission)} == {ids[i]: f"T{i}" for i in range(20)}
+
+
+def test_failing_write_only_fails_its_caller(db_session):
+    """Test that a bad write in a batch does not take the other writes down with it"""
+    async def run():
+        writer = GroupCommitWriter(TestingAsyncSessionLocal, interval_ms=50, max_batch=100)
+        await writer.start()
+        results = await asyncio.gather(
+            writer.submit(insert_submission("T1")),
+            writer.submit(insert_submission("T2", fail=True)),
+            writer.submit(insert_submission("T3")),
+            return_exceptions=True
+        )
+        await writer.stop()
+        return results
+    
+    first, second, third = asyncio.run(run())
+    
+    assert isinstance(first, int) and isinstance(third, int)
+    assert isinstance(second, ValueError)
+    assert sorted(s.te_id for s in db_session.query(Submission)) == ["T1", "T3"]
+
+
+def test_submit_requires_running_writer():
+    """Test that submitting to a stopped writer fails instead of hanging"""
+    writer = GroupCommitWriter(TestingAsyncSessionLocal)
+    with pytest.raises(RuntimeError):
+        asyncio.run(writer.submit(insert_submission("T1")))
+
+
+def test_stop_fails_writes_submitted_while_stopping(db_session):
+    """Test that a write racing stop() fails instead of waiting forever"""
+    async def run():
+        writer = GroupCommitWriter(TestingAsyncSessionLocal, interval_ms=50, max_batch=100)
+        await writer.start()
+        first = asyncio.create_task(writer.submit(insert_submission("T1")))
+        await asyncio.sleep(0)
+        stopping = asyncio.create_task(writer.stop())
+        await asyncio.sleep(0)
+        late = asyncio.create_task(writer.submit(insert_submission("T2")))
+        await stopping
+        return await first, await asyncio.wait_for(asyncio.gather(late, return_exceptions=True), 5)
+    
+    first, (late,) = asyncio.run(run())
+    
+    assert isinstance(first, int)
+    assert isinstance(late, RuntimeError)
+    assert [s.te_id for s in db_session.query(Submission)] == ["T1"]
\ No newline at end of file